@@ -0,0 +1,226 @@
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+UPLOAD_PATH_RE = re.compile(r"^/api/agents/(\d+)/files$")
+INGEST_PATH_RE = re.compile(r"^/api/rag/documents/(\d+)/[^/]+/legai$")
+
+
+class AgentHubHandler(BaseHTTPRequestHandler):
+    """
+    The two AgentHub endpoints the uploader talks to:
+
+        POST /api/agents/{id}/files                  multipart upload → {"id": <file id>}
+        POST /api/rag/documents/{id}/{kind}/legai    streamed NDJSON ingest events
+
+    An upload with several `attachment` parts is a bulk upload and gets one
+    entry per part, in order: {"files": [{"filename": …, "id": …} | {"filename": …, "error": …}]}.
+    Each part fails on its own with `part_fail_rate`; more than `max_parts`
+    parts is a 413.
+
+    Every request first waits `latency` seconds and may be answered with a
+    429 (`throttle_rate`) or a 500 (`fail_rate`) instead.
+    """
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+    server: "AgentHubStandIn"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        path = self.path.split("?")[0]
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        roll = random.random()
+        if roll < self.server.throttle_rate:
+            self.server.count("429")
+            return self._json(429, {"detail": "Too many requests"}, {"Retry-After": str(self.server.retry_after)})
+        if roll < self.server.throttle_rate + self.server.fail_rate:
+            self.server.count("500")
+            return self._json(500, {"detail": "Internal server error"})
+
+        if UPLOAD_PATH_RE.match(path):
+            return self._upload(body)
+        if INGEST_PATH_RE.match(path):
+            return self._ingest(body)
+        self.server.count("404")
+        self._json(404, {"detail": "Not found"})
+
+    def _upload(self, body: bytes):
+        parts = self._attachments(body)
+        if not parts:
+            self.server.count("400")
+            return self._json(400, {"detail": "expected a multipart 'attachment' field"})
+
+        if len(parts) == 1:
+            file_id = self.server.add_file(len(body))
+            self.server.count("upload")
+            return self._json(200, {"id": file_id})
+
+        if self.server.max_parts and len(parts) > self.server.max_parts:
+            self.server.count("413")
+            return self._json(413, {"detail": f"at most {self.server.max_parts} attachments per request"})
+
+        files = []
+        for filename, size in parts:
+            if random.random() < self.server.part_fail_rate:
+                self.server.count("part_error")
+                files.append({"filename": filename, "error": "could not store file"})
+            else:
+                files.append({"filename": filename, "id": self.server.add_file(size)})
+        self.server.count("bulk_upload")
+        self._json(200, {"files": files})
+
+    def _attachments(self, body: bytes) -> list[tuple[str, int]]:
+        """
+        (filename, size) of every `attachment` part of a multipart body.
+        """
+        content_type = self.headers.get("Content-Type", "")
+        if not content_type.startswith("multipart/form-data") or "boundary=" not in content_type:
+            return []
+        boundary = content_type.split("boundary=", 1)[1].split(";")[0].strip('"').encode("latin-1")
+
+        parts = []
+        for part in body.split(b"--" + boundary)[1:-1]:
+            headers, _, data = part.partition(b"\r\n\r\n")
+            match = re.search(rb'name="attachment"(?:; filename="([^"]*)")?', headers)
+            if match:
+                parts.append(((match.group(1) or b"").decode("utf-8", "replace"), len(data) - 2))  # minus the trailing CRLF
+        return parts
+
+    def _ingest(self, body: bytes):
+        try:
+            file_ids = json.loads(body)["file_ids"]
+        except (ValueError, KeyError, TypeError):
+            self.server.count("400")
+            return self._json(400, {"detail": "expected a JSON body with file_ids"})
+
+        self.server.count("ingest")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        self._chunk({"status": "processing", "file_ids": file_ids})
+        for file_id in file_ids:
+            if self.server.ingest_latency:
+                time.sleep(self.server.ingest_latency)
+            if self.server.has_file(file_id):
+                self._chunk({"status": "success", "file_id": file_id})
+            else:
+                self._chunk({"status": "error", "file_id": file_id, "message": f"unknown file id {file_id}"})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, event: dict):
+        data = json.dumps(event).encode("utf-8") + b"\n"
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _json(self, status: int, payload: dict, headers: dict | None = None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class AgentHubStandIn(ThreadingHTTPServer):
+    """
+    Local stand-in for AgentHub, to measure and tune the uploader without a
+    shared dev service. Uploaded files are only counted, not kept.
+    """
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address,
+        latency: float = 0.0,
+        ingest_latency: float = 0.0,
+        fail_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: int = 0,
+        part_fail_rate: float = 0.0,
+        max_parts: int = 0,
+        verbose: bool = False,
+    ):
+        super().__init__(address, AgentHubHandler)
+        self.latency = latency
+        self.ingest_latency = ingest_latency  # per file, while the ingest stream is open
+        self.fail_rate = fail_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.part_fail_rate = part_fail_rate  # per attachment of a bulk upload
+        self.max_parts = max_parts            # 0: no limit
+        self.verbose = verbose
+
+        self.lock = threading.Lock()
+        self.files: dict[int, int] = {}  # file id → upload size
+        self.stats: dict[str, int] = {}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def add_file(self, size: int) -> int:
+        with self.lock:
+            file_id = len(self.files) + 1
+            self.files[file_id] = size
+            return file_id
+
+    def has_file(self, file_id) -> bool:
+        with self.lock:
+            return file_id in self.files
+
+    def count(self, key: str):
+        with self.lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+
+def serve(port: int = 0, **options) -> AgentHubStandIn:
+    """
+    Start a stand-in on a background thread (port 0 picks a free port); call .shutdown() to stop.
+    """
+    server = AgentHubStandIn(("127.0.0.1", port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def arg_value(flag: str, default: str) -> str:
+    if flag in sys.argv and sys.argv.index(flag) + 1 < len(sys.argv):
+        return sys.argv[sys.argv.index(flag) + 1]
+    return default
+
+
+if __name__ == "__main__":
+    # python agenthub_standin.py --port 8766 [--latency 0.05] [--ingest-latency 0.2] [--fail-rate 0.05] [--throttle-rate 0.1]
+    #                            [--part-fail-rate 0.02] [--max-parts 100]
+    server = AgentHubStandIn(
+        ("127.0.0.1", int(arg_value("--port", "8766"))),
+        latency=float(arg_value("--latency", "0")),
+        ingest_latency=float(arg_value("--ingest-latency", "0")),
+        fail_rate=float(arg_value("--fail-rate", "0")),
+        throttle_rate=float(arg_value("--throttle-rate", "0")),
+        retry_after=int(arg_value("--retry-after", "0")),
+        part_fail_rate=float(arg_value("--part-fail-rate", "0")),
+        max_parts=int(arg_value("--max-parts", "0")),
+        verbose=True,
+    )
+    print(f"AgentHub stand-in: {server.base_url}")
+    print(f"  python main.py --base-url {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n{server.stats}")
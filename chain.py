@@ -1,11 +1,97 @@
-from uploader import LawCodeUploader
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from rich.console import Console
+from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn, TimeElapsedColumn
+
+from chunking import CHUNK_OVERLAP
+from dedupe import Duplicates, find_duplicates
+from manifest import UploadManifest
+from uploader import UPLOAD_BATCH_BYTES, ArticleResult, LawCodeUploader, console, make_session
+
+
+class ChainProgress:
+    """
+    One progress bar per law code plus an overall bar with throughput, fed by
+    the uploaders' `on_result` callbacks from their worker threads.
+    """
+    def __init__(self):
+        self.progress = Progress(
+            TextColumn("{task.description}"),
+            BarColumn(),
+            MofNCompleteColumn(),
+            TextColumn("{task.fields[status]}"),
+            TimeElapsedColumn(),
+            console=console,
+        )
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.counts: dict[str, int] = {"ingested": 0, "skipped": 0, "failed": 0, "cancelled": 0}
+        self.total = self.progress.add_task("[bold]all codes[/bold]", total=0, status="")
+        self.tasks: dict[str, int] = {}
+
+    def add(self, law_code: str, total: int):
+        self.tasks[law_code] = self.progress.add_task(law_code, total=total, status="")
+        self.progress.update(self.total, total=self.progress.tasks[self.total].total + total)
+
+    def callback(self, law_code: str):
+        def on_result(result: ArticleResult):
+            with self.lock:
+                self.counts[result.status] = self.counts.get(result.status, 0) + 1
+                done = self.counts["ingested"] + self.counts["skipped"] + self.counts["failed"]
+                rate = done / (time.monotonic() - self.started)
+                failed = self.counts["failed"]
+
+            status = f"{rate:.1f} articles/sec"
+            if failed:
+                status += f", [red]{failed} failed[/red]"
+            self.progress.advance(self.tasks[law_code])
+            self.progress.update(self.total, advance=1, status=status)
+        return on_result
+
+    def snapshot(self) -> dict[str, int]:
+        with self.lock:
+            return dict(self.counts)
 
 
 class LawCodeUploaderChain:
-    def __init__(self, directory: str = "./codes"):
+    def __init__(
+        self,
+        directory: str = "./codes",
+        workers: int = 1,
+        rate_limits: dict[str, float] | None = None,
+        batch_size: int = 1,
+        batch_window: float = 5.0,
+        dry_run: bool = False,
+        parallel_codes: int = 1,
+        base_url: str | None = None,
+        chunk_tokens: int | None = None,
+        chunk_overlap: int = CHUNK_OVERLAP,
+        dedupe: float | None = None,
+        upload_batch: int = 1,
+        upload_batch_bytes: int = UPLOAD_BATCH_BYTES,
+    ):
         self.directory = directory
+        self.workers = workers
+        self.rate_limits = rate_limits
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.dry_run = dry_run
+        # parallel_codes > 1 uploads several codes at once; `workers` is then the
+        # in-flight request budget shared by all of them
+        self.parallel_codes = parallel_codes
+        self.base_url = base_url
+        # chunk_tokens > 0 uploads long articles as token-bounded chunks (see chunking.py)
+        self.chunk_tokens = chunk_tokens
+        self.chunk_overlap = chunk_overlap
+        # dedupe: similarity threshold above which articles are uploaded once (see dedupe.py)
+        self.dedupe = dedupe
+        # upload_batch > 1 sends that many articles per upload request (bulk upload)
+        self.upload_batch = upload_batch
+        self.upload_batch_bytes = upload_batch_bytes
     
-    def explore(self):
+    def discover(self) -> list[str]:
         import os
         
         if not os.path.exists(self.directory):
@@ -14,12 +100,138 @@ class LawCodeUploaderChain:
         dirs = os.listdir(self.directory)
         if not dirs:
             print("No files found in the directory.")
-            return
+            return []
         
         print("Files in the directory:")
+        law_codes = []
         for dir in dirs:
             if not os.path.isdir(os.path.join(self.directory, dir)):
                 print(f"- {dir} is not directory, skipping.")
+                continue
             print(f"- discovered... {dir} Starting law upload process.")
-            uploader = LawCodeUploader(dir)
-            uploader.run()
\ No newline at end of file
+            law_codes.append(dir)
+        return law_codes
+
+    def find_duplicates(self) -> Duplicates | None:
+        """
+        Near-duplicate clusters of the whole directory, when dedupe is on.
+        """
+        if not self.dedupe:
+            return None
+        duplicates = find_duplicates(self.directory, self.dedupe)
+        folded = sum(len(cluster) - 1 for cluster in duplicates.clusters)
+        console.print(f"{len(duplicates.clusters)} near-duplicate clusters, {folded} articles uploaded only as their canonical copy")
+        return duplicates
+
+    def explore(self):
+        law_codes = self.discover()
+        if not law_codes:
+            return
+
+        if self.parallel_codes > 1 and not self.dry_run:
+            return self.schedule(law_codes)
+        
+        # One manifest shared by every law code
+        manifest = UploadManifest()
+        duplicates = self.find_duplicates()
+
+        for dir in law_codes:
+            uploader = LawCodeUploader(
+                dir,
+                workers=self.workers,
+                rate_limits=self.rate_limits,
+                batch_size=self.batch_size,
+                batch_window=self.batch_window,
+                manifest=manifest,
+                base_url=self.base_url,
+                chunk_tokens=self.chunk_tokens,
+                chunk_overlap=self.chunk_overlap,
+                duplicates=duplicates,
+                upload_batch=self.upload_batch,
+                upload_batch_bytes=self.upload_batch_bytes,
+            )
+            if self.dry_run:
+                uploader.print_plan()
+            else:
+                uploader.run()
+
+    def schedule(self, law_codes: list[str]):
+        """
+        Upload `parallel_codes` law codes at a time over one connection pool,
+        with at most `workers` requests in flight across all of them.
+
+        Codes with the most bytes to upload start first, so the big ones
+        (tax, civil_p2, administrative) do not run alone at the end. Ctrl-C
+        stops handing out new articles and waits for those in flight; every
+        code stays resumable from its checkpoint journal.
+        """
+        manifest = UploadManifest()
+        duplicates = self.find_duplicates()
+        session = make_session(pool_size=self.workers)
+        budget = threading.BoundedSemaphore(self.workers)
+        # One set of worker threads for every code, as many as requests may be in flight
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        stop = threading.Event()
+        progress = ChainProgress()
+        quiet = Console(quiet=True)
+
+        uploaders = []
+        for law_code in law_codes:
+            uploader = LawCodeUploader(
+                law_code,
+                workers=self.workers,
+                rate_limits=self.rate_limits,
+                session=session,
+                batch_size=self.batch_size,
+                batch_window=self.batch_window,
+                manifest=manifest,
+                budget=budget,
+                stop=stop,
+                on_result=progress.callback(law_code),
+                executor=executor,
+                console=quiet,
+                base_url=self.base_url,
+                chunk_tokens=self.chunk_tokens,
+                chunk_overlap=self.chunk_overlap,
+                duplicates=duplicates,
+                upload_batch=self.upload_batch,
+                upload_batch_bytes=self.upload_batch_bytes,
+            )
+            plan = uploader.plan()
+            uploaders.append((plan.bytes_to_upload, plan.to_upload, uploader))
+
+        # Longest first
+        uploaders.sort(key=lambda item: item[0], reverse=True)
+        for _, to_upload, uploader in uploaders:
+            progress.add(uploader.law_code, to_upload)
+
+        # Shared across codes, so limits apply to the chain as a whole
+        for _, _, uploader in uploaders[1:]:
+            uploader.limits = uploaders[0][2].limits
+
+        started = time.monotonic()
+        with progress.progress, executor, ThreadPoolExecutor(max_workers=self.parallel_codes) as pool:
+            futures = {pool.submit(uploader.run): uploader.law_code for _, to_upload, uploader in uploaders if to_upload}
+            try:
+                # Poll, so Ctrl-C reaches the main thread
+                while wait(futures, timeout=0.5).not_done:
+                    pass
+            except KeyboardInterrupt:
+                stop.set()
+                console.print("[yellow]Interrupted, finishing in-flight articles...[/yellow]")
+                wait(futures)
+
+        for future, law_code in futures.items():
+            if future.exception():
+                console.print(f"[red]✗ {law_code}: {future.exception()}[/red]")
+
+        counts = progress.snapshot()
+        elapsed = time.monotonic() - started
+        done = counts["ingested"] + counts["skipped"] + counts["failed"]
+        console.print(
+            f"[bold]{len(futures)} codes:[/bold] {counts['ingested']} ingested, {counts['skipped']} skipped, "
+            f"{counts['failed']} failed, {counts['cancelled']} cancelled "
+            f"in {elapsed:.1f}s — {done / elapsed if elapsed else 0:.2f} articles/sec"
+        )
+        if stop.is_set():
+            console.print("[yellow]Stopped early; run again to resume.[/yellow]")
@@ -0,0 +1,163 @@
+import math
+import os
+import re
+
+from interfaces.metadata import ChunkMetadata, Metadata
+
+
+CHUNK_TOKENS = 512
+CHUNK_OVERLAP = 64
+
+# No tokenizer dependency: tokens are estimated from characters. BPE tokenizers
+# average about three characters per token on Russian legal text.
+CHARS_PER_TOKEN = 3.0
+
+PARAGRAPH_RE = re.compile(r"\n\s*")
+# A sentence ends with . ! ? or ; and the next one starts with a capital, a digit, « or (
+SENTENCE_RE = re.compile(r"(?<=[.!?;])\s+(?=[«(\"\dA-ZА-ЯЁ])")
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def token_chars(tokens: int) -> int:
+    """
+    Characters that fit into `tokens`, by the same estimate.
+    """
+    return int(tokens * CHARS_PER_TOKEN)
+
+
+def body_budget(header: str, max_tokens: int) -> int:
+    """
+    Tokens left for an article's text once its header line (and the newline
+    after it) is counted.
+    """
+    return max_tokens - estimate_tokens(header) - 1
+
+
+def fits(content: bytes, max_tokens: int) -> bool:
+    """
+    Whether an article file ("Статья N ABBR" header line, then the text) fits
+    into `max_tokens` as it is, header included.
+    """
+    header, _, body = content.decode("utf-8").partition("\n")
+    return len(body) <= token_chars(body_budget(header, max_tokens))
+
+
+def fits_unread(size: int, max_tokens: int) -> bool:
+    """
+    Whether an article file of `size` bytes fits into `max_tokens` for sure,
+    without reading it. It has at most `size` characters, header included,
+    and rounding up the header's tokens and counting its newline cost at most
+    two tokens more than the header's characters take.
+    """
+    return size <= token_chars(max_tokens - 2)
+
+
+def split_units(text: str, limit: int) -> list[str]:
+    """
+    Sentences of `text`, paragraph by paragraph. A sentence longer than
+    `limit` characters is cut at word boundaries, and a single word longer
+    than that mid-word.
+    """
+    units = []
+    for paragraph in PARAGRAPH_RE.split(text):
+        for sentence in SENTENCE_RE.split(paragraph.strip()):
+            if len(sentence) <= limit:
+                if sentence:
+                    units.append(sentence)
+                continue
+
+            piece = ""
+            for word in sentence.split():
+                while len(word) > limit:
+                    if piece:
+                        units.append(piece)
+                        piece = ""
+                    units.append(word[:limit])
+                    word = word[limit:]
+                if piece and len(piece) + 1 + len(word) > limit:
+                    units.append(piece)
+                    piece = ""
+                piece = f"{piece} {word}" if piece else word
+            if piece:
+                units.append(piece)
+    return units
+
+
+def chunk_text(text: str, max_tokens: int = CHUNK_TOKENS, overlap: int = CHUNK_OVERLAP) -> list[str]:
+    """
+    Split `text` into chunks of at most `max_tokens` (estimated), on sentence
+    boundaries. Each chunk after the first starts with the last sentences of
+    the one before, as many as fit into `overlap` tokens.
+    """
+    limit = token_chars(max_tokens)
+    if len(text) <= limit:
+        return [text]
+
+    overlap_limit = token_chars(overlap)
+    chunks: list[str] = []
+    current: list[str] = []
+    size = 0  # len(" ".join(current))
+
+    for unit in split_units(text, limit):
+        if current and size + 1 + len(unit) > limit:
+            chunks.append(" ".join(current))
+
+            # Carry whole sentences over, newest first, while they fit the overlap and leave room for `unit`
+            carried: list[str] = []
+            carried_size = 0
+            for sentence in reversed(current):
+                grown = carried_size + len(sentence) + (1 if carried else 0)
+                if grown > overlap_limit or grown + 1 + len(unit) > limit:
+                    break
+                carried.insert(0, sentence)
+                carried_size = grown
+            current, size = carried, carried_size
+
+        size += len(unit) + (1 if current else 0)
+        current.append(unit)
+
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def chunk_article(
+    metadata: Metadata, content: bytes, max_tokens: int = CHUNK_TOKENS, overlap: int = CHUNK_OVERLAP
+) -> list[tuple[Metadata, bytes]]:
+    """
+    Split an article file ("Статья N ABBR" header line, then the text) into
+    chunks that each repeat the header, so every chunk still says which
+    article it is from. An article that fits comes back unchanged, as the
+    only item; chunks get ChunkMetadata with "<article>#<index>" as their
+    article number and file name.
+    """
+    text = content.decode("utf-8")
+    header, _, body = text.partition("\n")
+
+    budget = body_budget(header, max_tokens)
+    if budget <= overlap:
+        raise ValueError(f"{max_tokens} tokens leave no room for text after the header of article {metadata.article_number}")
+
+    pieces = chunk_text(body, budget, overlap)
+    if len(pieces) == 1:
+        return [(metadata, content)]
+
+    stem, extension = os.path.splitext(metadata.file_path)
+    return [
+        (
+            ChunkMetadata(
+                law_type=metadata.law_type,
+                article_number=f"{metadata.article_number}#{index}",
+                file_path=f"{stem}#{index}{extension}",
+                parent_article_number=metadata.article_number,
+                chunk_index=index,
+                chunk_count=len(pieces),
+                duplicates=getattr(metadata, "duplicates", []),
+            ),
+            f"{header}\n{piece}".encode("utf-8"),
+        )
+        for index, piece in enumerate(pieces)
+    ]
@@ -0,0 +1,131 @@
+import importlib
+import importlib.machinery
+import sys
+import time
+
+STARTED = time.perf_counter()
+
+# One entry point for the parser, uploader and their tools. Nothing heavy is
+# imported up front: each command imports its own module when it runs, so
+# `status` never loads requests, rich or pydantic. Every command takes the
+# options of the script it stands for.
+#
+# python cli.py download [--connections 8]                     law_parser/parser.py --download
+# python cli.py parse [<code_id>... | --all] [--workers 4] ...  law_parser/parser.py
+# python cli.py status                                         codes and articles from codes/catalog.json
+# python cli.py upload [--workers 8] [--batch-size 25] ...     main.py
+# python cli.py sync [--once] [--interval 21600] ...           sync.py
+# python cli.py bench [parse] [<code_id>...] [--repeat 3] ...  law_parser/bench.py
+# python cli.py bench upload [--workers 1,4,8] ...             upload_bench.py
+# python cli.py <command> ... --profile-import                 time the command's imports, slowest modules first
+
+# command → (module, function, arguments put in front of the command's own)
+COMMANDS = {
+    "download": ("law_parser.parser", "main", ["--download"]),
+    "parse": ("law_parser.parser", "main", []),
+    "status": ("law_parser.parser", "show_status", None),
+    "upload": ("main", "main", []),
+    "sync": ("sync", "main", []),
+    "bench": ("law_parser.bench", "main", []),
+    "bench upload": ("upload_bench", "main", []),
+}
+FILE_LOADERS = (
+    importlib.machinery.SourceFileLoader,
+    importlib.machinery.SourcelessFileLoader,
+    importlib.machinery.ExtensionFileLoader,
+)
+HEAVY = ("requests", "rich", "pydantic", "bs4", "multiprocessing", "http.client")
+
+
+class ImportProfiler:
+    """
+    Meta path finder that times every module loaded from a file after it is
+    installed. Times are inclusive: a module's time covers the modules it
+    imports in turn.
+    """
+    def __init__(self):
+        self.seconds: dict[str, float] = {}
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        # File loaders are made per module, so wrapping one touches no other import
+        loader = spec.loader
+        if isinstance(loader, FILE_LOADERS):
+            exec_module = loader.exec_module
+
+            def timed(module):
+                started = time.perf_counter()
+                try:
+                    exec_module(module)
+                finally:
+                    self.seconds[name] = time.perf_counter() - started
+
+            loader.exec_module = timed
+        return spec
+
+    def report(self, command: str, imports: float, limit: int = 12):
+        print(
+            f"  {command}: ready {(time.perf_counter() - STARTED) * 1000:.1f} ms after cli.py started, "
+            f"{len(self.seconds)} modules imported in {imports * 1000:.1f} ms",
+            file=sys.stderr,
+        )
+        for name, seconds in sorted(self.seconds.items(), key=lambda item: -item[1])[:limit]:
+            print(f"    {seconds * 1000:7.1f} ms  {name}", file=sys.stderr)
+        loaded = [name for name in HEAVY if name in sys.modules]
+        print(f"  heavy modules loaded: {', '.join(loaded) if loaded else 'none'}", file=sys.stderr)
+
+
+def command_of(args: list[str]) -> tuple[str, list[str]]:
+    """
+    The command named by the arguments and the arguments left for it.
+    """
+    if args[:2] == ["bench", "upload"]:
+        return "bench upload", args[2:]
+    if args[:2] == ["bench", "parse"]:
+        return "bench", args[2:]
+    return args[0], args[1:]
+
+
+def usage():
+    with open(__file__, encoding="utf-8") as source:
+        for line in source:
+            if line.startswith("# python cli.py"):
+                print("  " + line[2:].rstrip())
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if arg != "--profile-import"]
+    if not args or args[0] in ("-h", "--help") or command_of(args)[0] not in COMMANDS:
+        usage()
+        sys.exit(0 if not args or args[0] in ("-h", "--help") else 1)
+
+    command, rest = command_of(args)
+    module_name, function_name, prefix = COMMANDS[command]
+
+    profiler = None
+    if "--profile-import" in sys.argv:
+        profiler = ImportProfiler()
+        sys.meta_path.insert(0, profiler)
+
+    # The command's module reads its options from sys.argv, as when it is run as a script
+    sys.argv = [f"{module_name.rpartition('.')[2]}.py", *(prefix or []), *rest]
+    started = time.perf_counter()
+    function = getattr(importlib.import_module(module_name), function_name)
+
+    if profiler is not None:
+        sys.meta_path.remove(profiler)
+        profiler.report(command, time.perf_counter() - started)
+
+    function()
+
+
+if __name__ == "__main__":
+    main()
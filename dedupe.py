@@ -0,0 +1,243 @@
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+
+from rich.console import Console
+from rich.table import Table
+
+from law_parser.catalog import Catalog
+from law_parser.normalize import normalizer
+from law_parser.packed import PackReader, is_packed, load_metadata, pack_path
+
+
+console = Console()
+
+DUPLICATES_NAME = "duplicates.json"
+INDEX_VERSION = 1
+
+SHINGLE_WORDS = 5
+NUM_PERM = 128     # signature length
+BANDS = 16         # LSH bands of NUM_PERM // BANDS rows: pairs above ~0.7 similarity share a band
+THRESHOLD = 0.9    # estimated Jaccard similarity of two articles that makes them near-duplicates
+
+WORD_RE = re.compile(r"\w+")
+EMPTY = 1 << 64    # above every 64-bit hash
+OFFSET = 1 << 57   # densification step, above every bin value (2^64 / NUM_PERM)
+
+Key = tuple[str, str]  # (law_type, article_number)
+
+
+def shingles(text: str) -> set[int]:
+    """
+    64-bit hashes of the `SHINGLE_WORDS`-word windows of `text`, lowercased.
+    """
+    words = WORD_RE.findall(text.lower())
+    grams = [" ".join(words[i:i + SHINGLE_WORDS]) for i in range(max(1, len(words) - SHINGLE_WORDS + 1))]
+    return {int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest(), "big") for gram in grams if gram}
+
+
+def signature(hashes: set[int], size: int = NUM_PERM) -> tuple[int, ...]:
+    """
+    One-permutation MinHash: every shingle hash is looked at once, and lands
+    in one of `size` bins that keeps its minimum, instead of `size` separate
+    permutations per shingle. An empty bin borrows the nearest non-empty bin
+    to its right, shifted by the distance (rotation densification), so short
+    texts still get comparable signatures.
+    """
+    bins = [EMPTY] * size
+    for value in hashes:
+        slot = value % size
+        value //= size
+        if value < bins[slot]:
+            bins[slot] = value
+
+    if not hashes or EMPTY not in bins:
+        return tuple(bins)
+
+    dense = list(bins)
+    for slot in range(size):
+        distance = 1
+        while bins[slot] == EMPTY and bins[(slot + distance) % size] == EMPTY:
+            distance += 1
+        if bins[slot] == EMPTY:
+            dense[slot] = bins[(slot + distance) % size] + distance * OFFSET
+    return tuple(dense)
+
+
+def similarity(a: tuple[int, ...], b: tuple[int, ...]) -> float:
+    """
+    Estimated Jaccard similarity: the share of equal signature bins.
+    """
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class DuplicateIndex:
+    """
+    MinHash/LSH index of article texts. Each signature is cut into `bands`
+    bands; articles that agree on a whole band land in the same bucket and
+    are the only pairs compared, so building it is linear in the corpus
+    rather than pairwise.
+    """
+    def __init__(self, threshold: float = THRESHOLD, num_perm: int = NUM_PERM, bands: int = BANDS):
+        if num_perm % bands:
+            raise ValueError(f"{num_perm} signature bins do not split into {bands} bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        self.signatures: dict[Key, tuple[int, ...]] = {}
+        self.sizes: dict[Key, int] = {}
+        self.buckets: dict[tuple[int, tuple[int, ...]], list[Key]] = {}
+
+    def add(self, key: Key, text: str):
+        hashes = shingles(text)
+        if not hashes:
+            return
+        self.signatures[key] = sig = signature(hashes, self.num_perm)
+        self.sizes[key] = len(text)
+        for band in range(self.bands):
+            self.buckets.setdefault((band, sig[band * self.rows:(band + 1) * self.rows]), []).append(key)
+
+    def clusters(self) -> list[list[Key]]:
+        """
+        Groups of near-duplicates (every member similar to at least one
+        other member), the canonical copy first: the longest text, ties
+        broken by law type and article number.
+        """
+        parent = {key: key for key in self.signatures}
+
+        def find(key: Key) -> Key:
+            while parent[key] != key:
+                parent[key] = parent[parent[key]]
+                key = parent[key]
+            return key
+
+        for members in self.buckets.values():
+            for i, a in enumerate(members):
+                for b in members[i + 1:]:
+                    if find(a) != find(b) and similarity(self.signatures[a], self.signatures[b]) >= self.threshold:
+                        parent[find(b)] = find(a)
+
+        groups: dict[Key, list[Key]] = {}
+        for key in parent:
+            groups.setdefault(find(key), []).append(key)
+        return sorted(
+            (sorted(group, key=lambda k: (-self.sizes[k], k)) for group in groups.values() if len(group) > 1),
+            key=lambda group: group[0],
+        )
+
+
+@dataclass
+class Duplicates:
+    clusters: list[list[Key]]
+    canonical: dict[Key, Key] = field(init=False)      # duplicate → its canonical copy
+    copies: dict[Key, list[Key]] = field(init=False)   # canonical copy → its duplicates
+
+    def __post_init__(self):
+        self.canonical = {member: cluster[0] for cluster in self.clusters for member in cluster[1:]}
+        self.copies = {cluster[0]: cluster[1:] for cluster in self.clusters}
+
+
+def article_bodies(directory: str, law_type: str):
+    """
+    (article_number, text without the header line) of every article of a code folder.
+    """
+    path = os.path.join(directory, law_type)
+    metadata = load_metadata(path)
+    pack = PackReader(pack_path(path)) if is_packed(path) else None
+    try:
+        for m in metadata:
+            number = str(m["article_number"])
+            if pack is not None:
+                text = pack.text(number) if number in pack else None
+            else:
+                file_path = os.path.join(path, m["file_path"])
+                text = open(file_path, encoding="utf-8").read() if os.path.exists(file_path) else None
+            if text is not None:
+                yield number, text.partition("\n")[2]
+    finally:
+        if pack is not None:
+            pack.close()
+
+
+def build_index(directory: str, law_types: list[str], threshold: float = THRESHOLD) -> DuplicateIndex:
+    """
+    Index every article of `law_types`. Texts are normalized first (see
+    law_parser/normalize.py), so page chrome left in older files does not
+    make unrelated articles look alike.
+    """
+    index = DuplicateIndex(threshold)
+    normalize = normalizer()
+    for law_type in law_types:
+        for number, text in article_bodies(directory, law_type):
+            index.add((law_type, number), normalize(text))
+    return index
+
+
+def find_duplicates(directory: str = "codes", threshold: float = THRESHOLD, rebuild: bool = False) -> Duplicates:
+    """
+    Near-duplicate clusters of the whole corpus. The clusters are kept in
+    codes/duplicates.json together with the catalog hash of every code, and
+    only recomputed when a code changed or the parameters did.
+    """
+    catalog = Catalog(directory)
+    law_types = sorted(d for d in os.listdir(directory) if os.path.exists(os.path.join(directory, d, "metadata.json")))
+    corpus = {law_type: (catalog.status(law_type) or {}).get("sha256") for law_type in law_types}
+    params = {"threshold": threshold, "num_perm": NUM_PERM, "bands": BANDS, "shingle_words": SHINGLE_WORDS}
+
+    path = os.path.join(directory, DUPLICATES_NAME)
+    if not rebuild and os.path.exists(path):
+        try:
+            with open(path, encoding="utf-8") as cached_file:
+                cached = json.load(cached_file)
+            if cached.get("version") == INDEX_VERSION and cached.get("params") == params and cached.get("corpus") == corpus:
+                return Duplicates([[tuple(key) for key in cluster] for cluster in cached["clusters"]])
+        except (OSError, ValueError, KeyError):
+            pass
+
+    duplicates = Duplicates(build_index(directory, law_types, threshold).clusters())
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as index_file:
+        json.dump(
+            {"version": INDEX_VERSION, "params": params, "corpus": corpus, "clusters": duplicates.clusters},
+            index_file, ensure_ascii=False,
+        )
+    os.replace(tmp_path, path)
+    return duplicates
+
+
+def print_clusters(duplicates: Duplicates, limit: int = 20):
+    folded = sum(len(cluster) - 1 for cluster in duplicates.clusters)
+    console.print(f"{len(duplicates.clusters)} clusters, {folded} articles would be folded into a canonical copy")
+
+    across = [cluster for cluster in duplicates.clusters if len({law_type for law_type, _ in cluster}) > 1]
+    table = Table(title=f"Largest clusters ({len(across)} span several codes)")
+    table.add_column("canonical")
+    table.add_column("size", justify="right")
+    table.add_column("duplicates")
+    for cluster in sorted(duplicates.clusters, key=len, reverse=True)[:limit]:
+        (law_type, number), rest = cluster[0], cluster[1:]
+        shown = ", ".join(f"{t}/{n}" for t, n in rest[:6]) + (f" (+{len(rest) - 6})" if len(rest) > 6 else "")
+        table.add_row(f"{law_type}/{number}", str(len(cluster)), shown)
+    console.print(table)
+
+
+def arg_value(flag: str, default: str) -> str:
+    if flag in sys.argv and sys.argv.index(flag) + 1 < len(sys.argv):
+        return sys.argv[sys.argv.index(flag) + 1]
+    return default
+
+
+if __name__ == "__main__":
+    # python dedupe.py [--threshold 0.9] [--rebuild]
+    started = time.monotonic()
+    duplicates = find_duplicates(
+        "codes", threshold=float(arg_value("--threshold", str(THRESHOLD))), rebuild="--rebuild" in sys.argv
+    )
+    print_clusters(duplicates)
+    console.print(f"in {time.monotonic() - started:.1f}s")
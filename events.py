@@ -0,0 +1,227 @@
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from requests import Response
+from requests import exceptions
+
+
+# Seconds without a single byte before a stream counts as stalled, and the
+# longest a whole ingest stream may take
+IDLE_TIMEOUT = 60.0
+TOTAL_TIMEOUT = 600.0
+
+READ_CHUNK = 64 * 1024
+MAX_PENDING = 1024 * 1024  # give up on a "line" that never becomes valid JSON
+
+SUCCESS_STATUSES = ("success",)
+ERROR_STATUSES = ("error", "failed")
+
+# A JSON string never spans lines, so a line's bracket balance can be counted without its strings
+STRING_RE = re.compile(rb'"(?:[^"\\]|\\.)*"')
+
+
+class StreamTimeout(Exception):
+    """
+    The ingest stream stalled or ran past its deadline; the connection was released.
+    """
+
+
+@dataclass
+class IngestEvent:
+    status: str | None
+    data: dict = field(default_factory=dict)
+    event: str | None = None  # SSE event name, if any
+
+    @property
+    def file_ids(self) -> list[int] | None:
+        """
+        Files this event is about, or None for an event about the whole request.
+        """
+        if self.data.get("file_ids"):
+            return list(self.data["file_ids"])
+        if "file_id" in self.data:
+            return [self.data["file_id"]]
+        return None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status in SUCCESS_STATUSES
+
+    @property
+    def failed(self) -> bool:
+        return self.status in ERROR_STATUSES
+
+    @property
+    def final(self) -> bool:
+        return self.succeeded or self.failed
+
+
+class EventDecoder:
+    """
+    Incremental decoder for a streamed ingest response.
+
+    Accepts arbitrary byte chunks and frames them into JSON messages, whether
+    the server speaks line-delimited JSON or server-sent events (`data:` lines
+    closed by a blank line). A JSON document that spans several lines is
+    accumulated until its brackets balance and then parsed once. Each byte is
+    scanned for newlines once and each line decoded once, so a long line or a
+    long document costs no more than the same bytes in short ones.
+    """
+    def __init__(self):
+        self.buffer = bytearray()  # the line not complete yet
+        self.pending = bytearray()  # lines of a JSON document not complete yet
+        self.depth = 0  # open brackets in `pending`
+        self.continued = False  # the last line of `pending` ends in , { or [, so the document goes on
+        self.sse_data: list[bytes] = []
+        self.sse_event: str | None = None
+
+    def feed(self, chunk: bytes) -> Iterator[IngestEvent]:
+        start = len(self.buffer)
+        self.buffer += chunk
+        newline = self.buffer.find(b"\n", start)
+        if newline < 0:
+            return
+
+        begin = 0
+        while newline >= 0:
+            line = bytes(self.buffer[begin:newline])
+            begin = newline + 1
+            newline = self.buffer.find(b"\n", begin)
+            yield from self.line(line.rstrip(b"\r"))
+        del self.buffer[:begin]
+
+    def close(self) -> Iterator[IngestEvent]:
+        """
+        Flush whatever the stream left without a trailing newline.
+        """
+        if self.buffer:
+            line = bytes(self.buffer)
+            self.buffer.clear()
+            yield from self.line(line.rstrip(b"\r"))
+        yield from self.dispatch_sse()
+        if self.pending.strip():
+            yield from self.flush_pending()
+
+    def line(self, line: bytes) -> Iterator[IngestEvent]:
+        if not line.strip():
+            yield from self.dispatch_sse()
+            return
+
+        if not self.pending:
+            if line.startswith(b":"):
+                return  # SSE comment / keep-alive
+            if line.startswith(b"data:"):
+                self.sse_data.append(line[5:].removeprefix(b" "))
+                return
+            if line.startswith(b"event:"):
+                self.sse_event = line[6:].strip().decode("utf-8", "replace")
+                return
+            if line.startswith((b"id:", b"retry:")):
+                return
+
+        if self.pending:
+            opened = balance(line)
+            fresh = self.depth + opened > 0 and line.lstrip().startswith((b"{", b"["))
+            if fresh and not self.continued and parse(line) is not None:
+                # the pending fragment was never going to complete; `line` is handled below
+                yield from self.flush_pending()
+            else:
+                self.add_pending(line, opened)
+                if self.depth <= 0:
+                    data = parse(self.pending)
+                    if data is None:
+                        yield from self.flush_pending()
+                    else:
+                        self.clear_pending()
+                        yield make_event(data)
+                elif len(self.pending) > MAX_PENDING:
+                    yield from self.flush_pending()
+                return
+
+        data = parse(line)
+        if data is not None:
+            yield make_event(data)
+        elif line.lstrip().startswith((b"{", b"[")) and balance(line) > 0:
+            self.add_pending(line, balance(line))  # a JSON document spread over several lines
+        else:
+            yield text_event(line)
+
+    def add_pending(self, line: bytes, opened: int):
+        self.pending += line + b"\n"
+        self.depth += opened
+        self.continued = line.rstrip()[-1:] in (b",", b"{", b"[")
+
+    def clear_pending(self):
+        self.pending.clear()
+        self.depth = 0
+        self.continued = False
+
+    def flush_pending(self) -> Iterator[IngestEvent]:
+        """
+        Give up on the pending document and pass it on as text.
+        """
+        payload = bytes(self.pending)
+        self.clear_pending()
+        yield text_event(payload)
+
+    def dispatch_sse(self) -> Iterator[IngestEvent]:
+        if self.sse_data:
+            payload = b"\n".join(self.sse_data)
+            data = parse(payload)
+            yield make_event(data, self.sse_event) if data is not None else text_event(payload, self.sse_event)
+        self.sse_data = []
+        self.sse_event = None
+
+
+def balance(line: bytes) -> int:
+    """
+    Brackets a line opens minus the ones it closes, outside strings.
+    """
+    line = STRING_RE.sub(b"", line) if b'"' in line else line
+    return line.count(b"{") + line.count(b"[") - line.count(b"}") - line.count(b"]")
+
+
+def parse(payload: bytes):
+    """
+    JSON value of a message, or None if it is not (yet) valid JSON.
+    """
+    try:
+        return json.loads(payload)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+
+
+def make_event(data, event: str | None = None) -> IngestEvent:
+    if isinstance(data, dict):
+        return IngestEvent(data.get("status"), data, event)
+    return IngestEvent(None, {"message": data}, event)
+
+
+def text_event(payload: bytes, event: str | None = None) -> IngestEvent:
+    return IngestEvent(None, {"message": payload.decode("utf-8", "replace").strip()}, event)
+
+
+def iter_events(response: Response, total_timeout: float = TOTAL_TIMEOUT) -> Iterator[IngestEvent]:
+    """
+    Decode the events of a streamed (`stream=True`) ingest response.
+
+    The idle timeout is the read timeout the request was sent with; a stalled
+    read, or a stream running past `total_timeout`, closes the response and
+    raises StreamTimeout. The response is always closed at the end.
+    """
+    decoder = EventDecoder()
+    deadline = time.monotonic() + total_timeout
+
+    try:
+        for chunk in response.iter_content(chunk_size=READ_CHUNK):
+            yield from decoder.feed(chunk)
+            if time.monotonic() > deadline:
+                raise StreamTimeout(f"ingest stream still open after {total_timeout:.0f}s")
+        yield from decoder.close()
+    except (exceptions.Timeout, exceptions.ConnectionError) as e:
+        raise StreamTimeout(f"ingest stream stalled: {e}") from e
+    finally:
+        response.close()
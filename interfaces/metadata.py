@@ -1,5 +1,5 @@
 from typing import Any
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
 
 class Metadata(BaseModel):
@@ -30,4 +30,51 @@ class Metadata(BaseModel):
             bool: True if the data is valid, False otherwise.
         """
         data["article_number"] = str(data["article_number"])
-        return cls.model_validate(data)
\ No newline at end of file
+        return cls.model_validate(data)
+
+    @classmethod
+    def model_safe_validate_many(cls, data: list[dict[str, str | int]]) -> list["Metadata"]:
+        """
+        Validate a whole metadata.json in one validator call instead of one per article.
+
+        Args:
+            data (list): The metadata entries to validate.
+
+        Returns:
+            list: The validated models, in order.
+        """
+        for item in data:
+            item["article_number"] = str(item["article_number"])
+        return METADATA_LIST.validate_python(data)
+
+
+class ChunkMetadata(Metadata):
+    """
+    Metadata for one chunk of a long article (see chunking.py).
+
+    Attributes:
+        parent_article_number (str): The article the chunk was cut from.
+        chunk_index (int): Position of the chunk in its article, from 0.
+        chunk_count (int): Number of chunks the article was cut into.
+        duplicates (list): Near-duplicates of the article, if it is a canonical copy.
+    """
+
+    parent_article_number: str
+    chunk_index: int
+    chunk_count: int
+    duplicates: list[dict[str, str]] = []
+
+
+class CanonicalMetadata(Metadata):
+    """
+    Metadata for an article uploaded once for its near-duplicates (see dedupe.py).
+
+    Attributes:
+        duplicates (list): law_type and article_number of every article with
+            (nearly) the same text that is not uploaded separately.
+    """
+
+    duplicates: list[dict[str, str]]
+
+
+METADATA_LIST = TypeAdapter(list[Metadata])
@@ -0,0 +1,215 @@
+import json
+import os
+import threading
+import time
+
+from rich.console import Console
+from rich.table import Table
+
+
+console = Console()
+
+# Article states, in the order an article moves through them
+STATES = ("uploaded", "ingested", "skipped", "failed")
+DONE_STATES = ("ingested", "skipped")
+
+
+class CheckpointJournal:
+    """
+    Append-only upload journal for one law code: `<checkpoints>/<law_code>.jsonl`.
+
+    Every line records one state change of one article:
+
+        {"index": 12, "file_path": "12.txt", "state": "uploaded", "file_id": 345, "sha256": "9f2c…", "at": 1718000000.0}
+
+    Upload and ingest are separate states, so a resume re-ingests an article
+    that was uploaded but never ingested without uploading it again. The
+    journal is replayed once on open (one sequential read); the last line for
+    a file wins. Appends are serialized with a lock and flushed immediately,
+    so concurrent workers can record into the same journal.
+
+    Lines a later one superseded are dropped by `compact`, which the uploader
+    runs at the end of every run and which replay and record run once they
+    outnumber the live ones, so the journal stays at about one line per
+    article however many runs it has seen.
+    """
+    def __init__(self, checkpoints_path: str, law_code: str):
+        self.law_code = law_code
+        self.path = os.path.join(checkpoints_path, f"{law_code}.jsonl")
+        self.legacy_path = os.path.join(checkpoints_path, law_code)
+        self.lock = threading.Lock()
+        self.entries: dict[str, dict] = {}
+        self.lines = 0  # lines in the file, superseded ones included
+
+        if os.path.exists(self.path):
+            self.replay()
+
+    def replay(self):
+        with self.lock:
+            with open(self.path, "r", encoding="utf-8") as journal_file:
+                for line in journal_file:
+                    self.lines += 1
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line after a crash
+                    self.entries[entry["file_path"]] = entry
+            self.compact_if_stale()
+
+    def compact(self):
+        """
+        Rewrite the journal (atomically) with only the latest line of each article.
+        """
+        with self.lock:
+            self._compact()
+
+    def compact_if_stale(self):
+        """
+        Compact once superseded lines outnumber live ones. Called with the lock held.
+        """
+        if self.lines > 2 * len(self.entries):
+            self._compact()
+
+    def _compact(self):
+        if not self.entries:
+            return
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as journal_file:
+            for entry in sorted(self.entries.values(), key=lambda e: e["index"]):
+                journal_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+        self.lines = len(self.entries)
+
+    def record(
+        self,
+        index: int,
+        file_path: str,
+        state: str,
+        file_id: int | None = None,
+        error: str | None = None,
+        sha256: str | None = None,
+    ):
+        """
+        Append a state change for one article. `sha256` is the content the
+        file id belongs to; an earlier file id is carried over only for the
+        same content.
+        """
+        entry = {"index": index, "file_path": file_path, "state": state, "at": time.time()}
+        with self.lock:
+            previous = self.entries.get(file_path)
+            if file_id is None and previous and sha256 in (None, previous.get("sha256")):
+                file_id = previous.get("file_id")
+                sha256 = previous.get("sha256")
+            if file_id is not None:
+                entry["file_id"] = file_id
+            if sha256 is not None:
+                entry["sha256"] = sha256
+            if error:
+                entry["error"] = error
+
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as journal_file:
+                journal_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self.entries[file_path] = entry
+            self.lines += 1
+            self.compact_if_stale()
+
+    def state(self, file_path: str) -> str | None:
+        entry = self.entries.get(file_path)
+        return entry["state"] if entry else None
+
+    def file_id(self, file_path: str, sha256: str | None = None) -> int | None:
+        """
+        The file id of an article that was uploaded but is not done yet, if it
+        was uploaded with the content `sha256` (when given).
+        """
+        entry = self.entries.get(file_path)
+        if not entry or entry["state"] not in ("uploaded", "failed"):
+            return None
+        if sha256 is not None and entry.get("sha256") not in (None, sha256):
+            return None
+        return entry.get("file_id")
+
+    def done(self, file_path: str, sha256: str | None = None) -> bool:
+        """
+        Whether an article is ingested (or skipped), with the content `sha256` when given.
+        """
+        entry = self.entries.get(file_path)
+        if not entry or entry["state"] not in DONE_STATES:
+            return False
+        return sha256 is None or entry.get("sha256") in (None, sha256)
+
+    def watermark(self, file_paths: list[str], hashes: dict[str, str] | None = None) -> int | None:
+        """
+        Highest index such that it and every article before it are done.
+        """
+        hashes = hashes or {}
+        last = None
+        for index, file_path in enumerate(file_paths):
+            if not self.done(file_path, hashes.get(file_path)):
+                break
+            last = index
+        return last
+
+    def import_legacy(self, file_paths: list[str]) -> int | None:
+        """
+        Convert the old one-file-per-article `<checkpoints>/<law_code>/<index>.json`
+        checkpoints into journal entries, once. The old checkpoint was written
+        before ingest, so everything up to it is assumed ingested, as the old
+        resume did.
+        """
+        if self.entries or not os.path.isdir(self.legacy_path):
+            return None
+
+        indexes = [int(f.split(".")[0]) for f in os.listdir(self.legacy_path) if f.split(".")[0].isdigit()]
+        if not indexes:
+            return None
+
+        last = max(indexes)
+        for index, file_path in enumerate(file_paths[:last + 1]):
+            self.record(index, file_path, "ingested")
+        return last
+
+    def by_state(self) -> dict[str, list[dict]]:
+        grouped: dict[str, list[dict]] = {state: [] for state in STATES}
+        with self.lock:
+            entries = sorted(self.entries.values(), key=lambda e: e["index"])
+        for entry in entries:
+            grouped.setdefault(entry["state"], []).append(entry)
+        return grouped
+
+
+def print_journal(checkpoints: str = ".saved", law_code: str | None = None, state: str | None = None):
+    """
+    Print per-state counts of every journal, and list the articles of
+    `law_code` (optionally only those in `state`).
+    """
+    checkpoints = os.path.abspath(os.path.normpath(checkpoints))
+    if not os.path.isdir(checkpoints):
+        console.print(f"[yellow]No checkpoints in {checkpoints}[/yellow]")
+        return
+
+    law_codes = [law_code] if law_code else sorted(
+        f[:-len(".jsonl")] for f in os.listdir(checkpoints) if f.endswith(".jsonl")
+    )
+
+    table = Table(title=f"Upload journal — {checkpoints}")
+    table.add_column("Law code")
+    for name in STATES:
+        table.add_column(name, justify="right")
+
+    for code in law_codes:
+        grouped = CheckpointJournal(checkpoints, code).by_state()
+        table.add_row(code, *(str(len(grouped.get(name, []))) for name in STATES))
+    console.print(table)
+
+    if not law_code:
+        return
+
+    grouped = CheckpointJournal(checkpoints, law_code).by_state()
+    for name in [state] if state else STATES:
+        for entry in grouped.get(name, []):
+            details = f"file id {entry['file_id']}" if "file_id" in entry else ""
+            if entry.get("error"):
+                details += f" — {entry['error']}"
+            console.print(f"  {name:<9} {entry['index']:>5} {entry['file_path']} {details}")
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""Parser benchmark - times each parsing stage over the cached pages, offline.
+
+Every page in .cache (or only the codes given) goes through the stages of
+`parse_code` separately:
+
+    read       download_page() from the cache store, decompression included
+    extract    extract_articles() with the selected engine
+    normalize  normalize_articles() with every step (see normalize.py)
+    save       save_articles() into a scratch output directory (codes/ is never touched)
+
+Wall time is the best of --repeat runs; peak memory comes from one extra run
+of the stage under tracemalloc, so tracing does not skew the timings. Nothing
+is ever downloaded: codes missing from the cache are skipped.
+
+    python bench.py                                  # all cached codes
+    python bench.py 111181 180550 --repeat 5
+    python bench.py --save baseline.json             # store the results
+    python bench.py --compare baseline.json          # exit 1 on a regression
+    python bench.py --compare baseline.json --threshold 25 --engine soup
+"""
+
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import parser
+except ImportError:  # imported as law_parser.bench
+    from law_parser import parser
+
+RESULTS_VERSION = 1
+STAGES = ("read", "extract", "normalize", "save")
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 10.0  # percent slower (or more memory) than the baseline that counts as a regression
+MB = 1024 * 1024
+
+
+def measure(stage, repeat: int) -> tuple[list[float], int, object]:
+    """Run `stage()` `repeat` times, then once more under tracemalloc.
+    Returns (wall times, peak traced bytes, result of the last run)."""
+    times = []
+    result = None
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = stage()
+            times.append(time.perf_counter() - started)
+
+        tracemalloc.start()
+        try:
+            stage()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return times, peak, result
+
+
+def stage_result(times: list[float], peak: int, articles: int, size: int) -> dict:
+    best = min(times)
+    return {
+        "seconds": round(best, 6),
+        "median": round(statistics.median(times), 6),
+        "articles_per_sec": round(articles / best, 1) if best else 0.0,
+        "mb_per_sec": round(size / MB / best, 2) if best else 0.0,
+        "peak_bytes": peak,
+        "bytes": size,
+    }
+
+
+def bench_code(code_id: str, scratch: Path, engine: str, repeat: int, packed=False) -> dict:
+    """Benchmark the stages of one cached code."""
+    folder, abbrev, _, _ = parser.CODES[code_id]
+    output_dir = scratch / folder
+
+    times, peak, html = measure(lambda: parser.download_page(code_id), repeat)
+    html_bytes = len(html.encode("utf-8"))
+    stages = {"read": (times, peak, html_bytes)}
+
+    times, peak, articles = measure(
+        lambda: parser.extract_articles(html, show_progress=False, engine=engine), repeat
+    )
+    stages["extract"] = (times, peak, html_bytes)
+
+    extracted = sum(len(parser.article_content(art, abbrev).encode("utf-8")) for art in articles)
+    times, peak, (normalized, saved) = measure(lambda: parser.normalize_articles(articles), repeat)
+    stages["normalize"] = (times, peak, extracted)
+
+    # Full rewrite every run, so each run does the same amount of work
+    def save():
+        return parser.save_articles(normalized, output_dir, abbrev, show_progress=False, incremental=False, packed=packed)
+
+    times, peak, _ = measure(save, repeat)
+    written = sum(len(parser.article_content(art, abbrev).encode("utf-8")) for art in normalized)
+    stages["save"] = (times, peak, written)
+
+    return {
+        "folder": folder,
+        "html_bytes": html_bytes,
+        "articles": len(articles),
+        "normalized_bytes_saved": saved,
+        "stages": {
+            name: stage_result(times, peak, len(articles), size)
+            for name, (times, peak, size) in stages.items()
+        },
+    }
+
+
+def run_bench(code_ids: list[str], engine: str = parser.DEFAULT_ENGINE, repeat: int = DEFAULT_REPEAT, packed=False) -> dict:
+    """Benchmark `code_ids` (only those in the cache) and return the results document."""
+    store = parser.cache_store()
+    cached = [code_id for code_id in code_ids if store.has(code_id)]
+    for code_id in code_ids:
+        if code_id not in cached:
+            print(f"  {code_id}: not cached, skipped")
+
+    results = {
+        "version": RESULTS_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parser_version": parser.PARSER_VERSION,
+        "engine": engine,
+        "packed": packed,
+        "repeat": repeat,
+        "codes": {},
+    }
+
+    output_root = parser.OUTPUT_DIR
+    with tempfile.TemporaryDirectory(prefix="lexbench-") as scratch:
+        parser.OUTPUT_DIR = Path(scratch) / "codes"  # save_articles logs paths relative to it
+        try:
+            for code_id in cached:
+                results["codes"][code_id] = result = bench_code(code_id, parser.OUTPUT_DIR, engine, repeat, packed)
+                print(format_row(code_id, result))
+        finally:
+            parser.OUTPUT_DIR = output_root
+
+    results["totals"] = totals(results["codes"])
+    return results
+
+
+def totals(codes: dict) -> dict:
+    summary = {}
+    for name in STAGES:
+        seconds = sum(code["stages"][name]["seconds"] for code in codes.values())
+        articles = sum(code["articles"] for code in codes.values())
+        size = sum(code["stages"][name]["bytes"] for code in codes.values())
+        summary[name] = {
+            "seconds": round(seconds, 6),
+            "articles_per_sec": round(articles / seconds, 1) if seconds else 0.0,
+            "mb_per_sec": round(size / MB / seconds, 2) if seconds else 0.0,
+            "peak_bytes": max((code["stages"][name]["peak_bytes"] for code in codes.values()), default=0),
+        }
+    return summary
+
+
+def format_row(code_id: str, result: dict) -> str:
+    cells = []
+    for name in STAGES:
+        stage = result["stages"][name]
+        cells.append(
+            f"{name} {stage['seconds'] * 1000:8.1f}ms {stage['articles_per_sec']:9.0f} art/s "
+            f"{stage['mb_per_sec']:7.1f} MB/s {stage['peak_bytes'] / MB:6.1f} MB peak"
+        )
+    return f"  {code_id:>8} {result['folder']:<14} {result['articles']:>5} art  " + "  |  ".join(cells)
+
+
+def compare(results: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list[str]:
+    """Regressions of `results` against `baseline`: stages more than `threshold`
+    percent slower or using more memory, and codes whose article count changed."""
+    regressions = []
+    limit = 1 + threshold / 100
+    for key in ("engine", "packed"):
+        if results.get(key) != baseline.get(key):
+            print(f"  note: baseline {key} is {baseline.get(key)!r}, this run {results.get(key)!r}")
+
+    print(f"\n  {'code':>8} {'stage':<8} {'baseline':>10} {'now':>10} {'change':>8}  {'peak':>8}")
+    for code_id, result in results["codes"].items():
+        old = baseline.get("codes", {}).get(code_id)
+        if old is None:
+            continue
+        if old["articles"] != result["articles"]:
+            regressions.append(f"{code_id}: {old['articles']} articles in the baseline, {result['articles']} now")
+
+        for name in STAGES:
+            if name not in old["stages"]:  # baseline from before the stage existed
+                continue
+            before, after = old["stages"][name], result["stages"][name]
+            ratio = after["seconds"] / before["seconds"] if before["seconds"] else 1.0
+            memory = after["peak_bytes"] / before["peak_bytes"] if before["peak_bytes"] else 1.0
+            flag = ""
+            if ratio > limit:
+                flag = " SLOWER"
+                regressions.append(f"{code_id} {name}: {(ratio - 1) * 100:.0f}% slower")
+            if memory > limit:
+                flag += " MEMORY"
+                regressions.append(f"{code_id} {name}: {(memory - 1) * 100:.0f}% more peak memory")
+            print(
+                f"  {code_id:>8} {name:<8} {before['seconds'] * 1000:8.1f}ms {after['seconds'] * 1000:8.1f}ms "
+                f"{(ratio - 1) * 100:+7.1f}%  {(memory - 1) * 100:+7.1f}%{flag}"
+            )
+    return regressions
+
+
+def arg_value(flag: str, default: str) -> str:
+    if flag in sys.argv and sys.argv.index(flag) + 1 < len(sys.argv):
+        return sys.argv[sys.argv.index(flag) + 1]
+    return default
+
+
+def main():
+    if "--help" in sys.argv or "-h" in sys.argv:
+        print("  python bench.py [<code_id>...] [--engine stream|soup] [--repeat 3] [--packed]")
+        print("                  [--save results.json] [--compare baseline.json] [--threshold 10]")
+        sys.exit(0)
+
+    engine = arg_value("--engine", parser.DEFAULT_ENGINE)
+    if engine not in parser.ENGINES:
+        print(f"  unknown engine: {engine} ({', '.join(parser.ENGINES)})")
+        sys.exit(1)
+
+    code_ids = [a for a in sys.argv[1:] if a in parser.CODES] or list(parser.CODES)
+    results = run_bench(
+        code_ids, engine=engine, repeat=int(arg_value("--repeat", str(DEFAULT_REPEAT))), packed="--packed" in sys.argv
+    )
+
+    print()
+    for name, stage in results["totals"].items():
+        print(
+            f"  total {name:<8} {stage['seconds']:8.2f}s {stage['articles_per_sec']:9.0f} art/s "
+            f"{stage['mb_per_sec']:7.1f} MB/s {stage['peak_bytes'] / MB:6.1f} MB peak"
+        )
+
+    save_to = arg_value("--save", "")
+    if save_to:
+        Path(save_to).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n  results saved to {save_to}")
+
+    baseline_path = arg_value("--compare", "")
+    if baseline_path:
+        baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, float(arg_value("--threshold", str(DEFAULT_THRESHOLD))))
+        if regressions:
+            print(f"\n  {len(regressions)} regression(s) against {baseline_path}:")
+            for line in regressions:
+                print(f"    {line}")
+            sys.exit(1)
+        print(f"\n  no regressions against {baseline_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""Corpus catalog - the status of every code in one small file, instead of decoding each metadata.json.
+
+`codes/catalog.json` has one entry per code folder:
+
+    {"version": 1, "codes": {"civil_p1": {
+        "code_id": "111181", "articles": 386, "sha256": "…", "packed": false,
+        "parsed_at": 1718000000.0, "parser_version": 1, "metadata_mtime": 1718000000.0,
+        "upload": {"ingested": 380, "failed": 2, "pending": 6, "uploaded_at": 1718000500.0}}}}
+
+`sha256` is a digest of the code's article numbers and hashes, so two corpora
+can be compared without reading any article. `codes/catalog.index.json` maps
+law_type → article_number → {"file_path", "sha256"}; it is only read for
+lookups. The parser records a code after saving it and the uploader its upload
+state after a run. An entry whose metadata.json changed behind the catalog's
+back (different mtime) is re-read from it on the next status call.
+
+    python catalog.py            # status of every code
+    python catalog.py rebuild    # re-record every code from its metadata.json
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+try:
+    from packed import is_packed, load_metadata
+except ImportError:  # imported as law_parser.catalog
+    from law_parser.packed import is_packed, load_metadata
+
+CATALOG_NAME = "catalog.json"
+INDEX_NAME = "catalog.index.json"
+CATALOG_VERSION = 1
+
+# One lock per catalog file, shared by every Catalog of this process (uploader threads)
+_locks: dict[Path, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def corpus_hash(metadata: list[dict]) -> str:
+    """Digest of a code's article numbers and content hashes, in order."""
+    digest = hashlib.sha256()
+    for m in metadata:
+        digest.update(f"{m['article_number']}\0{m.get('sha256') or ''}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class Catalog:
+    def __init__(self, codes_dir: Path):
+        self.codes_dir = Path(codes_dir)
+        self.path = self.codes_dir / CATALOG_NAME
+        self.index_path = self.codes_dir / INDEX_NAME
+        with _locks_guard:
+            self.lock = _locks.setdefault(self.path.resolve(), threading.Lock())
+        self._codes: dict[str, dict] = {}
+        self._mtime: int | None = None
+        self._index: dict[str, dict] | None = None
+
+    def codes(self) -> dict[str, dict]:
+        """All entries as recorded; catalog.json is re-read only when it changed on disk."""
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except OSError:
+            return {}
+        if mtime != self._mtime:
+            data = read_json(self.path)
+            self._codes = data.get("codes", {}) if data.get("version") == CATALOG_VERSION else {}
+            self._mtime = mtime
+        return self._codes
+
+    def get(self, law_type: str) -> dict | None:
+        """Entry of a code, None if there is none or its metadata.json changed since it was recorded."""
+        entry = self.codes().get(law_type)
+        try:
+            mtime = (self.codes_dir / law_type / "metadata.json").stat().st_mtime
+        except OSError:
+            return None
+        if entry is None or entry.get("metadata_mtime") != mtime:
+            return None
+        return entry
+
+    def status(self, law_type: str) -> dict | None:
+        """Entry of a code, (re-)recorded from its metadata.json first if it is missing or stale."""
+        entry = self.get(law_type)
+        if entry is not None or not (self.codes_dir / law_type / "metadata.json").exists():
+            return entry
+        try:
+            metadata = load_metadata(self.codes_dir / law_type)
+        except (OSError, ValueError):
+            return None
+        return self.record_parse(law_type, metadata)
+
+    def update(self, law_type: str, **fields) -> dict:
+        """Merge fields (None values are left out) into a code's entry and persist."""
+        with self.lock:
+            self._mtime = None  # re-read: another process may have written since
+            codes = dict(self.codes())
+            entry = {**codes.get(law_type, {}), **{k: v for k, v in fields.items() if v is not None}}
+            codes[law_type] = entry
+            write_json(self.path, {"version": CATALOG_VERSION, "codes": codes})
+            return entry
+
+    def remove(self, law_type: str):
+        with self.lock:
+            self._mtime = None
+            codes = dict(self.codes())
+            if codes.pop(law_type, None) is not None:
+                write_json(self.path, {"version": CATALOG_VERSION, "codes": codes})
+            index = read_json(self.index_path)
+            if index.pop(law_type, None) is not None:
+                write_json(self.index_path, index)
+            self._index = None
+
+    def record_parse(
+        self,
+        law_type: str,
+        metadata: list[dict],
+        code_id: str | None = None,
+        parser_version: int | None = None,
+        parsed_at: float | None = None,
+    ) -> dict:
+        """Record a code's articles, as just written to its metadata.json."""
+        directory = self.codes_dir / law_type
+        metadata_mtime = (directory / "metadata.json").stat().st_mtime
+        entry = self.update(
+            law_type,
+            code_id=code_id,
+            articles=len(metadata),
+            sha256=corpus_hash(metadata),
+            packed=is_packed(directory),
+            parsed_at=parsed_at or metadata_mtime,
+            parser_version=parser_version,
+            metadata_mtime=metadata_mtime,
+        )
+        with self.lock:
+            index = read_json(self.index_path)
+            index[law_type] = {
+                str(m["article_number"]): {"file_path": m["file_path"], "sha256": m.get("sha256")} for m in metadata
+            }
+            write_json(self.index_path, index)
+            self._index = index
+        return entry
+
+    def record_upload(self, law_type: str, **state: int) -> dict:
+        """Record the upload state of a code (ingested, failed, pending article counts)."""
+        return self.update(law_type, upload={**state, "uploaded_at": time.time()})
+
+    def article(self, law_type: str, article_number: str) -> dict | None:
+        """{"file_path", "sha256"} of one article, from the index."""
+        if self._index is None:
+            self._index = read_json(self.index_path)
+        return self._index.get(law_type, {}).get(str(article_number))
+
+    def rebuild(self) -> list[str]:
+        """Re-record every code folder from its metadata.json and drop entries of vanished folders."""
+        folders = sorted(d.name for d in self.codes_dir.iterdir() if (d / "metadata.json").exists())
+        for law_type in folders:
+            entry = self.codes().get(law_type, {})
+            self.record_parse(
+                law_type, load_metadata(self.codes_dir / law_type), parsed_at=entry.get("parsed_at")
+            )
+        for law_type in set(self.codes()) - set(folders):
+            self.remove(law_type)
+        return folders
+
+
+def read_json(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def write_json(path: Path, data: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+if __name__ == "__main__":
+    catalog = Catalog(Path(__file__).parent.parent / "codes")
+    if sys.argv[1:] == ["rebuild"]:
+        print(f"  re-recorded {len(catalog.rebuild())} codes")
+
+    for law_type in sorted(d.name for d in catalog.codes_dir.iterdir() if (d / "metadata.json").exists()):
+        entry = catalog.status(law_type) or {}
+        upload = entry.get("upload")
+        uploaded = f"{upload['ingested']} ingested, {upload['failed']} failed" if upload else "not uploaded"
+        print(
+            f"  {law_type:<26} {entry.get('articles', 0):>5} articles  {entry.get('sha256', '')[:12]}"
+            f"  {'pack' if entry.get('packed') else 'txt '}  {uploaded}"
+        )
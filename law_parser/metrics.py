@@ -0,0 +1,197 @@
+"""Run metrics - timed spans and counters for the parser and the uploader.
+
+Cheap enough to stay on: a span is two perf_counter() calls and one locked
+dict update. At the end of a run the CLI writes a report, as JSON lines (one
+line per span, then the per-stage totals and counters) and as a Prometheus
+text-format file:
+
+    with span("extract", engine="stream") as s:
+        articles = ...
+        s.count(articles=len(articles), bytes=size)
+    count("retries", stage="download", code="111181")
+
+    write_report("parse", Path(".metrics"))   # .metrics/parse-<time>.jsonl and .prom
+
+Labels set with `labels(code=...)` apply to every span opened inside the
+block, also in functions that do not know the code themselves.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+PREFIX = "lex"
+MAX_SPANS = 100_000  # span lines kept for the JSON report; totals are never dropped
+
+_labels: ContextVar[dict] = ContextVar("metrics_labels", default={})
+
+
+class Span:
+    """Handle of an open span: add counters to it, or mark it failed without raising."""
+    __slots__ = ("counts", "error")
+
+    def __init__(self):
+        self.counts: dict[str, float] = {}
+        self.error: str | None = None
+
+    def count(self, **counts: float):
+        for name, value in counts.items():
+            self.counts[name] = self.counts.get(name, 0) + value
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.spans: deque[dict] = deque(maxlen=MAX_SPANS)
+            # (stage, labels) → [calls, errors, seconds, max seconds]
+            self.stages: dict[tuple, list] = {}
+            # (counter, labels incl. stage) → total
+            self.counters: dict[tuple, float] = {}
+
+    @contextmanager
+    def span(self, stage: str, **labels):
+        handle = Span()
+        at = time.time()
+        started = time.perf_counter()
+        try:
+            yield handle
+        except BaseException as e:
+            handle.error = handle.error or type(e).__name__
+            raise
+        finally:
+            self.observe(stage, {**_labels.get(), **labels}, at, time.perf_counter() - started, handle)
+
+    def observe(self, stage: str, labels: dict, at: float, seconds: float, handle: Span):
+        key = (stage, tuple(sorted(labels.items())))
+        record = {"type": "span", "stage": stage, **labels, "at": round(at, 3), "seconds": round(seconds, 6)}
+        record.update(handle.counts)
+        if handle.error:
+            record["error"] = handle.error
+
+        with self.lock:
+            totals = self.stages.setdefault(key, [0, 0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += handle.error is not None
+            totals[2] += seconds
+            totals[3] = max(totals[3], seconds)
+            for name, value in handle.counts.items():
+                counter = (name, tuple(sorted(key[1] + (("stage", stage),))))
+                self.counters[counter] = self.counters.get(counter, 0) + value
+            self.spans.append(record)
+
+    def count(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted({**_labels.get(), **labels}.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def snapshot(self) -> dict:
+        """Picklable copy, for a worker process to send back to the parent (see merge)."""
+        with self.lock:
+            return {
+                "spans": list(self.spans),
+                "stages": list(self.stages.items()),
+                "counters": list(self.counters.items()),
+            }
+
+    def merge(self, snapshot: dict):
+        with self.lock:
+            self.spans.extend(snapshot["spans"])
+            for key, (calls, errors, seconds, longest) in snapshot["stages"]:
+                totals = self.stages.setdefault(key, [0, 0, 0.0, 0.0])
+                totals[0] += calls
+                totals[1] += errors
+                totals[2] += seconds
+                totals[3] = max(totals[3], longest)
+            for key, value in snapshot["counters"]:
+                self.counters[key] = self.counters.get(key, 0) + value
+
+    def json_lines(self) -> list[dict]:
+        with self.lock:
+            lines = [{"type": "run", "started": round(self.started, 3), "finished": round(time.time(), 3), "pid": os.getpid()}]
+            lines.extend(self.spans)
+            for (stage, labels), (calls, errors, seconds, longest) in sorted(self.stages.items()):
+                lines.append({
+                    "type": "stage", "stage": stage, **dict(labels),
+                    "calls": calls, "errors": errors, "seconds": round(seconds, 6), "max_seconds": round(longest, 6),
+                })
+            for (name, labels), value in sorted(self.counters.items()):
+                lines.append({"type": "counter", "name": name, **dict(labels), "value": value})
+        return lines
+
+    def prometheus(self) -> str:
+        with self.lock:
+            stages = sorted(self.stages.items())
+            counters = sorted(self.counters.items())
+
+        out = [
+            f"# HELP {PREFIX}_stage_seconds Time spent in a stage.",
+            f"# TYPE {PREFIX}_stage_seconds summary",
+        ]
+        for (stage, labels), (calls, _, seconds, _) in stages:
+            selector = format_labels((("stage", stage),) + labels)
+            out.append(f"{PREFIX}_stage_seconds_sum{selector} {seconds:.6f}")
+            out.append(f"{PREFIX}_stage_seconds_count{selector} {calls}")
+        out += [f"# HELP {PREFIX}_stage_seconds_max Longest single call of a stage.", f"# TYPE {PREFIX}_stage_seconds_max gauge"]
+        for (stage, labels), (_, _, _, longest) in stages:
+            out.append(f"{PREFIX}_stage_seconds_max{format_labels((('stage', stage),) + labels)} {longest:.6f}")
+        out += [f"# HELP {PREFIX}_stage_errors_total Stage calls that failed.", f"# TYPE {PREFIX}_stage_errors_total counter"]
+        for (stage, labels), (_, errors, _, _) in stages:
+            out.append(f"{PREFIX}_stage_errors_total{format_labels((('stage', stage),) + labels)} {errors}")
+
+        for name in sorted({name for (name, _), _ in counters}):
+            out.append(f"# TYPE {PREFIX}_{name}_total counter")
+            for (counter, labels), value in counters:
+                if counter == name:
+                    out.append(f"{PREFIX}_{name}_total{format_labels(labels)} {value:g}")
+        return "\n".join(out) + "\n"
+
+    def write_report(self, name: str, directory: Path | str = ".metrics") -> tuple[Path, Path] | None:
+        """Write `<name>-<time>.jsonl` and `.prom` into `directory` (LEX_METRICS_DIR
+        overrides it). Returns the two paths, or None if nothing was measured."""
+        if not self.stages and not self.counters:
+            return None
+
+        directory = Path(os.environ.get("LEX_METRICS_DIR") or directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = f"{name}-{time.strftime('%Y%m%d-%H%M%S')}"
+
+        jsonl_path = directory / f"{stem}.jsonl"
+        with open(jsonl_path, "w", encoding="utf-8") as report:
+            for line in self.json_lines():
+                report.write(json.dumps(line, ensure_ascii=False) + "\n")
+        prom_path = directory / f"{stem}.prom"
+        prom_path.write_text(self.prometheus(), encoding="utf-8")
+        return jsonl_path, prom_path
+
+
+def format_labels(labels: tuple) -> str:
+    def escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels) + "}"
+
+
+@contextmanager
+def labels(**values):
+    """Add labels to every span and counter recorded inside the block (per thread / context)."""
+    token = _labels.set({**_labels.get(), **values})
+    try:
+        yield
+    finally:
+        _labels.reset(token)
+
+
+# One registry per process
+METRICS = Metrics()
+span = METRICS.span
+count = METRICS.count
+write_report = METRICS.write_report
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""Packed corpus format - one data file per code instead of thousands of small .txt files.
+
+`codes/<folder>/articles.pack` holds the article files back to back (the exact
+bytes of each `N.txt`), followed by an index and a fixed-size footer:
+
+    [body 1][body 2]...[index][footer]
+
+    index entry:  u16 number length, number (utf-8), u64 offset, u32 length, sha256 (32 bytes)
+    footer:       b"LEXPACK1", u64 index offset, u32 entry count
+
+metadata.json stays next to it in both layouts, so consumers that only list
+articles keep working. Readers memory-map the file and get zero-copy views:
+
+    with PackReader(Path("codes/land/articles.pack")) as pack:
+        text = bytes(pack.read("26(1)")).decode()
+
+Convert an existing code (or all of them) between the layouts:
+
+    python packed.py pack ../codes/land
+    python packed.py unpack --all
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+PACK_NAME = "articles.pack"
+MAGIC = b"LEXPACK1"
+FOOTER = struct.Struct("<8sQI")
+ENTRY = struct.Struct("<QI32s")  # offset, length, sha256 (after the length-prefixed number)
+NUMBER_LEN = struct.Struct("<H")
+
+
+def pack_path(directory: Path) -> Path:
+    return Path(directory) / PACK_NAME
+
+
+def is_packed(directory: Path) -> bool:
+    return pack_path(directory).exists()
+
+
+class PackWriter:
+    """Write a pack one article at a time; it replaces `path` atomically on close()."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.tmp = self.path.with_name(self.path.name + ".tmp")
+        self.file = open(self.tmp, "wb")
+        self.index: list[tuple[str, int, int, bytes]] = []
+        self.offset = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def add(self, number: str, data: bytes):
+        self.file.write(data)
+        self.index.append((number, self.offset, len(data), hashlib.sha256(data).digest()))
+        self.offset += len(data)
+
+    def close(self) -> list[tuple[str, int, int, str]]:
+        """Write the index and footer and move the pack into place. Returns the index
+        entries as (number, offset, length, sha256 hex)."""
+        for number, start, length, digest in self.index:
+            encoded = number.encode("utf-8")
+            self.file.write(NUMBER_LEN.pack(len(encoded)) + encoded + ENTRY.pack(start, length, digest))
+        self.file.write(FOOTER.pack(MAGIC, self.offset, len(self.index)))
+        self.file.close()
+        os.replace(self.tmp, self.path)
+        return [(number, start, length, digest.hex()) for number, start, length, digest in self.index]
+
+    def abort(self):
+        self.file.close()
+        self.tmp.unlink(missing_ok=True)
+
+
+def write_pack(path: Path, articles: Iterable[tuple[str, bytes]]) -> list[tuple[str, int, int, str]]:
+    """Write (number, data) pairs to a pack, atomically. Returns the index entries
+    as (number, offset, length, sha256 hex)."""
+    writer = PackWriter(path)
+    try:
+        for number, data in articles:
+            writer.add(number, data)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close()
+
+
+class PackReader:
+    """Memory-mapped reader of an articles.pack; `read()` returns views into the map, not copies."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.file = open(self.path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        if size < FOOTER.size:
+            self.file.close()
+            raise ValueError(f"{self.path}: not a pack file")
+
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+        magic, index_offset, count = FOOTER.unpack_from(self.map, size - FOOTER.size)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{self.path}: not a pack file")
+
+        # number → (offset, length, sha256 hex), in file order
+        self.index: dict[str, tuple[int, int, str]] = {}
+        pos = index_offset
+        for _ in range(count):
+            (length,) = NUMBER_LEN.unpack_from(self.map, pos)
+            pos += NUMBER_LEN.size
+            number = self.map[pos:pos + length].decode("utf-8")
+            pos += length
+            start, data_length, digest = ENTRY.unpack_from(self.map, pos)
+            pos += ENTRY.size
+            self.index[number] = (start, data_length, digest.hex())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if getattr(self, "view", None) is not None:
+            self.view.release()
+            self.view = None
+        if getattr(self, "map", None) is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, number: str) -> bool:
+        return number in self.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.index)
+
+    def read(self, number: str) -> memoryview:
+        start, length, _ = self.index[number]
+        return self.view[start:start + length]
+
+    def text(self, number: str) -> str:
+        return str(self.read(number), "utf-8")
+
+    def sha256(self, number: str) -> str:
+        return self.index[number][2]
+
+    def size(self, number: str) -> int:
+        return self.index[number][1]
+
+
+def load_metadata(directory: Path) -> list[dict]:
+    return json.loads((Path(directory) / "metadata.json").read_text(encoding="utf-8"))
+
+
+def pack_directory(directory: Path) -> int:
+    """Convert a code folder of N.txt files into articles.pack (the .txt files are removed)."""
+    directory = Path(directory)
+    metadata = load_metadata(directory)
+    present = [m for m in metadata if (directory / m["file_path"]).exists()]
+
+    write_pack(
+        pack_path(directory),
+        ((str(m["article_number"]), (directory / m["file_path"]).read_bytes()) for m in present),
+    )
+    for m in present:
+        (directory / m["file_path"]).unlink()
+    return len(present)
+
+
+def unpack_directory(directory: Path) -> int:
+    """Convert articles.pack back into N.txt files named as in metadata.json."""
+    directory = Path(directory)
+    file_paths = {str(m["article_number"]): m["file_path"] for m in load_metadata(directory)}
+
+    with PackReader(pack_path(directory)) as pack:
+        for number in pack:
+            (directory / file_paths.get(number, f"{number}.txt")).write_bytes(pack.read(number))
+        count = len(pack)
+    pack_path(directory).unlink()
+    return count
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ("pack", "unpack"):
+        print("  python packed.py pack|unpack <codes/folder>... | --all")
+        sys.exit(1)
+
+    command, targets = sys.argv[1], sys.argv[2:]
+    if targets == ["--all"]:
+        codes_dir = Path(__file__).parent.parent / "codes"
+        targets = sorted(str(d) for d in codes_dir.iterdir() if (d / "metadata.json").exists())
+
+    for target in targets:
+        directory = Path(target)
+        if command == "pack" and is_packed(directory):
+            print(f"  {directory}: already packed")
+            continue
+        if command == "unpack" and not is_packed(directory):
+            print(f"  {directory}: not packed")
+            continue
+        count = pack_directory(directory) if command == "pack" else unpack_directory(directory)
+        print(f"  {directory}: {command}ed {count} articles")
@@ -1,16 +1,43 @@
 #!/usr/bin/env python3
 """Universal lex.uz law parser - extracts articles from downloaded HTML pages."""
 
+import atexit
+import codecs
+import gzip
+import hashlib
+import io
 import json
+import os
 import re
+import shutil
 import sys
+import threading
 import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, redirect_stdout
+from html.entities import html5 as html5_entities
+from html.parser import HTMLParser
 from pathlib import Path
 from dataclasses import dataclass
-from urllib.request import urlopen, Request
-from urllib.error import URLError, HTTPError
+from urllib.parse import urljoin, urlsplit
 
-from bs4 import BeautifulSoup
+try:
+    import fcntl
+except ImportError:  # Windows: the manifest is only locked between threads
+    fcntl = None
+
+try:
+    import metrics
+    from catalog import Catalog
+    from normalize import STEPS as NORMALIZE_STEPS, Normalizer, normalizer, parse_steps
+    from packed import PackReader, is_packed, load_metadata, pack_path, write_pack
+except ImportError:  # imported as law_parser.parser
+    from law_parser import metrics
+    from law_parser.catalog import Catalog
+    from law_parser.normalize import STEPS as NORMALIZE_STEPS, Normalizer, normalizer, parse_steps
+    from law_parser.packed import PackReader, is_packed, load_metadata, pack_path, write_pack
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # ANSI Colors & Styles
@@ -74,6 +101,11 @@ CODES = {
 SCRIPT_DIR = Path(__file__).parent
 OUTPUT_DIR = SCRIPT_DIR.parent / "codes"
 CACHE_DIR = SCRIPT_DIR / ".cache"
+CACHE_COMPRESSLEVEL = 6
+PARSE_CACHE_LIMIT = 64 * 1024 * 1024   # bytes of extracted articles kept in .cache/parsed
+
+# Parallel parsing: number of worker processes (--workers N, 1 = sequential)
+WORKERS = os.cpu_count() or 1
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # Data Classes
@@ -84,63 +116,528 @@ class Article:
     title: str
     text: str
 
+
+@dataclass
+class ParseResult:
+    code_id: str
+    count: int = 0
+    elapsed: float = 0.0
+    error: str | None = None
+    skipped: bool = False
+    changes: dict | None = None    # changeset of an incremental save
+    metrics: dict | None = None    # metrics snapshot of a worker process
+    saved_bytes: int = 0           # page chrome and whitespace dropped by normalization
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Cache Store
+# ═══════════════════════════════════════════════════════════════════════════════
+class CacheStore:
+    """Gzip-compressed pages in CACHE_DIR, indexed by manifest.json.
+
+    Manifest entry per code id: url, fetched_at, sha256, size (bytes), chars,
+    stored_size, etag, last_modified, parser_version, parsed_at and, while a
+    download is unfinished, the validators of its `<id>.part` file.
+    Raw `<id>` files from older checkouts are still readable as legacy entries.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.manifest_path = root / "manifest.json"
+        self.lock = threading.Lock()
+        self.manifest: dict[str, dict] = {}
+        self._mtime: int | None = None
+        self._reload()
+
+    def page_path(self, code_id: str) -> Path:
+        return self.root / f"{code_id}.html.gz"
+
+    def legacy_path(self, code_id: str) -> Path:
+        return self.root / code_id
+
+    def part_path(self, code_id: str) -> Path:
+        return self.root / f"{code_id}.part"
+
+    def _path(self, code_id: str) -> Path | None:
+        for path in (self.page_path(code_id), self.legacy_path(code_id)):
+            if path.is_file():
+                return path
+        return None
+
+    def has(self, code_id: str) -> bool:
+        return self._path(code_id) is not None
+
+    def entry(self, code_id: str) -> dict:
+        with self.lock:
+            self._reload()
+            return dict(self.manifest.get(code_id, {}))
+
+    def update(self, code_id: str, **fields) -> None:
+        """Merge fields into a manifest entry (None removes the key) and persist."""
+        with self._locked():
+            entry = self.manifest.setdefault(code_id, {})
+            for key, value in fields.items():
+                if value is None:
+                    entry.pop(key, None)
+                else:
+                    entry[key] = value
+            self._save()
+
+    @contextmanager
+    def _locked(self):
+        """Hold the manifest against other threads and processes (parse_parallel workers), re-read from disk."""
+        with self.lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            with open(self.root / "manifest.lock", "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._reload(force=True)
+                yield
+
+    def _reload(self, force: bool = False) -> None:
+        """Re-read manifest.json if another process replaced it since this one last read or wrote it."""
+        try:
+            mtime = self.manifest_path.stat().st_mtime_ns
+        except OSError:
+            return
+        if force or mtime != self._mtime:
+            try:
+                self.manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                return
+            self._mtime = mtime
+
+    def _save(self) -> None:
+        tmp = self.manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.manifest, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+        tmp.replace(self.manifest_path)
+        self._mtime = self.manifest_path.stat().st_mtime_ns
+
+    def put(self, code_id: str, source: Path, **fields) -> dict:
+        """Compress a downloaded file into the store (streaming, hashed and UTF-8 checked on the way)."""
+        digest = hashlib.sha256()
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        size = chars = 0
+        tmp = self.page_path(code_id).with_suffix(".tmp")
+        
+        with open(source, "rb") as src, gzip.GzipFile(tmp, "wb", compresslevel=CACHE_COMPRESSLEVEL, mtime=0) as out:
+            while chunk := src.read(READ_CHUNK):
+                digest.update(chunk)
+                size += len(chunk)
+                chars += len(decoder.decode(chunk))
+                out.write(chunk)
+            chars += len(decoder.decode(b"", final=True))
+        
+        tmp.replace(self.page_path(code_id))
+        source.unlink()
+        self.update(
+            code_id,
+            **{
+                "fetched_at": time.time(),
+                **fields,
+                "sha256": digest.hexdigest(),
+                "size": size,
+                "chars": chars,
+                "stored_size": self.page_path(code_id).stat().st_size,
+            },
+        )
+        return self.entry(code_id)
+
+    def iter_chunks(self, code_id: str, size: int | None = None) -> Iterator[str]:
+        """Decompress a page incrementally; the full text is never held in memory."""
+        size = size or STREAM_CHUNK_SIZE
+        path = self._path(code_id)
+        if path is None:
+            raise FileNotFoundError(f"Нет в кэше: {code_id}")
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "rt", encoding="utf-8") as page:
+            while chunk := page.read(size):
+                yield chunk
+
+    def read_text(self, code_id: str) -> str:
+        return "".join(self.iter_chunks(code_id))
+    
+    def page_hash(self, code_id: str) -> str:
+        """SHA-256 of a page's content: from the manifest, or computed for entries that lack it."""
+        if digest := self.entry(code_id).get("sha256"):
+            return digest
+        path = self._path(code_id)
+        if path is None:
+            raise FileNotFoundError(f"Нет в кэше: {code_id}")
+        digest = hashlib.sha256()
+        with (gzip.open if path.suffix == ".gz" else open)(path, "rb") as page:
+            while chunk := page.read(READ_CHUNK):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def mark_parsed(self, code_id: str) -> None:
+        self.update(code_id, parser_version=PARSER_VERSION, parsed_at=time.time())
+
+    def migrate(self) -> list[str]:
+        """Compress legacy raw `<id>` pages into the store."""
+        migrated = []
+        for code_id in sorted(self._legacy_ids()):
+            if self.page_path(code_id).exists():
+                continue
+            copy = self.part_path(code_id).with_suffix(".migrate")
+            shutil.copyfile(self.legacy_path(code_id), copy)
+            self.put(code_id, copy, fetched_at=self.legacy_path(code_id).stat().st_mtime)
+            self.legacy_path(code_id).unlink()
+            migrated.append(code_id)
+        return migrated
+
+    def gc(self, keep: Iterable[str], max_age_days: float | None = None) -> tuple[list[str], int]:
+        """Evict stale entries and stray files. Returns (removed names, bytes freed).
+
+        Stale: code ids not in `keep`, pages not fetched within `max_age_days`,
+        legacy raw pages shadowed by a compressed copy, leftover .tmp/.meta.json
+        files and .part downloads of evicted codes.
+        """
+        keep = set(keep)
+        cutoff = time.time() - max_age_days * 86400 if max_age_days is not None else None
+        removed, freed = [], 0
+        
+        def remove(path: Path):
+            nonlocal freed
+            if path.is_file():
+                freed += path.stat().st_size
+                path.unlink()
+                removed.append(path.name)
+        
+        with self._locked():
+            for code_id, entry in list(self.manifest.items()):
+                path = self._path(code_id)
+                fetched_at = entry.get("fetched_at") or (path.stat().st_mtime if path else 0)
+                expired = cutoff is not None and fetched_at < cutoff
+                if code_id not in keep or expired:
+                    remove(self.page_path(code_id))
+                    remove(self.legacy_path(code_id))
+                    remove(self.part_path(code_id))
+                    del self.manifest[code_id]
+            self._save()
+            
+            for path in self.root.iterdir():
+                name = path.name
+                code_id = name.split(".")[0]
+                if name.endswith((".tmp", ".meta.json", ".migrate")):
+                    remove(path)
+                elif name.endswith((".html.gz", ".part")) and code_id not in self.manifest:
+                    remove(path)
+                elif name.isdigit() and (name not in keep or self.page_path(name).exists()):
+                    remove(path)
+        return removed, freed
+
+    def _legacy_ids(self) -> list[str]:
+        return [path.name for path in self.root.iterdir() if path.name.isdigit() and path.is_file()]
+
+
+_stores: dict[Path, CacheStore] = {}
+
+
+def cache_store() -> CacheStore:
+    """Store for the current CACHE_DIR, shared by all threads of this process."""
+    if CACHE_DIR not in _stores:
+        CACHE_DIR.mkdir(exist_ok=True)
+        _stores[CACHE_DIR] = CacheStore(CACHE_DIR)
+    return _stores[CACHE_DIR]
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # Downloader
 # ═══════════════════════════════════════════════════════════════════════════════
-def download_page(code_id: str) -> str:
-    """Download HTML page from lex.uz"""
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
+}
+
+# Point downloads at another host, e.g. the local stand-in: LEXUZ_BASE_URL=http://127.0.0.1:8765
+BASE_URL = os.environ.get("LEXUZ_BASE_URL", "").rstrip("/")
+HOST_CONNECTIONS = 4       # keep-alive connections (and requests in flight) per host
+RETRIES = 4                # attempts after the first one, on network errors, 5xx and 429
+BACKOFF = 1.0              # seconds before the first retry, doubled on every next one
+MAX_REDIRECTS = 5
+READ_CHUNK = 64 * 1024
+
+
+@dataclass
+class FetchResult:
+    code_id: str
+    status: str            # downloaded | not_modified | cached | error
+    size: int = 0
+    elapsed: float = 0.0
+    error: str | None = None
+
+
+def source_url(code_id: str) -> str:
+    """lex.uz URL of a code, rebased onto BASE_URL when it is set."""
+    url = CODES[code_id][3]
+    if BASE_URL:
+        parts = urlsplit(url)
+        url = BASE_URL + parts.path + (f"?{parts.query}" if parts.query else "")
+    return url
+
+
+class RetryableError(Exception):
+    """Transient failure (network, 5xx, 429); `delay` overrides the backoff when the server asked for it."""
+
+    def __init__(self, message: str, delay: float | None = None):
+        super().__init__(message)
+        self.delay = delay
+
+
+class ConnectionPool:
+    """Keep-alive http.client connections shared between threads, at most `limit` per host."""
+
+    def __init__(self, limit: int = HOST_CONNECTIONS, timeout: float = 30):
+        self.limit = limit
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.idle: dict[tuple[str, str], list] = {}  # http.client connections
+        self.slots: dict[tuple[str, str], threading.Semaphore] = {}
+
+    def _slot(self, key) -> threading.Semaphore:
+        with self.lock:
+            return self.slots.setdefault(key, threading.BoundedSemaphore(self.limit))
+
+    @contextmanager
+    def connection(self, scheme: str, netloc: str):
+        """Borrow a connection; it goes back to the pool only if the response was fully read."""
+        key = (scheme, netloc)
+        slot = self._slot(key)
+        slot.acquire()
+        try:
+            with self.lock:
+                conn = self.idle.get(key, []).pop() if self.idle.get(key) else None
+            if conn is None:
+                from http.client import HTTPConnection, HTTPSConnection
+                cls = HTTPSConnection if scheme == "https" else HTTPConnection
+                conn = cls(netloc, timeout=self.timeout)
+            try:
+                yield conn
+            except BaseException:
+                conn.close()
+                raise
+            if conn.sock is not None:
+                with self.lock:
+                    self.idle.setdefault(key, []).append(conn)
+        finally:
+            slot.release()
+
+    def close(self):
+        with self.lock:
+            for conns in self.idle.values():
+                for conn in conns:
+                    conn.close()
+            self.idle.clear()
+
+
+def _fetch_once(code_id: str, pool: ConnectionPool, revalidate: bool) -> str:
+    """One attempt: conditional and/or ranged GET into `<id>.part`. Returns downloaded | not_modified."""
+    from http.client import HTTPException  # http.client (with ssl and email) only when something is fetched
+
+    store = cache_store()
+    part_file = store.part_path(code_id)
+    meta = store.entry(code_id)
+    
+    headers = dict(HEADERS)
+    if revalidate and store.has(code_id):
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+    
+    partial = meta.get("partial") or {}
+    offset = part_file.stat().st_size if part_file.exists() else 0
+    if offset and (partial.get("etag") or partial.get("last_modified")):
+        headers["Range"] = f"bytes={offset}-"
+        headers["If-Range"] = partial.get("etag") or partial["last_modified"]
+    
+    url = source_url(code_id)
+    for _ in range(MAX_REDIRECTS + 1):
+        parts = urlsplit(url)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        
+        with pool.connection(parts.scheme, parts.netloc) as conn:
+            try:
+                conn.request("GET", path or "/", headers=headers)
+                response = conn.getresponse()
+            except (OSError, HTTPException) as e:
+                raise RetryableError(f"Ошибка сети: {e}")
+            
+            status = response.status
+            if status in (301, 302, 303, 307, 308) and response.getheader("Location"):
+                response.read()
+                url = urljoin(url, response.getheader("Location"))
+                continue
+            if status == 304:
+                response.read()
+                part_file.unlink(missing_ok=True)
+                store.update(code_id, partial=None, url=url, fetched_at=time.time())
+                return "not_modified"
+            if status == 416:
+                # Our partial copy no longer matches the remote page: start over
+                response.read()
+                part_file.unlink(missing_ok=True)
+                store.update(code_id, partial=None)
+                raise RetryableError("Диапазон устарел, скачиваю заново", delay=0)
+            if status == 429 or status >= 500:
+                response.read()
+                retry_after = response.getheader("Retry-After", "")
+                raise RetryableError(
+                    f"HTTP ошибка {status}: {response.reason}",
+                    delay=float(retry_after) if retry_after.isdigit() else None,
+                )
+            if status not in (200, 206):
+                response.read()
+                raise RuntimeError(f"HTTP ошибка {status}: {response.reason}")
+            
+            # Record the validators first, so an interrupted body can be resumed later
+            validators = {
+                "etag": response.getheader("ETag"),
+                "last_modified": response.getheader("Last-Modified"),
+            }
+            store.update(code_id, partial=validators)
+            
+            with open(part_file, "ab" if status == 206 else "wb") as out:
+                try:
+                    while chunk := response.read(READ_CHUNK):
+                        out.write(chunk)
+                except (OSError, HTTPException) as e:
+                    raise RetryableError(f"Обрыв соединения: {e}")
+            # http.client returns a short body instead of raising when the peer hangs up early
+            if response.length:
+                conn.close()
+                raise RetryableError(f"Обрыв соединения: не хватает {response.length} байт")
+            if response.will_close:
+                conn.close()
+        
+        try:
+            store.put(code_id, part_file, partial=None, url=url, **validators)
+        except UnicodeDecodeError as e:
+            part_file.unlink(missing_ok=True)
+            store.update(code_id, partial=None)
+            raise RuntimeError(f"Ошибка загрузки: {e}")
+        return "downloaded"
+    
+    raise RuntimeError(f"Слишком много перенаправлений: {source_url(code_id)}")
+
+
+def fetch_page(code_id: str, pool: ConnectionPool | None = None, revalidate=True) -> FetchResult:
+    """Download or revalidate one cache entry, retrying transient errors with exponential backoff."""
+    own_pool = pool is None
+    pool = pool or ConnectionPool()
+    start = time.time()
+    with metrics.span("download", code=code_id) as span:
+        try:
+            for attempt in range(RETRIES + 1):
+                try:
+                    status = _fetch_once(code_id, pool, revalidate)
+                    size = cache_store().entry(code_id).get("size", 0)
+                    if status == "downloaded":
+                        span.count(bytes=size)
+                    return FetchResult(code_id, status, size=size, elapsed=time.time() - start)
+                except RetryableError as e:
+                    if attempt == RETRIES:
+                        span.error = type(e).__name__
+                        return FetchResult(code_id, "error", elapsed=time.time() - start, error=str(e))
+                    span.count(retries=1)
+                    time.sleep(e.delay if e.delay is not None else BACKOFF * 2 ** attempt)
+        except Exception as e:
+            span.error = type(e).__name__
+            return FetchResult(code_id, "error", elapsed=time.time() - start, error=str(e))
+        finally:
+            if own_pool:
+                pool.close()
+
+
+def ensure_cached(code_id: str) -> CacheStore:
+    """Make sure a page is in the cache store, downloading it on a miss."""
     if code_id not in CODES:
         raise ValueError(f"Unknown code: {code_id}")
     
     _, _, name, url = CODES[code_id]
     
     # Check cache first
-    CACHE_DIR.mkdir(exist_ok=True)
-    cache_file = CACHE_DIR / code_id
-    if cache_file.exists():
+    store = cache_store()
+    if store.has(code_id):
         log_info(f"Загружаю из кэша: {C.DIM}{code_id}{C.RESET}")
-        return cache_file.read_text(encoding="utf-8")
+        return store
     
     log_info(f"Скачиваю {C.BOLD}{name}{C.RESET}...")
-    log_info(f"{C.DIM}{url}{C.RESET}")
+    log_info(f"{C.DIM}{source_url(code_id)}{C.RESET}")
     
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
+    result = fetch_page(code_id, revalidate=False)
+    if result.error:
+        raise RuntimeError(result.error)
+    log_success("Скачано и закэшировано")
+    return store
+
+
+def download_page(code_id: str) -> str:
+    """Download HTML page from lex.uz"""
+    with metrics.span("read", code=code_id) as span:
+        html = ensure_cached(code_id).read_text(code_id)
+        span.count(chars=len(html))
+    return html
+
+
+def download_all(code_ids: list[str], revalidate=True, connections: int = HOST_CONNECTIONS) -> list[FetchResult]:
+    """Fetch many codes at once over pooled keep-alive connections; cached pages cost one conditional GET."""
+    CACHE_DIR.mkdir(exist_ok=True)
+    pool = ConnectionPool(limit=connections)
+    results: list[FetchResult] = []
+    start = time.time()
+    labels = {
+        "downloaded": f"{C.GREEN}скачано{C.RESET}",
+        "not_modified": f"{C.DIM}не изменился{C.RESET}",
     }
     
     try:
-        req = Request(url, headers=headers)
-        with urlopen(req, timeout=30) as response:
-            html = response.read().decode("utf-8")
-        
-        # Cache for future use
-        cache_file.write_text(html, encoding="utf-8")
-        log_success("Скачано и закэшировано")
-        return html
-        
-    except HTTPError as e:
-        raise RuntimeError(f"HTTP ошибка {e.code}: {e.reason}")
-    except URLError as e:
-        raise RuntimeError(f"Ошибка сети: {e.reason}")
-    except Exception as e:
-        raise RuntimeError(f"Ошибка загрузки: {e}")
+        with ThreadPoolExecutor(max_workers=max(1, connections)) as executor:
+            futures = {executor.submit(fetch_page, code_id, pool, revalidate): code_id for code_id in code_ids}
+            progress_bar(0, len(code_ids), prefix="Страницы")
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                name = CODES[result.code_id][2]
+                sys.stdout.write("\r\033[K")
+                if result.error:
+                    log_error(f"{name}: {result.error}")
+                else:
+                    log_success(f"{name}: {labels[result.status]} ({result.size / 1024:.0f} КБ, {result.elapsed:.1f}с)")
+                progress_bar(len(results), len(code_ids), prefix="Страницы")
+    finally:
+        pool.close()
+    
+    changed = sum(1 for r in results if r.status == "downloaded")
+    failed = sum(1 for r in results if r.error)
+    log_info(f"Скачано: {changed}, без изменений: {len(results) - changed - failed}, ошибок: {failed} "
+             f"за {time.time() - start:.1f}с")
+    return results
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # Parser Core
 # ═══════════════════════════════════════════════════════════════════════════════
+# Bump whenever a change to extraction changes the articles it produces
+# (2: text normalization, see normalize.py)
+PARSER_VERSION = 2
+ARTICLE_NUMBER_RE = re.compile(r"Статья\s+([\d\(\)]+)")
+
+
 def extract_article_number(prefix_span) -> str | None:
     """Extract article number, converting <sup> to parentheses: 26<sup>1</sup> → 26(1)"""
     for sup in prefix_span.find_all("sup"):
         sup.replace_with(f"({sup.get_text()})")
     text = prefix_span.get_text()
-    match = re.search(r"Статья\s+([\d\(\)]+)", text)
+    match = ARTICLE_NUMBER_RE.search(text)
     return match.group(1) if match else None
 
 
-def extract_articles(html: str, show_progress=True) -> list[Article]:
-    """Parse HTML and extract all articles."""
+def extract_articles_soup(html: str | Iterable[str], show_progress=True, total: int | None = None) -> list[Article]:
+    """Parse HTML with BeautifulSoup and extract all articles (reference engine)."""
+    from bs4 import BeautifulSoup
+
+    if not isinstance(html, str):
+        html = "".join(html)
     log_info("Парсинг HTML...")
     soup = BeautifulSoup(html, "html.parser")
     clauses = soup.find_all("div", class_="CLAUSE_DEFAULT")
@@ -181,55 +678,531 @@ def extract_articles(html: str, show_progress=True) -> list[Article]:
     return articles
 
 
-def save_articles(articles: list[Article], output_dir: Path, abbrev: str, show_progress=True) -> None:
-    """Save articles to txt files and generate metadata.json."""
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    log_info(f"Сохраняю в {C.CYAN}{output_dir.relative_to(OUTPUT_DIR.parent)}{C.RESET}")
-    metadata = []
+# ═══════════════════════════════════════════════════════════════════════════════
+# Streaming Parser Core
+# ═══════════════════════════════════════════════════════════════════════════════
+# The streaming engine rebuilds only the open-element stack, never the tree.
+# These sets mirror BeautifulSoup's html.parser tree builder, so both engines
+# see the same element nesting and the same text nodes.
+VOID_TAGS = frozenset({
+    "area", "base", "basefont", "bgsound", "br", "col", "command", "embed", "frame", "hr",
+    "image", "img", "input", "isindex", "keygen", "link", "menuitem", "meta", "nextid",
+    "param", "source", "spacer", "track", "wbr",
+})
+PRESERVE_WHITESPACE_TAGS = frozenset({"pre", "textarea"})
+HIDDEN_TEXT_TAGS = frozenset({"rt", "rp", "style", "script", "template"})  # not part of get_text()
+ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class _Capture:
+    """Text of one element, optionally rendering <sup>N</sup> as (N)."""
+    __slots__ = ("parts", "sup_as_parens", "sup_depth")
+
+    def __init__(self, sup_as_parens=False):
+        self.parts = []
+        self.sup_as_parens = sup_as_parens
+        self.sup_depth = 0
+
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
+class _PendingArticle:
+    """Article whose clause was seen but whose ACT_TEXT siblings may still follow."""
+    __slots__ = ("clause", "prefix", "suffix", "number", "title", "text_parts", "done")
+
+    def __init__(self):
+        self.clause = _Capture(sup_as_parens=True)
+        self.prefix: _Capture | None = None
+        self.suffix: _Capture | None = None
+        self.number: str | None = None
+        self.title = ""
+        self.text_parts: list[str] = []
+        self.done = False
+
+
+class _Frame:
+    """One open element on the stack."""
+    __slots__ = ("tag", "captures", "pending", "clause_of", "part_of")
+
+    def __init__(self, tag):
+        self.tag = tag
+        self.captures: list[_Capture] = []
+        self.pending: _PendingArticle | None = None   # article collecting this element's children
+        self.clause_of: _PendingArticle | None = None  # this element is the article's CLAUSE_DEFAULT
+        self.part_of: _PendingArticle | None = None    # this element is one of the article's ACT_TEXT
+
+
+class ArticleStreamParser(HTMLParser):
+    """Single-pass article extractor; feed() HTML chunks, then drain() finished articles."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.stack = [_Frame("[document]")]
+        self.open_tags: dict[str, int] = {}
+        self.already_closed: list[str] = []
+        self.data: list[str] = []
+        self.active: list[_Capture] = []
+        self.open_clauses: list[_PendingArticle] = []
+        self.queue: deque[_PendingArticle] = deque()
+        self.hidden = 0
+        self.preserve = 0
+
+    # ── tree building ────────────────────────────────────────────────────────
+    def handle_starttag(self, tag, attrs, void_check=True):
+        self._flush()
+        classes = (dict(attrs).get("class") or "").split()
+        parent = self.stack[-1]
+        frame = _Frame(tag)
+
+        if "CLAUSE_DEFAULT" in classes:
+            if parent.pending:
+                self._finish(parent.pending)
+                parent.pending = None
+            if tag == "div":
+                article = _PendingArticle()
+                self.queue.append(article)
+                parent.pending = frame.clause_of = article
+                frame.captures.append(article.clause)
+        elif "ACT_TEXT" in classes and parent.pending:
+            frame.part_of = parent.pending
+            frame.captures.append(_Capture())
+
+        if tag == "span":
+            for article in self.open_clauses:
+                if article.prefix is None and "clausePrfx" in classes:
+                    article.prefix = _Capture(sup_as_parens=True)
+                    frame.captures.append(article.prefix)
+                if article.suffix is None and "clauseSuff" in classes:
+                    article.suffix = _Capture()
+                    frame.captures.append(article.suffix)
+        elif tag == "sup":
+            for capture in self.active:
+                if capture.sup_as_parens:
+                    if not capture.sup_depth:
+                        capture.parts.append("(")
+                    capture.sup_depth += 1
+
+        self.stack.append(frame)
+        self.open_tags[tag] = self.open_tags.get(tag, 0) + 1
+        self.active.extend(frame.captures)
+        if frame.clause_of:
+            self.open_clauses.append(frame.clause_of)
+        self.hidden += tag in HIDDEN_TEXT_TAGS
+        self.preserve += tag in PRESERVE_WHITESPACE_TAGS
+
+        if void_check and tag in VOID_TAGS:
+            self._end(tag)
+            self.already_closed.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, void_check=False)
+        self._end(tag)
+
+    def handle_endtag(self, tag):
+        self._flush()
+        if tag in self.already_closed:
+            self.already_closed.remove(tag)
+        else:
+            self._end(tag)
+
+    def handle_data(self, data):
+        self.data.append(data)
+
+    def handle_entityref(self, name):
+        self.data.append(html5_entities.get(f"{name};", f"&{name}"))
+
+    def handle_charref(self, name):
+        match = re.match(r"[xX]([0-9a-fA-F]+)(.*)" if name[:1] in "xX" else r"([0-9]+)(.*)", name)
+        if not match:
+            self.data.append(name)
+            return
+        code = int(match.group(1), 16 if name[:1] in "xX" else 10)
+        if 128 <= code <= 159:
+            char = bytes([code]).decode("cp1252", errors="replace")
+        else:
+            char = chr(code) if code < 0x110000 and not 0xD800 <= code <= 0xDFFF else "�"
+        self.data.append(char + match.group(2))
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def unknown_decl(self, data):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def close(self):
+        super().close()
+        self._flush()
+        while len(self.stack) > 1:
+            self._pop()
+        if self.stack[0].pending:
+            self._finish(self.stack[0].pending)
+
+    def _end(self, tag):
+        """Close the most recent open <tag>, and everything opened inside it."""
+        if not self.open_tags.get(tag):
+            return
+        while self._pop().tag != tag:
+            pass
+
+    def _pop(self) -> _Frame:
+        frame = self.stack.pop()
+        self.open_tags[frame.tag] -= 1
+        self.hidden -= frame.tag in HIDDEN_TEXT_TAGS
+        self.preserve -= frame.tag in PRESERVE_WHITESPACE_TAGS
+        for capture in frame.captures:
+            self.active.remove(capture)
+
+        if frame.tag == "sup":
+            for capture in self.active:
+                if capture.sup_as_parens and capture.sup_depth:
+                    capture.sup_depth -= 1
+                    if not capture.sup_depth:
+                        capture.parts.append(")")
+        if frame.pending:
+            self._finish(frame.pending)
+        if frame.part_of:
+            frame.part_of.text_parts.append(frame.captures[0].text().strip())
+        if frame.clause_of:
+            article = frame.clause_of
+            self.open_clauses.remove(article)
+            # Same precedence as the soup engine: clausePrfx/clauseSuff, else Constitution <a id>
+            if article.prefix is not None:
+                match = ARTICLE_NUMBER_RE.search(article.prefix.text())
+                article.title = article.suffix.text().strip() if article.suffix else ""
+            else:
+                match = ARTICLE_NUMBER_RE.search(article.clause.text())
+            article.number = match.group(1) if match else None
+            article.clause = article.prefix = article.suffix = None
+        return frame
+
+    def _flush(self):
+        """End the current text node (BeautifulSoup's endData)."""
+        if not self.data:
+            return
+        text = "".join(self.data)
+        self.data = []
+        if not self.preserve and not text.strip(ASCII_SPACES):
+            text = "\n" if "\n" in text else " "
+        if self.hidden:
+            return
+        for capture in self.active:
+            capture.parts.append(text)
+
+    # ── output ───────────────────────────────────────────────────────────────
+    @staticmethod
+    def _finish(article: _PendingArticle):
+        article.done = True
+
+    def drain(self) -> Iterator[Article]:
+        """Yield finished articles in document order."""
+        while self.queue and self.queue[0].done:
+            article = self.queue.popleft()
+            if article.number:
+                yield Article(number=article.number, title=article.title, text=" ".join(article.text_parts))
+
+
+def iter_articles(source: str | Iterable[str], show_progress=False, total: int | None = None) -> Iterator[Article]:
+    """Stream articles out of HTML given as a string or as an iterable of text chunks.
+
+    `total` is the length of the whole text in characters, for the progress bar.
+    """
+    if isinstance(source, str):
+        total = len(source)
+        chunks = (source[i:i + STREAM_CHUNK_SIZE] for i in range(0, len(source), STREAM_CHUNK_SIZE))
+    else:
+        chunks = source
+    total_kb = max(1, -(-total // 1024)) if total else None
+
+    parser = ArticleStreamParser()
+    done = 0
+    for chunk in chunks:
+        parser.feed(chunk)
+        done += len(chunk)
+        if show_progress and total_kb:
+            progress_bar(min(-(-done // 1024), total_kb), total_kb, prefix="Обработка, КБ")
+        yield from parser.drain()
+    parser.close()
+    yield from parser.drain()
+
+
+def extract_articles_stream(html: str | Iterable[str], show_progress=True, total: int | None = None) -> list[Article]:
+    """Parse HTML in one streaming pass and extract all articles."""
+    log_info("Потоковый парсинг HTML...")
+    articles = list(iter_articles(html, show_progress=show_progress, total=total))
+    if articles:
+        log_info(f"Найдено {C.BOLD}{len(articles)}{C.RESET} статей")
+    return articles
+
+
+ENGINES = {
+    "stream": extract_articles_stream,
+    "soup": extract_articles_soup,
+}
+DEFAULT_ENGINE = "stream"
+
+
+def extract_articles(
+    html: str | Iterable[str], show_progress=True, engine: str = DEFAULT_ENGINE, total: int | None = None
+) -> list[Article]:
+    """Parse HTML (a string or text chunks) and extract all articles with the selected engine."""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+    with metrics.span("extract", engine=engine) as span:
+        articles = ENGINES[engine](html, show_progress, total)
+        span.count(articles=len(articles))
+        if isinstance(html, str) or total:
+            span.count(chars=len(html) if isinstance(html, str) else total)
+    return articles
+
+
+def article_content(art: Article, abbrev: str) -> str:
+    """Text of an article's .txt file."""
+    return f"Статья {art.number} {abbrev}\n{art.title} {art.text}"
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def normalize_article(art: Article, normalize: Normalizer) -> Article:
+    return Article(art.number, normalize(art.title), normalize(art.text))
+
+
+def normalize_articles(articles: list[Article], steps=NORMALIZE_STEPS) -> tuple[list[Article], int]:
+    """Articles with page chrome stripped and text normalized (see normalize.py), and the UTF-8 bytes that saved."""
+    if not steps:
+        return articles, 0
+    normalize = normalizer(tuple(steps))
+    with metrics.span("normalize") as span:
+        normalized = [normalize_article(art, normalize) for art in articles]
+        saved = sum(len(art.title.encode("utf-8")) + len(art.text.encode("utf-8")) for art in articles)
+        saved -= sum(len(art.title.encode("utf-8")) + len(art.text.encode("utf-8")) for art in normalized)
+        span.count(articles=len(normalized), bytes_saved=saved)
+    return normalized, saved
+
+
+def load_metadata(output_dir: Path) -> list[dict]:
+    try:
+        return json.loads((output_dir / "metadata.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+
+
+def article_status(path: Path, previous: dict | None, data: bytes, digest: str) -> tuple[str | None, bool]:
+    """Compare an article with what is on disk. Returns (added | changed | None, needs_write).
+
+    The hash recorded in metadata.json is trusted while the file is still there
+    with the same size; older metadata without hashes falls back to hashing the file.
+    """
+    on_disk = path.stat().st_size if path.exists() else None
+    if previous is None:
+        same = on_disk == len(data) and content_hash(path.read_bytes()) == digest
+        return "added", not same
     
-    for i, art in enumerate(articles):
-        if show_progress:
-            progress_bar(i + 1, len(articles), prefix="Запись   ")
+    known = previous.get("sha256")
+    if known is None and on_disk is not None:
+        known = content_hash(path.read_bytes())
+    if known != digest:
+        return "changed", True
+    return None, on_disk != len(data)
+
+
+def save_articles(
+    articles: list[Article], output_dir: Path, abbrev: str, show_progress=True, incremental=True, packed=False
+) -> dict | None:
+    """Save articles to txt files (or one articles.pack, see packed.py) and generate metadata.json.
+
+    Incremental mode writes only added or changed articles, deletes files of
+    articles that disappeared, and returns the changeset, also saved as changes.json.
+    A folder that is already packed stays packed.
+    """
+    with metrics.span("save") as span:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        packed = packed or is_packed(output_dir)
         
-        content = f"Статья {art.number} {abbrev}\n{art.title} {art.text}"
-        filename = f"{art.number}.txt"
-        (output_dir / filename).write_text(content, encoding="utf-8")
+        log_info(f"Сохраняю в {C.CYAN}{output_dir.relative_to(OUTPUT_DIR.parent)}{C.RESET}" + (" (pack)" if packed else ""))
+        previous = {m["file_path"]: m for m in load_metadata(output_dir)} if incremental else {}
+        changes = {"law_type": output_dir.name, "added": [], "changed": [], "removed": [], "unchanged": 0}
+        metadata = []
+        bodies = []
+        # Hashes of an existing pack, for metadata written before hashes were recorded
+        old_pack = PackReader(pack_path(output_dir)) if packed and incremental and is_packed(output_dir) else None
         
-        metadata.append({
-            "law_type": output_dir.name,
-            "article_number": art.number,
-            "file_path": filename
-        })
-    
-    (output_dir / "metadata.json").write_text(
-        json.dumps(metadata, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+        for i, art in enumerate(articles):
+            if show_progress:
+                progress_bar(i + 1, len(articles), prefix="Запись   ")
+            
+            data = article_content(art, abbrev).encode("utf-8")
+            digest = content_hash(data)
+            filename = f"{art.number}.txt"
+            
+            if incremental and packed:
+                entry = previous.get(filename)
+                known = entry.get("sha256") if entry else None
+                if entry and known is None and old_pack and art.number in old_pack:
+                    known = old_pack.sha256(art.number)
+                status = None if known == digest else "changed" if entry else "added"
+                needs_write = False
+            elif incremental:
+                status, needs_write = article_status(output_dir / filename, previous.get(filename), digest=digest, data=data)
+            else:
+                status, needs_write = None, True
+            if incremental:
+                if status:
+                    changes[status].append(art.number)
+                else:
+                    changes["unchanged"] += 1
+            if packed:
+                bodies.append((art.number, data))
+            elif needs_write:
+                (output_dir / filename).write_bytes(data)
+                span.count(bytes=len(data), files=1)
+            
+            metadata.append({
+                "law_type": output_dir.name,
+                "article_number": art.number,
+                "file_path": filename,
+                "sha256": digest,
+            })
+        
+        if old_pack:
+            old_pack.close()
+        span.count(articles=len(metadata))
+        
+        current = {m["file_path"] for m in metadata}
+        for filename, entry in previous.items():
+            if filename not in current:
+                changes["removed"].append(entry["article_number"])
+                (output_dir / filename).unlink(missing_ok=True)
+        
+        if packed:
+            # One file per code: rewrite it whenever anything changed, and drop loose .txt files
+            if not incremental or not is_packed(output_dir) or changes["added"] or changes["changed"] or changes["removed"]:
+                write_pack(pack_path(output_dir), bodies)
+                span.count(bytes=sum(len(data) for _, data in bodies), files=1)
+            for filename in current:
+                (output_dir / filename).unlink(missing_ok=True)
+        else:
+            pack_path(output_dir).unlink(missing_ok=True)
+        
+        metadata_text = json.dumps(metadata, ensure_ascii=False, indent=2)
+        metadata_file = output_dir / "metadata.json"
+        if not incremental or not metadata_file.exists() or metadata_file.read_text(encoding="utf-8") != metadata_text:
+            metadata_file.write_text(metadata_text, encoding="utf-8")
+        
+        if not incremental:
+            return None
+        
+        changes["parser_version"] = PARSER_VERSION
+        (output_dir / "changes.json").write_text(json.dumps(changes, ensure_ascii=False, indent=2), encoding="utf-8")
+        log_info(
+            f"Изменения: {C.GREEN}+{len(changes['added'])}{C.RESET} "
+            f"{C.YELLOW}~{len(changes['changed'])}{C.RESET} "
+            f"{C.RED}-{len(changes['removed'])}{C.RESET}, без изменений {changes['unchanged']}"
+        )
+        return changes
+
+
+_catalogs: dict[Path, Catalog] = {}
+
+
+def catalog() -> Catalog:
+    """Corpus catalog of the current OUTPUT_DIR (codes/catalog.json), kept loaded between calls."""
+    if OUTPUT_DIR not in _catalogs:
+        _catalogs[OUTPUT_DIR] = Catalog(OUTPUT_DIR)
+    return _catalogs[OUTPUT_DIR]
 
 
 def is_processed(code_id: str) -> tuple[bool, int]:
     """Check if code was already processed. Returns (is_done, article_count)"""
     folder, *_ = CODES[code_id]
-    output_path = OUTPUT_DIR / folder
-    metadata_file = output_path / "metadata.json"
+    entry = catalog().status(folder)
+    if entry:
+        return True, entry["articles"]
+    return False, 0
+
+
+def record_parsed(code_id: str):
+    """Mark a freshly saved code as parsed in the page cache manifest and in the corpus catalog."""
+    cache_store().mark_parsed(code_id)
+    folder, *_ = CODES[code_id]
+    catalog().record_parse(
+        folder, load_metadata(OUTPUT_DIR / folder), code_id=code_id, parser_version=PARSER_VERSION, parsed_at=time.time()
+    )
+
+
+def run_parse(
+    code_id: str,
+    engine: str = DEFAULT_ENGINE,
+    show_progress=True,
+    incremental=True,
+    packed=False,
+    use_parse_cache=True,
+    normalize=NORMALIZE_STEPS,
+) -> ParseResult:
+    """Download (or read from cache), extract, normalize and save one code. Errors are returned, not raised.
+
+    Articles already extracted from the same page by the same extractor come from the parse cache;
+    it holds them as extracted, so normalization steps can change without invalidating it.
+    """
+    folder, abbrev, _, _ = CODES[code_id]
+    start = time.time()
     
-    if metadata_file.exists():
+    # Every span below (download, extract, save) is labelled with the code
+    with metrics.labels(code=code_id):
         try:
-            data = json.loads(metadata_file.read_text(encoding="utf-8"))
-            return True, len(data)
-        except:
-            pass
-    return False, 0
+            store = ensure_cached(code_id)
+        except RuntimeError as e:
+            return ParseResult(code_id, error=str(e), elapsed=time.time() - start)
+        
+        page_hash = store.page_hash(code_id) if use_parse_cache else None
+        articles = parse_cache().get(page_hash) if page_hash else None
+        if articles:
+            log_info(f"Статьи из кэша разбора: {C.BOLD}{len(articles)}{C.RESET}")
+            metrics.count("parse_cache_hits")
+        else:
+            # Decompressed chunks go straight into the parser, the page is never held whole
+            chunks = store.iter_chunks(code_id)
+            articles = extract_articles(chunks, show_progress=show_progress, engine=engine, total=store.entry(code_id).get("chars"))
+            if articles and page_hash:
+                parse_cache().put(page_hash, articles)
+        
+        if not articles:
+            return ParseResult(code_id, error="Статьи не найдены!", elapsed=time.time() - start)
+        
+        articles, saved = normalize_articles(articles, normalize)
+        if saved:
+            log_info(f"Нормализация: {C.BOLD}−{saved / 1024:.0f} КБ{C.RESET} служебного текста и пробелов")
+        
+        changes = save_articles(
+            articles, OUTPUT_DIR / folder, abbrev, show_progress=show_progress, incremental=incremental, packed=packed
+        )
+        return ParseResult(code_id, count=len(articles), elapsed=time.time() - start, changes=changes, saved_bytes=saved)
 
 
-def parse_code(code_id: str, force=False) -> int:
+def parse_code(
+    code_id: str,
+    force=False,
+    engine: str = DEFAULT_ENGINE,
+    incremental=True,
+    packed=False,
+    use_parse_cache=True,
+    normalize=NORMALIZE_STEPS,
+) -> int:
     """Parse a single code by ID (downloads if needed)."""
     if code_id not in CODES:
         log_error(f"Неизвестный код: {code_id}")
         return 0
     
     folder, abbrev, name, url = CODES[code_id]
-    output_dir = OUTPUT_DIR / folder
     
     # Check if already processed
     done, count = is_processed(code_id)
@@ -240,33 +1213,258 @@ def parse_code(code_id: str, force=False) -> int:
     print(f"\n  {C.BOLD}📜 {name}{C.RESET} ({abbrev})")
     print(f"  {C.DIM}{'─' * 50}{C.RESET}")
     
-    start = time.time()
-    
-    try:
-        html = download_page(code_id)
-    except RuntimeError as e:
-        log_error(str(e))
-        return 0
-    
-    articles = extract_articles(html)
+    result = run_parse(
+        code_id, engine=engine, incremental=incremental, packed=packed, use_parse_cache=use_parse_cache, normalize=normalize
+    )
     
-    if not articles:
-        log_error("Статьи не найдены!")
+    if result.error:
+        log_error(result.error)
         return 0
     
-    save_articles(articles, output_dir, abbrev)
-    elapsed = time.time() - start
-    
+    record_parsed(code_id)
     print(f"  {C.DIM}{'─' * 50}{C.RESET}")
-    log_success(f"Готово за {C.BOLD}{elapsed:.1f}с{C.RESET}")
+    log_success(f"Готово за {C.BOLD}{result.elapsed:.1f}с{C.RESET}")
     print(f"""
   {C.GREEN}╭{'─' * 40}╮{C.RESET}
   {C.GREEN}│{C.RESET}  📊 {C.BOLD}Результат:{C.RESET}                          {C.GREEN}│{C.RESET}
-  {C.GREEN}│{C.RESET}     Статей: {C.CYAN}{C.BOLD}{len(articles):<26}{C.RESET} {C.GREEN}│{C.RESET}
-  {C.GREEN}│{C.RESET}     Папка:  {C.CYAN}{folder:<26}{C.RESET} {C.GREEN}│{C.RESET}
+  {C.GREEN}│{C.RESET}     Статей: {C.CYAN}{C.BOLD}{result.count:<26}{C.RESET} {C.GREEN}│{C.RESET}
+  {C.GREEN}│{C.RESET}     Папка:  {C.CYAN}{folder:<26}{C.RESET} {C.GREEN}│{C.RESET}{format_changes_row(result.changes)}
   {C.GREEN}╰{'─' * 40}╯{C.RESET}
 """)
-    return len(articles)
+    return result.count
+
+
+def format_changes(changes: dict | None) -> str:
+    if not changes:
+        return ""
+    return f" (+{len(changes['added'])} ~{len(changes['changed'])} -{len(changes['removed'])})"
+
+
+def format_changes_row(changes: dict | None) -> str:
+    if not changes:
+        return ""
+    summary = format_changes(changes).strip(" ()")
+    return f"\n  {C.GREEN}│{C.RESET}     Изменено: {C.CYAN}{summary:<25}{C.RESET} {C.GREEN}│{C.RESET}"
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Parse Result Cache
+# ═══════════════════════════════════════════════════════════════════════════════
+_extractor_version: str | None = None
+
+
+def extractor_version() -> str:
+    """PARSER_VERSION plus a hash of the extraction code (Parser Core up to extract_articles),
+    so cached articles are never reused after the extractor changes, bumped or not."""
+    global _extractor_version
+    if _extractor_version is None:
+        try:
+            source = Path(__file__).read_text(encoding="utf-8")
+            core = source[source.index("# Parser Core"):source.index("\ndef article_content(")]
+            _extractor_version = f"{PARSER_VERSION}.{hashlib.sha256(core.encode('utf-8')).hexdigest()[:12]}"
+        except (OSError, ValueError):
+            _extractor_version = str(PARSER_VERSION)
+    return _extractor_version
+
+
+class ParseCache:
+    """Extracted articles per page in CACHE_DIR/parsed, so a re-parse of an unchanged page
+    skips HTML parsing. `<page sha256>-<extractor version>.json.gz` holds [number, title, text]
+    triples; the least recently used entries are evicted beyond `limit` bytes."""
+    
+    def __init__(self, root: Path, limit: int = PARSE_CACHE_LIMIT):
+        self.root = root
+        self.limit = limit
+    
+    def path(self, page_hash: str) -> Path:
+        return self.root / f"{page_hash}-{extractor_version()}.json.gz"
+    
+    def get(self, page_hash: str) -> list[Article] | None:
+        path = self.path(page_hash)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as entry:
+                triples = json.load(entry)
+        except (OSError, ValueError, EOFError):
+            return None
+        os.utime(path)  # recently used
+        return [Article(number=number, title=title, text=text) for number, title, text in triples]
+    
+    def put(self, page_hash: str, articles: list[Article]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.path(page_hash)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        data = json.dumps([[art.number, art.title, art.text] for art in articles], ensure_ascii=False)
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=CACHE_COMPRESSLEVEL) as entry:
+            entry.write(data)
+        tmp.replace(path)
+        self.evict()
+    
+    def evict(self) -> int:
+        """Drop entries of other extractor versions, then the oldest until under the limit. Returns bytes freed."""
+        if not self.root.is_dir():
+            return 0
+        suffix = f"-{extractor_version()}.json.gz"
+        entries, freed = [], 0
+        for path in self.root.iterdir():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if path.name.endswith(suffix):
+                entries.append((stat.st_mtime, stat.st_size, path))
+            elif not path.name.endswith(".tmp") or time.time() - stat.st_mtime > 3600:
+                path.unlink(missing_ok=True)
+                freed += stat.st_size
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.limit:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            freed += size
+        return freed
+
+
+def parse_cache() -> ParseCache:
+    return ParseCache(CACHE_DIR / "parsed")
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# Parallel Mode
+# ═══════════════════════════════════════════════════════════════════════════════
+def parse_worker(
+    code_id: str,
+    force=False,
+    engine: str = DEFAULT_ENGINE,
+    incremental=True,
+    packed=False,
+    use_parse_cache=True,
+    normalize=NORMALIZE_STEPS,
+) -> ParseResult:
+    """Process-pool entry point: parse one code silently and report back to the parent."""
+    done, count = is_processed(code_id)
+    if done and not force:
+        return ParseResult(code_id, count=count, skipped=True)
+    
+    # A forked worker starts with a copy of the parent's metrics, and a reused one with its last task's
+    metrics.METRICS.reset()
+    start = time.time()
+    try:
+        # The parent owns the console; worker logs and progress bars are discarded
+        with redirect_stdout(io.StringIO()):
+            result = run_parse(
+                code_id, engine=engine, show_progress=False, incremental=incremental, packed=packed,
+                use_parse_cache=use_parse_cache, normalize=normalize,
+            )
+    except Exception as e:
+        result = ParseResult(code_id, error=f"{type(e).__name__}: {e}", elapsed=time.time() - start)
+    result.metrics = metrics.METRICS.snapshot()
+    return result
+
+
+def cached_size(code_id: str) -> int:
+    store = cache_store()
+    path = store.page_path(code_id) if store.page_path(code_id).exists() else store.legacy_path(code_id)
+    return store.entry(code_id).get("size") or (path.stat().st_size if path.exists() else 0)
+
+
+def parse_parallel(
+    code_ids: list[str],
+    force=False,
+    engine: str = DEFAULT_ENGINE,
+    workers: int = WORKERS,
+    incremental=True,
+    packed=False,
+    use_parse_cache=True,
+    normalize=NORMALIZE_STEPS,
+) -> int:
+    """Parse codes on a process pool, drawing one combined progress display."""
+    from concurrent.futures import ProcessPoolExecutor  # pulls in multiprocessing; only parse runs need it
+
+    if not code_ids:
+        return 0
+    
+    # Largest pages first, so the biggest code doesn't start last and leave a long tail
+    code_ids = sorted(code_ids, key=cached_size, reverse=True)
+    workers = max(1, min(workers, len(code_ids)))
+    log_info(f"Параллельный парсинг: {C.BOLD}{len(code_ids)}{C.RESET} кодексов, {C.BOLD}{workers}{C.RESET} процессов")
+    
+    start = time.time()
+    results: list[ParseResult] = []
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(parse_worker, code_id, force, engine, incremental, packed, use_parse_cache, normalize): code_id
+            for code_id in code_ids
+        }
+        progress_bar(0, len(code_ids), prefix="Кодексы")
+        
+        for future in as_completed(futures):
+            code_id = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:  # worker process died (BrokenProcessPool etc.)
+                result = ParseResult(code_id, error=f"{type(e).__name__}: {e}")
+            results.append(result)
+            if result.metrics:
+                metrics.METRICS.merge(result.metrics)
+            if result.count and not result.error and not result.skipped:
+                record_parsed(code_id)
+            
+            name = CODES[code_id][2]
+            sys.stdout.write("\r\033[K")
+            if result.error:
+                log_error(f"{name}: {result.error}")
+            elif result.skipped:
+                log_info(f"{name} уже обработан ({result.count} статей)")
+            else:
+                saved = f", −{result.saved_bytes / 1024:.0f} КБ шума" if result.saved_bytes else ""
+                log_success(
+                    f"{name}: {C.BOLD}{result.count}{C.RESET} статей за {result.elapsed:.1f}с{saved}{format_changes(result.changes)}"
+                )
+            progress_bar(len(results), len(code_ids), prefix="Кодексы")
+    
+    elapsed = time.time() - start
+    busy = sum(r.elapsed for r in results)
+    failed = sum(1 for r in results if r.error)
+    
+    print(f"  {C.DIM}{'─' * 50}{C.RESET}")
+    log_success(
+        f"Готово за {C.BOLD}{elapsed:.1f}с{C.RESET} "
+        f"(суммарно в процессах {busy:.1f}с, ускорение ×{busy / elapsed if elapsed else 0:.1f})"
+    )
+    saved = sum(r.saved_bytes for r in results)
+    if saved:
+        log_info(f"Нормализация: −{saved / 1024 / 1024:.1f} МБ служебного текста и пробелов")
+    if failed:
+        log_warn(f"С ошибками: {failed}")
+    return sum(r.count for r in results)
+
+
+def parse_many(
+    code_ids: list[str],
+    force=False,
+    engine: str = DEFAULT_ENGINE,
+    workers: int = WORKERS,
+    incremental=True,
+    packed=False,
+    use_parse_cache=True,
+    normalize=NORMALIZE_STEPS,
+) -> int:
+    """Parse several codes: one after another for a single worker, otherwise on a process pool."""
+    if workers > 1 and len(code_ids) > 1:
+        return parse_parallel(
+            code_ids, force=force, engine=engine, workers=workers, incremental=incremental, packed=packed,
+            use_parse_cache=use_parse_cache, normalize=normalize,
+        )
+    return sum(
+        parse_code(
+            code_id, force=force, engine=engine, incremental=incremental, packed=packed, use_parse_cache=use_parse_cache,
+            normalize=normalize,
+        )
+        for code_id in code_ids
+    )
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -281,11 +1479,15 @@ def show_status():
     total_articles = 0
     codes_list = list(CODES.items())
     
+    # One catalog read instead of a metadata.json per code
     for i, (code_id, (folder, abbrev, name, url)) in enumerate(codes_list, 1):
-        done, count = is_processed(code_id)
+        entry = catalog().status(folder)
         
-        if done:
+        if entry:
+            count = entry["articles"]
             status = f"{C.GREEN}✓ {count:>3} ст.{C.RESET}"
+            if entry.get("upload"):
+                status += f" {C.DIM}↑ {entry['upload']['ingested']}{C.RESET}"
             processed += 1
             total_articles += count
         else:
@@ -302,7 +1504,15 @@ def show_status():
     return codes_list
 
 
-def interactive_mode():
+def interactive_mode(
+    engine: str = DEFAULT_ENGINE,
+    workers: int = WORKERS,
+    connections: int = HOST_CONNECTIONS,
+    incremental=True,
+    packed=False,
+    use_parse_cache=True,
+    normalize=NORMALIZE_STEPS,
+):
     """Interactive menu for processing codes."""
     codes_list = show_status()
     
@@ -326,21 +1536,18 @@ def interactive_mode():
     elif choice.lower() == 'd':
         # Download all to cache
         print(f"\n  {C.BOLD}Скачивание всех страниц...{C.RESET}\n")
-        for code_id in CODES:
-            try:
-                download_page(code_id)
-            except RuntimeError as e:
-                log_error(f"{code_id}: {e}")
-        log_success("Все страницы в кэше!")
+        results = download_all(list(CODES), connections=connections)
+        if not any(r.error for r in results):
+            log_success("Все страницы в кэше!")
     
     elif choice == 'a':
         # Process all unprocessed
         print()
-        total = 0
-        for code_id in CODES:
-            done, _ = is_processed(code_id)
-            if not done:
-                total += parse_code(code_id)
+        pending = [code_id for code_id in CODES if not is_processed(code_id)[0]]
+        total = parse_many(
+            pending, engine=engine, workers=workers, incremental=incremental, packed=packed,
+            use_parse_cache=use_parse_cache, normalize=normalize,
+        )
         if total:
             print(f"  {C.GREEN}{C.BOLD}═══ ИТОГО: {total} статей ═══{C.RESET}\n")
         else:
@@ -349,14 +1556,18 @@ def interactive_mode():
     elif choice == 'A':
         # Force reprocess all
         print()
-        total = 0
-        for code_id in CODES:
-            total += parse_code(code_id, force=True)
+        total = parse_many(
+            list(CODES), force=True, engine=engine, workers=workers, incremental=incremental, packed=packed,
+            use_parse_cache=use_parse_cache, normalize=normalize,
+        )
         print(f"  {C.GREEN}{C.BOLD}═══ ИТОГО: {total} статей ═══{C.RESET}\n")
     
     elif choice.isdigit() and 1 <= int(choice) <= len(codes_list):
         code_id = codes_list[int(choice) - 1][0]
-        parse_code(code_id, force=True)
+        parse_code(
+            code_id, force=True, engine=engine, incremental=incremental, packed=packed, use_parse_cache=use_parse_cache,
+            normalize=normalize,
+        )
     
     else:
         log_error("Неверный выбор")
@@ -365,33 +1576,86 @@ def interactive_mode():
 # ═══════════════════════════════════════════════════════════════════════════════
 # Entry Point
 # ═══════════════════════════════════════════════════════════════════════════════
-if __name__ == "__main__":
+def arg_value(flag: str, default: str) -> str:
+    """Value that follows `flag` on the command line, e.g. --engine soup."""
+    if flag in sys.argv and sys.argv.index(flag) + 1 < len(sys.argv):
+        return sys.argv[sys.argv.index(flag) + 1]
+    return default
+
+
+def report_metrics():
+    """Write the run's metrics report (JSON lines + Prometheus text, see metrics.py) to .metrics/."""
+    paths = metrics.write_report("parse", SCRIPT_DIR / ".metrics")
+    if paths:
+        log_info(f"Метрики: {C.DIM}{paths[0]}{C.RESET} (+ .prom)")
+
+
+def main():
+    """Command line: interactive menu, one code, --all, --download, cache maintenance."""
+    atexit.register(report_metrics)
     banner()
+    engine = arg_value("--engine", DEFAULT_ENGINE)
+    workers = int(arg_value("--workers", str(WORKERS)))
+    connections = int(arg_value("--connections", str(HOST_CONNECTIONS)))
+    incremental = "--rewrite" not in sys.argv
+    packed = "--packed" in sys.argv
+    use_parse_cache = "--no-parse-cache" not in sys.argv
+    normalize = parse_steps(arg_value("--normalize", "all"))
     
     if len(sys.argv) < 2:
-        interactive_mode()
+        interactive_mode(
+            engine=engine, workers=workers, connections=connections, incremental=incremental, packed=packed,
+            use_parse_cache=use_parse_cache, normalize=normalize,
+        )
     elif sys.argv[1] in ("--all", "-a"):
         # Process all
-        total = 0
-        for code_id in CODES:
-            total += parse_code(code_id)
+        total = parse_many(
+            list(CODES), engine=engine, workers=workers, incremental=incremental, packed=packed,
+            use_parse_cache=use_parse_cache, normalize=normalize,
+        )
         print(f"  {C.GREEN}{C.BOLD}═══ ИТОГО: {total} статей ═══{C.RESET}\n")
     elif sys.argv[1] in ("--download", "-d"):
-        # Download all
-        for code_id in CODES:
-            try:
-                download_page(code_id)
-            except RuntimeError as e:
-                log_error(f"{code_id}: {e}")
+        # Download all (conditional GETs revalidate pages already in cache)
+        download_all(list(CODES), connections=connections)
+    elif sys.argv[1] == "--cache-gc":
+        # Evict stale cache entries, optionally everything not fetched in N days
+        days = sys.argv[2] if len(sys.argv) > 2 and not sys.argv[2].startswith("-") else None
+        removed, freed = cache_store().gc(CODES, max_age_days=float(days) if days else None)
+        freed += parse_cache().evict()
+        for name in removed:
+            log_info(f"Удалено: {C.DIM}{name}{C.RESET}")
+        log_success(f"Освобождено {freed / 1024 / 1024:.1f} МБ")
+    elif sys.argv[1] == "--cache-migrate":
+        # Compress legacy raw pages into the store
+        store = cache_store()
+        for code_id in store.migrate():
+            entry = store.entry(code_id)
+            log_success(f"{code_id}: {entry['size'] / 1024:.0f} КБ → {entry['stored_size'] / 1024:.0f} КБ")
     elif sys.argv[1] in CODES:
         # Process specific code
-        parse_code(sys.argv[1], force="--force" in sys.argv)
+        parse_code(
+            sys.argv[1], force="--force" in sys.argv, engine=engine, incremental=incremental, packed=packed,
+            use_parse_cache=use_parse_cache, normalize=normalize,
+        )
     else:
         print(f"  {C.BOLD}Использование:{C.RESET}")
         print(f"    python parser.py              # интерактивный режим")
         print(f"    python parser.py {C.CYAN}<code_id>{C.RESET}     # обработать один кодекс")
         print(f"    python parser.py {C.CYAN}--all{C.RESET}        # обработать все")
-        print(f"    python parser.py {C.CYAN}--download{C.RESET}   # скачать все в кэш\n")
+        print(f"    python parser.py {C.CYAN}--download{C.RESET}   # скачать/обновить все в кэше")
+        print(f"    python parser.py {C.CYAN}--download --connections 8{C.RESET} # соединений на хост")
+        print(f"    python parser.py {C.CYAN}--cache-migrate{C.RESET} # сжать старые страницы кэша")
+        print(f"    python parser.py {C.CYAN}--cache-gc [дней]{C.RESET} # удалить устаревшие записи кэша")
+        print(f"    python parser.py {C.CYAN}--all --workers 4{C.RESET} # число процессов (1 = последовательно)")
+        print(f"    python parser.py {C.CYAN}<code_id> --force --rewrite{C.RESET} # переписать все файлы, а не только изменённые")
+        print(f"    python parser.py {C.CYAN}--all --packed{C.RESET} # один articles.pack на кодекс вместо .txt (см. packed.py)")
+        print(f"    python parser.py {C.CYAN}--engine soup{C.RESET} # парсер: {'/'.join(ENGINES)} (по умолчанию {DEFAULT_ENGINE})")
+        print(f"    python parser.py {C.CYAN}--all --force --no-parse-cache{C.RESET} # разобрать HTML заново, не беря статьи из кэша разбора")
+        print(f"    python parser.py {C.CYAN}--all --normalize widgets,whitespace{C.RESET} # шаги нормализации: {','.join(NORMALIZE_STEPS)}, all или none\n")
         print(f"  {C.BOLD}Доступные коды:{C.RESET}")
         for cid, (_, _, name, _) in CODES.items():
             print(f"    {C.CYAN}{cid}{C.RESET} → {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,542 @@
+#!/usr/bin/env python3
+"""Local search over the parsed corpus - article lookup and a positional full-text index, for checking a re-parse before it is uploaded.
+
+`codes/search.index` is built from what save_articles wrote (the .txt files or
+articles.pack of every code) and holds one segment per code:
+
+    b"LEXSRCH1", u32 header length, header (JSON), segment, segment, ...
+
+    header:   {"version", "params", "segments": {law_type: {"sha256", "metadata_mtime",
+               "docs": [[number, file_path, stamp], ...], "offset", "terms_bytes", "term_count", "postings_bytes"}}}
+    segment:  sorted terms ("\\n"-joined utf-8), u32 postings offset per term (+1), postings
+    postings: per document: varint doc delta, varint position count, varint position deltas
+
+Terms are the lowercased words of the normalized article text (ё folded into е,
+no stemming; `word*` matches every term with that prefix). Only the header is
+read when the index is opened; a segment's terms are decoded the first time a
+query reaches that code, and postings are read straight out of the
+memory-mapped file. Updating compares every code's catalog hash and
+metadata.json mtime: unchanged segments are copied byte for byte, and within a
+changed code only articles with a new sha256 (or, without one in
+metadata.json, a new file size or mtime) are tokenized again.
+
+    python search.py build [--rebuild]
+    python search.py article civil_p1 26(1)
+    python search.py 'договор* "безвозмездного пользования"' [--code civil_p1] [--limit 10]
+"""
+
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from pathlib import Path
+
+try:
+    from catalog import Catalog
+    from normalize import normalizer
+    from packed import PackReader, is_packed, load_metadata, pack_path
+except ImportError:  # imported as law_parser.search
+    from law_parser.catalog import Catalog
+    from law_parser.normalize import normalizer
+    from law_parser.packed import PackReader, is_packed, load_metadata, pack_path
+
+INDEX_NAME = "search.index"
+INDEX_VERSION = 1
+MAGIC = b"LEXSRCH1"
+HEADER_LEN = struct.Struct("<I")
+
+# Page chrome would otherwise be the most frequent phrase of the corpus
+NORMALIZE_STEPS = ("unicode", "widgets")
+PARAMS = {"normalize": list(NORMALIZE_STEPS), "fold": "ё→е"}
+
+WORD_RE = re.compile(r"\w+")
+QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+SUPERSCRIPTS = str.maketrans("⁰¹²³⁴⁵⁶⁷⁸⁹", "0123456789")
+
+
+def fold(text: str) -> str:
+    return text.lower().replace("ё", "е")
+
+
+def tokenize(text: str) -> list[str]:
+    """Terms of a text, in order; a term's position is its index here."""
+    return WORD_RE.findall(fold(text))
+
+
+def put_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varints(data, start: int, end: int) -> list[int]:
+    values = []
+    value = shift = 0
+    for byte in data[start:end]:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    return values
+
+
+def encode_postings(postings: list[tuple[int, list[int]]]) -> bytearray:
+    out = bytearray()
+    previous = 0
+    for doc, positions in postings:
+        put_varint(out, doc - previous)
+        put_varint(out, len(positions))
+        last = 0
+        for position in positions:
+            put_varint(out, position - last)
+            last = position
+        previous = doc
+    return out
+
+
+def decode_postings(values: list[int]) -> dict[int, list[int]]:
+    postings = {}
+    doc = i = 0
+    while i < len(values):
+        doc += values[i]
+        count = values[i + 1]
+        deltas = values[i + 2:i + 2 + count]
+        positions, position = [], 0
+        for delta in deltas:
+            position += delta
+            positions.append(position)
+        postings[doc] = positions
+        i += 2 + count
+    return postings
+
+
+def article_number(value: str) -> str:
+    """An article number as the parser writes it: "26¹" → "26(1)"."""
+    head = value.rstrip("⁰¹²³⁴⁵⁶⁷⁸⁹")
+    return f"{head}({value[len(head):].translate(SUPERSCRIPTS)})" if head != value else value
+
+
+@dataclass
+class Hit:
+    law_type: str
+    article_number: str
+    file_path: str
+    score: float = 0.0
+    position: int | None = None  # first matched term
+
+
+class Segment:
+    """One code's part of the index; terms are decoded on first use."""
+
+    def __init__(self, law_type: str, entry: dict, data, base: int):
+        self.law_type = law_type
+        self.entry = entry
+        self.docs: list[list[str]] = entry["docs"]
+        self.data = data
+        self.start = base + entry["offset"]
+        self._terms: list[str] | None = None
+        self._offsets: array | None = None
+        self._numbers: dict[str, int] | None = None
+
+    @property
+    def terms(self) -> list[str]:
+        if self._terms is None:
+            terms_end = self.start + self.entry["terms_bytes"]
+            blob = bytes(self.data[self.start:terms_end]).decode("utf-8")
+            self._terms = blob.split("\n") if blob else []
+            self._offsets = array("I")
+            self._offsets.frombytes(self.data[terms_end:terms_end + 4 * (self.entry["term_count"] + 1)])
+        return self._terms
+
+    def postings_start(self) -> int:
+        return self.start + self.entry["terms_bytes"] + 4 * (self.entry["term_count"] + 1)
+
+    def postings(self, term_index: int) -> dict[int, list[int]]:
+        self.terms
+        start = self.postings_start()
+        return decode_postings(
+            read_varints(self.data, start + self._offsets[term_index], start + self._offsets[term_index + 1])
+        )
+
+    def matching(self, pattern: str) -> range:
+        """Indexes of the terms equal to `pattern`, or starting with it if it ends with *."""
+        terms = self.terms
+        if pattern.endswith("*"):
+            prefix = pattern[:-1]
+            first = bisect_left(terms, prefix)
+            last = first
+            while last < len(terms) and terms[last].startswith(prefix):
+                last += 1
+            return range(first, last)
+        index = bisect_left(terms, pattern)
+        return range(index, index + 1) if index < len(terms) and terms[index] == pattern else range(0)
+
+    def positions(self, pattern: str) -> dict[int, set[int]]:
+        """doc → positions of every term the pattern matches."""
+        found: dict[int, set[int]] = {}
+        for term_index in self.matching(pattern):
+            for doc, positions in self.postings(term_index).items():
+                found.setdefault(doc, set()).update(positions)
+        return found
+
+    def doc(self, number: str) -> int | None:
+        if self._numbers is None:
+            self._numbers = {doc[0]: i for i, doc in enumerate(self.docs)}
+        return self._numbers.get(number)
+
+    def raw(self) -> bytes:
+        end = self.postings_start() + self.entry["postings_bytes"]
+        return bytes(self.data[self.start:end])
+
+
+class SearchIndex:
+    def __init__(self, codes_dir: Path):
+        self.codes_dir = Path(codes_dir)
+        self.path = self.codes_dir / INDEX_NAME
+        self.header: dict = {}
+        self.segments: dict[str, Segment] = {}
+        self._file = None
+        self._data = None
+
+    def open(self) -> "SearchIndex":
+        """Map the index file and read its header; segments stay on disk."""
+        self.close()
+        if not self.path.exists():
+            return self
+        self._file = open(self.path, "rb")
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._data[:len(MAGIC)] != MAGIC:
+            self.close()
+            return self
+        (length,) = HEADER_LEN.unpack_from(self._data, len(MAGIC))
+        base = len(MAGIC) + HEADER_LEN.size + length
+        self.header = json.loads(self._data[len(MAGIC) + HEADER_LEN.size:base])
+        if self.header.get("version") != INDEX_VERSION or self.header.get("params") != PARAMS:
+            self.header = {}
+            return self
+        self.segments = {
+            law_type: Segment(law_type, entry, self._data, base) for law_type, entry in self.header["segments"].items()
+        }
+        return self
+
+    def close(self):
+        self.segments = {}
+        self.header = {}
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def law_types(self) -> list[str]:
+        return sorted(d.name for d in self.codes_dir.iterdir() if (d / "metadata.json").exists())
+
+    def stale(self) -> list[str]:
+        """
+        Codes whose catalog hash or metadata.json mtime differs from their
+        segment, or that have none; plus vanished ones.
+        """
+        catalog = Catalog(self.codes_dir)
+        law_types = self.law_types()
+        changed = [
+            law_type for law_type in law_types
+            if law_type not in self.segments
+            or self.segments[law_type].entry["sha256"] != (catalog.status(law_type) or {}).get("sha256")
+            or self.segments[law_type].entry.get("metadata_mtime") != metadata_mtime(self.codes_dir / law_type)
+        ]
+        return changed + sorted(set(self.segments) - set(law_types))
+
+    def update(self, rebuild: bool = False) -> dict[str, int]:
+        """
+        Bring the index in line with codes/, rewriting the file only if
+        something changed. Returns {"codes", "articles", "tokenized"}: codes
+        re-indexed, their articles, and how many of those were read and
+        tokenized again.
+        """
+        if not self.segments and self.path.exists():
+            self.open()
+        stale = set(self.law_types()) if rebuild else set(self.stale())
+        stats = {"codes": 0, "articles": 0, "tokenized": 0}
+        if not stale:
+            return stats
+
+        catalog = Catalog(self.codes_dir)
+        segments: dict[str, tuple[dict, bytes]] = {}
+        for law_type in self.law_types():
+            old = self.segments.get(law_type)
+            if law_type not in stale and old is not None:
+                segments[law_type] = (old.entry, old.raw())
+                continue
+            entry, data, tokenized = self.build_segment(law_type, None if rebuild else old)
+            entry["sha256"] = (catalog.status(law_type) or {}).get("sha256")
+            entry["metadata_mtime"] = metadata_mtime(self.codes_dir / law_type)
+            segments[law_type] = (entry, data)
+            stats["codes"] += 1
+            stats["articles"] += len(entry["docs"])
+            stats["tokenized"] += tokenized
+
+        self.write(segments)
+        self.open()
+        return stats
+
+    def build_segment(self, law_type: str, old: Segment | None) -> tuple[dict, bytes, int]:
+        """
+        Index one code. Articles whose number and stamp (see article_stamp)
+        match a document of the old segment take their postings from it
+        instead of being read.
+        """
+        directory = self.codes_dir / law_type
+        metadata = load_metadata(directory)
+        pack = PackReader(pack_path(directory)) if is_packed(directory) else None
+        try:
+            docs = [
+                [str(m["article_number"]), m["file_path"], article_stamp(directory, m, pack)] for m in metadata
+            ]
+
+            doc_terms: list[dict[str, list[int]] | None] = [None] * len(docs)
+            if old is not None:
+                reuse = {}
+                for new_doc, (number, _, stamp) in enumerate(docs):
+                    old_doc = old.doc(number)
+                    if stamp and old_doc is not None and old.docs[old_doc][2] == stamp:
+                        reuse[old_doc] = new_doc
+                        doc_terms[new_doc] = {}
+                if reuse:
+                    for term_index, term in enumerate(old.terms):
+                        for old_doc, positions in old.postings(term_index).items():
+                            if old_doc in reuse:
+                                doc_terms[reuse[old_doc]][term] = positions
+
+            tokenized = 0
+            normalize = normalizer(NORMALIZE_STEPS)
+            for doc, (number, file_path, _) in enumerate(docs):
+                if doc_terms[doc] is not None:
+                    continue
+                text = read_article(directory, number, file_path, pack)
+                terms: dict[str, list[int]] = {}
+                if text is not None:
+                    for position, term in enumerate(tokenize(normalize(text.partition("\n")[2]))):
+                        terms.setdefault(term, []).append(position)
+                doc_terms[doc] = terms
+                tokenized += 1
+        finally:
+            if pack is not None:
+                pack.close()
+
+        inverted: dict[str, list[tuple[int, list[int]]]] = {}
+        for doc, terms in enumerate(doc_terms):
+            for term, positions in terms.items():
+                inverted.setdefault(term, []).append((doc, positions))
+
+        terms = sorted(inverted)
+        offsets = array("I", [0])
+        postings = bytearray()
+        for term in terms:
+            postings += encode_postings(inverted[term])
+            offsets.append(len(postings))
+
+        terms_blob = "\n".join(terms).encode("utf-8")
+        entry = {
+            "docs": docs,
+            "terms_bytes": len(terms_blob),
+            "term_count": len(terms),
+            "postings_bytes": len(postings),
+        }
+        return entry, terms_blob + offsets.tobytes() + bytes(postings), tokenized
+
+    def write(self, segments: dict[str, tuple[dict, bytes]]):
+        offset = 0
+        header = {"version": INDEX_VERSION, "params": PARAMS, "segments": {}}
+        for law_type, (entry, data) in segments.items():
+            header["segments"][law_type] = {**entry, "offset": offset}
+            offset += len(data)
+
+        header_bytes = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as index_file:
+            index_file.write(MAGIC + HEADER_LEN.pack(len(header_bytes)) + header_bytes)
+            for _, data in segments.values():
+                index_file.write(data)
+        self.close()
+        os.replace(tmp, self.path)
+
+    def article(self, law_type: str, number: str) -> Hit | None:
+        segment = self.segments.get(law_type)
+        if segment is None:
+            return None
+        doc = segment.doc(article_number(number))
+        if doc is None:
+            return None
+        return Hit(law_type, segment.docs[doc][0], segment.docs[doc][1])
+
+    def search(self, query: str, law_types: list[str] | None = None, limit: int = 20) -> list[Hit]:
+        """
+        Articles that contain every word and "quoted phrase" of the query,
+        best first: matches weighted by how rare each word or phrase is.
+        """
+        clauses = [
+            tokenize(phrase) if phrase else [fold(word).strip(".,;:!?()«»")] for phrase, word in QUERY_RE.findall(query)
+        ]
+        clauses = [clause for clause in clauses if clause and all(clause)]
+        if not clauses:
+            return []
+
+        total = sum(len(segment.docs) for segment in self.segments.values())
+        hits = []
+        for law_type, segment in sorted(self.segments.items()):
+            if law_types and law_type not in law_types:
+                continue
+
+            matches: dict[int, list[tuple[int, list[int]]]] = {}  # doc → (clause index, start positions)
+            for clause_index, clause in enumerate(clauses):
+                found = phrase_positions(segment, clause, set(matches) if clause_index else None)
+                matches = {doc: [*matches.get(doc, []), (clause_index, starts)] for doc, starts in found.items()}
+                if not matches:
+                    break
+            for doc, matched in matches.items():
+                hits.append((segment, doc, matched))
+
+        document_frequency = [0] * len(clauses)
+        for _, _, matched in hits:
+            for clause_index, _ in matched:
+                document_frequency[clause_index] += 1
+
+        results = []
+        for segment, doc, matched in hits:
+            score = sum(len(positions) * math.log(1 + total / document_frequency[i]) for i, positions in matched)
+            number, file_path, _ = segment.docs[doc]
+            results.append(Hit(segment.law_type, number, file_path, round(score, 3), min(matched[0][1])))
+        results.sort(key=lambda hit: -hit.score)
+        return results[:limit]
+
+    def text(self, hit: Hit) -> str | None:
+        """Article text without its header line, normalized as indexed."""
+        directory = self.codes_dir / hit.law_type
+        pack = PackReader(pack_path(directory)) if is_packed(directory) else None
+        try:
+            text = read_article(directory, hit.article_number, hit.file_path, pack)
+        finally:
+            if pack is not None:
+                pack.close()
+        return None if text is None else normalizer(NORMALIZE_STEPS)(text.partition("\n")[2])
+
+
+def phrase_positions(segment: Segment, clause: list[str], docs: set[int] | None) -> dict[int, list[int]]:
+    """doc → start positions of `clause` (consecutive terms) in that doc, for docs in `docs` if given."""
+    first = segment.positions(clause[0])
+    rest = [segment.positions(pattern) for pattern in clause[1:]]
+    found = {}
+    for doc, starts in first.items():
+        if docs is not None and doc not in docs:
+            continue
+        if not all(doc in positions for positions in rest):
+            continue
+        matched = sorted(p for p in starts if all(p + i + 1 in positions[doc] for i, positions in enumerate(rest)))
+        if matched:
+            found[doc] = matched
+    return found
+
+
+def metadata_mtime(directory: Path) -> int:
+    return (directory / "metadata.json").stat().st_mtime_ns
+
+
+def article_stamp(directory: Path, metadata: dict, pack: PackReader | None) -> str | None:
+    """
+    What identifies an article's content: its sha256 from metadata.json, from
+    the pack index, or - for folders written before metadata carried hashes -
+    the size and mtime of its file.
+    """
+    if metadata.get("sha256"):
+        return metadata["sha256"]
+    number = str(metadata["article_number"])
+    if pack is not None:
+        return pack.sha256(number) if number in pack else None
+    try:
+        stat = (directory / metadata["file_path"]).stat()
+    except OSError:
+        return None
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def read_article(directory: Path, number: str, file_path: str, pack: PackReader | None) -> str | None:
+    if pack is not None:
+        return pack.text(number) if number in pack else None
+    try:
+        return (directory / file_path).read_text(encoding="utf-8")
+    except OSError:
+        return None
+
+
+def snippet(text: str, position: int | None, width: int = 80) -> str:
+    """Text around the term at `position`, the term in [brackets]."""
+    if position is None:
+        return text[:width]
+    for index, match in enumerate(WORD_RE.finditer(text)):
+        if index == position:
+            start, end = match.span()
+            before = text[max(0, start - width // 2):start]
+            after = text[end:end + width // 2]
+            return f"{'…' if start > width // 2 else ''}{before}[{match.group()}]{after}{'…' if end + width // 2 < len(text) else ''}"
+    return text[:width]
+
+
+def arg_value(flag: str, default: str) -> str:
+    if flag in sys.argv and sys.argv.index(flag) + 1 < len(sys.argv):
+        return sys.argv[sys.argv.index(flag) + 1]
+    return default
+
+
+if __name__ == "__main__":
+    codes_dir = Path(__file__).parent.parent / "codes"
+    args = [a for i, a in enumerate(sys.argv[1:], 1) if not a.startswith("--") and sys.argv[i - 1] not in ("--code", "--limit")]
+
+    started = time.perf_counter()
+    index = SearchIndex(codes_dir).open()
+    if args[:1] == ["build"]:
+        stats = index.update(rebuild="--rebuild" in sys.argv)
+        size = index.path.stat().st_size if index.path.exists() else 0
+        print(
+            f"  re-indexed {stats['codes']} codes ({stats['articles']} articles, {stats['tokenized']} tokenized) "
+            f"in {time.perf_counter() - started:.2f}s, {size / 1024:.0f} KB"
+        )
+        sys.exit(0)
+
+    stats = index.update()
+    if stats["codes"]:
+        print(f"  index updated: {stats['codes']} codes, {stats['tokenized']} articles tokenized")
+
+    if args[:1] == ["article"] and len(args) == 3:
+        hit = index.article(args[1], args[2])
+        if hit is None:
+            print(f"  {args[1]}: no article {args[2]}")
+            sys.exit(1)
+        print(f"  {hit.law_type}/{hit.file_path}")
+        print(index.text(hit))
+    elif args:
+        law_types = arg_value("--code", "").split(",") if "--code" in sys.argv else None
+        hits = index.search(" ".join(args), law_types, int(arg_value("--limit", "10")))
+        elapsed = time.perf_counter() - started
+        for hit in hits:
+            print(f"  {hit.law_type:<22} {hit.article_number:<8} {hit.score:>7.2f}  {snippet(index.text(hit) or '', hit.position)}")
+        print(f"  {len(hits)} articles in {elapsed * 1000:.1f} ms")
+    else:
+        print(__doc__)
+    index.close()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Local lex.uz stand-in - serves cached pages with ETag/Last-Modified, 304s and byte ranges.
+
+Pages come from a directory of raw `<id>` files or compressed `<id>.html.gz`
+cache store entries (the parser's .cache by default).
+
+Run it and point the parser at it:
+
+    python standin.py --port 8765
+    LEXUZ_BASE_URL=http://127.0.0.1:8765 python parser.py --download
+"""
+
+import gzip
+import hashlib
+import random
+import re
+import sys
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+DOC_PATH_RE = re.compile(r"^(?:/[a-z]{2})?/docs/(\d+)/?$")
+RANGE_RE = re.compile(r"^bytes=(\d+)-$")
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, like the real site
+    server: "StandInServer"
+
+    def do_GET(self):
+        self.server.count("requests")
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server.fail_rate and random.random() < self.server.fail_rate:
+            self.server.count("503")
+            return self._empty(503, {"Retry-After": "0"})
+
+        match = DOC_PATH_RE.match(self.path.split("?")[0])
+        page = self.server.page(match.group(1)) if match else None
+        if page is None:
+            self.server.count("404")
+            return self._empty(404)
+
+        body = gzip.decompress(page.read_bytes()) if page.suffix == ".gz" else page.read_bytes()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        last_modified = formatdate(page.stat().st_mtime, usegmt=True)
+        validators = {"ETag": etag, "Last-Modified": last_modified}
+
+        if self._not_modified(etag, page.stat().st_mtime):
+            self.server.count("304")
+            return self._empty(304, validators)
+
+        start = 0
+        range_match = RANGE_RE.match(self.headers.get("Range", ""))
+        if range_match and self.headers.get("If-Range") in (None, etag, last_modified):
+            start = int(range_match.group(1))
+            if start >= len(body):
+                self.server.count("416")
+                return self._empty(416, {"Content-Range": f"bytes */{len(body)}"})
+
+        status = 206 if start else 200
+        self.server.count(str(status))
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body) - start))
+        self.send_header("Accept-Ranges", "bytes")
+        if start:
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+        for key, value in validators.items():
+            self.send_header(key, value)
+        self.end_headers()
+
+        if self.server.drop_rate and random.random() < self.server.drop_rate:
+            # Cut the body in half and hang up, so clients have to resume with Range
+            self.server.count("dropped")
+            self.wfile.write(body[start:start + (len(body) - start) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(body[start:])
+
+    def _not_modified(self, etag: str, mtime: float) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(",")]
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _empty(self, status: int, headers: dict | None = None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, directory: Path, latency=0.0, fail_rate=0.0, drop_rate=0.0, verbose=False):
+        super().__init__(address, StandInHandler)
+        self.directory = Path(directory)
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.drop_rate = drop_rate
+        self.verbose = verbose
+        self.stats: dict[str, int] = {}
+        self.stats_lock = threading.Lock()
+
+    def page(self, code_id: str) -> Path | None:
+        """Raw `<id>` page or a compressed `<id>.html.gz` cache store entry."""
+        for path in (self.directory / code_id, self.directory / f"{code_id}.html.gz"):
+            if path.is_file():
+                return path
+        return None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key: str):
+        with self.stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+
+def serve(directory: Path = SCRIPT_DIR / ".cache", port: int = 0, **options) -> StandInServer:
+    """Start a stand-in on a background thread (port 0 picks a free port); call .shutdown() to stop."""
+    server = StandInServer(("127.0.0.1", port), directory, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def arg_value(flag: str, default: str) -> str:
+    if flag in sys.argv and sys.argv.index(flag) + 1 < len(sys.argv):
+        return sys.argv[sys.argv.index(flag) + 1]
+    return default
+
+
+if __name__ == "__main__":
+    server = StandInServer(
+        ("127.0.0.1", int(arg_value("--port", "8765"))),
+        Path(arg_value("--dir", str(SCRIPT_DIR / ".cache"))),
+        latency=float(arg_value("--latency", "0")),
+        fail_rate=float(arg_value("--fail-rate", "0")),
+        drop_rate=float(arg_value("--drop-rate", "0")),
+        verbose=True,
+    )
+    print(f"  lex.uz stand-in: {server.base_url} ← {server.directory}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n  {server.stats}")
@@ -1,7 +1,67 @@
+import atexit
+import sys
+
 from chain import LawCodeUploaderChain
+from chunking import CHUNK_OVERLAP
+from journal import print_journal
+from law_parser.metrics import write_report
+from uploader import UPLOAD_BATCH_BYTES
+
+
+def arg_value(flag: str, default: str | None) -> str | None:
+    if flag in sys.argv and sys.argv.index(flag) + 1 < len(sys.argv):
+        return sys.argv[sys.argv.index(flag) + 1]
+    return default
+
+
+# python main.py --workers 8 --upload-rate 10 --ingest-rate 5 --batch-size 25 --batch-window 5 [--dry-run]
+#   (--batch-size > 1 sends one ingest request per batch, "metadata" as a list aligned with "file_ids";
+#    the stand-in takes that shape, and if the endpoint refuses it the run falls back to one file per request)
+# python main.py --parallel-codes 4 --workers 16   (16 requests in flight across 4 codes at a time)
+# python main.py --base-url http://127.0.0.1:8766/api   (e.g. the local AgentHub stand-in)
+# python main.py --chunk-tokens 512 --chunk-overlap 64   (long articles go up as overlapping chunks)
+# python main.py --dedupe 0.9   (near-duplicate articles go up once, see dedupe.py)
+# python main.py --upload-batch 50 --upload-batch-kb 4096   (up to 50 articles / 4 MB per upload request)
+def build_chain() -> LawCodeUploaderChain:
+    rate_limits = {
+        endpoint: float(arg_value(f"--{endpoint}-rate", "0"))
+        for endpoint in ("upload", "ingest")
+        if float(arg_value(f"--{endpoint}-rate", "0")) > 0
+    }
+
+    return LawCodeUploaderChain(
+        "codes",
+        workers=int(arg_value("--workers", "1")),
+        rate_limits=rate_limits,
+        batch_size=int(arg_value("--batch-size", "1")),
+        batch_window=float(arg_value("--batch-window", "5")),
+        dry_run="--dry-run" in sys.argv,
+        parallel_codes=int(arg_value("--parallel-codes", "1")),
+        base_url=arg_value("--base-url", None),
+        chunk_tokens=int(arg_value("--chunk-tokens", "0")) or None,
+        chunk_overlap=int(arg_value("--chunk-overlap", str(CHUNK_OVERLAP))),
+        dedupe=float(arg_value("--dedupe", "0")) or None,
+        upload_batch=int(arg_value("--upload-batch", "1")),
+        upload_batch_bytes=int(arg_value("--upload-batch-kb", str(UPLOAD_BATCH_BYTES // 1024))) * 1024,
+    )
+
+
+def report_metrics():
+    # Per-stage timings and counters of this run: .metrics/upload-<time>.jsonl and .prom
+    paths = write_report("upload")
+    if paths:
+        print(f"Metrics: {paths[0]} (+ .prom)")
+
 
+def main():
+    atexit.register(report_metrics)
+    if "--journal" in sys.argv:
+        # python main.py --journal [law_code] [--state failed]
+        law_code = arg_value("--journal", "")
+        print_journal(".saved", law_code if law_code and not law_code.startswith("--") else None, arg_value("--state", None))
+    else:
+        build_chain().explore()
 
-chained_uploader = LawCodeUploaderChain("codes")
 
 if __name__ == "__main__":
-    chained_uploader.explore()
\ No newline at end of file
+    main()
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+
+# Fallback per-request estimates for a dry run when the manifest has no history yet
+ESTIMATED_UPLOAD_SECONDS = 0.5
+ESTIMATED_INGEST_SECONDS = 2.0
+
+
+def file_hash(path: str) -> str:
+    """
+    sha256 of a file's bytes (the same digest the parser stores in metadata.json).
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def content_hash(data: bytes) -> str:
+    """
+    sha256 of an in-memory article, the same digest file_hash gives for its file.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def record_hash(sha256: str, metadata) -> str:
+    """
+    Digest an article is recorded under: its content's sha256, combined with
+    its near-duplicate list if it is a canonical copy (see dedupe.py), so a
+    canonical copy whose list changed counts as changed and is sent again.
+    """
+    duplicates = getattr(metadata, "duplicates", None)
+    if not duplicates:
+        return sha256
+    listed = json.dumps(duplicates, ensure_ascii=False, sort_keys=True)
+    return content_hash(f"{sha256}\n{listed}".encode("utf-8"))
+
+
+class UploadManifest:
+    """
+    What the remote side already has, keyed by (law_type, article_number) and
+    the sha256 of the uploaded file: `.uploads.jsonl` next to the checkpoints.
+
+    Unlike the per-run checkpoint journal it survives wiping `.saved/` and
+    re-parsing a code, so articles whose bytes did not change are never sent
+    twice. Append-only like the journal; the last line for a key wins, and
+    the file is compacted on open once superseded lines pile up.
+    """
+    def __init__(self, path: str = ".uploads.jsonl"):
+        self.path = os.path.abspath(os.path.normpath(path))
+        self.lock = threading.Lock()
+        self.entries: dict[str, dict] = {}
+
+        if os.path.exists(self.path):
+            self.replay()
+
+    @staticmethod
+    def key(law_type: str, article_number: str) -> str:
+        return f"{law_type}/{article_number}"
+
+    def replay(self):
+        lines = 0
+        with open(self.path, "r", encoding="utf-8") as manifest_file:
+            for line in manifest_file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self.entries[entry["key"]] = entry
+                lines += 1
+
+        if lines > 2 * len(self.entries) + 100:
+            self.compact()
+
+    def compact(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as manifest_file:
+            for entry in self.entries.values():
+                manifest_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def get(self, law_type: str, article_number: str) -> dict | None:
+        return self.entries.get(self.key(law_type, article_number))
+
+    def record(self, law_type: str, article_number: str, sha256: str, status: str, file_id: int, **fields):
+        """
+        Remember that `sha256` of an article is on the remote side as `file_id`
+        (status "uploaded" or "ingested").
+        """
+        key = self.key(law_type, article_number)
+        entry = {"key": key, "sha256": sha256, "file_id": file_id, "status": status, "at": time.time(), **fields}
+
+        with self.lock:
+            previous = self.entries.get(key)
+            if previous and previous["sha256"] != sha256:
+                entry["previous_file_id"] = previous["file_id"]
+            elif previous and "previous_file_id" in previous:
+                entry["previous_file_id"] = previous["previous_file_id"]
+
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as manifest_file:
+                manifest_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self.entries[key] = entry
+
+    def average_seconds(self, name: str, fallback: float) -> float:
+        """
+        Mean recorded `upload_seconds` / `ingest_seconds`, for estimates.
+        """
+        values = [entry[name] for entry in self.entries.values() if entry.get(name)]
+        return sum(values) / len(values) if values else fallback
+
+
+@dataclass
+class UploadPlan:
+    """
+    What a run would do: new and changed articles are uploaded and ingested,
+    unchanged ones are skipped without any request.
+    """
+    law_code: str
+    new: list = field(default_factory=list)
+    changed: list = field(default_factory=list)
+    unchanged: list = field(default_factory=list)
+    missing: list = field(default_factory=list)
+    bytes_to_upload: int = 0
+
+    @property
+    def to_upload(self) -> int:
+        return len(self.new) + len(self.changed)
+
+    def estimate_seconds(self, manifest: UploadManifest, workers: int = 1, batch_size: int = 1) -> float:
+        upload = manifest.average_seconds("upload_seconds", ESTIMATED_UPLOAD_SECONDS)
+        ingest = manifest.average_seconds("ingest_seconds", ESTIMATED_INGEST_SECONDS)
+        ingest_calls = -(-self.to_upload // batch_size) if batch_size > 1 else self.to_upload
+        return (self.to_upload * upload + ingest_calls * ingest) / max(1, workers)
@@ -0,0 +1,227 @@
+import atexit
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from chunking import CHUNK_OVERLAP, chunk_article
+from interfaces.metadata import Metadata
+from law_parser import parser
+from law_parser.metrics import write_report
+from law_parser.normalize import STEPS as NORMALIZE_STEPS, parse_steps
+from law_parser.packed import PackWriter, is_packed, pack_path
+from manifest import UploadManifest
+from uploader import ArticleResult, LawCodeUploader, console
+
+
+class ArticleSink:
+    """
+    Optional side effect of a streamed run: persist articles as they go by, in
+    the folder's current layout (loose .txt files or one articles.pack), then
+    metadata.json and changes.json like the parser's incremental save.
+    """
+    def __init__(self, law_code: str):
+        self.law_code = law_code
+        self.output_dir = parser.OUTPUT_DIR / law_code
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        self.previous = {m["file_path"]: m for m in parser.load_metadata(self.output_dir)}
+        self.packed = is_packed(self.output_dir)
+        self.writer = PackWriter(pack_path(self.output_dir)) if self.packed else None
+        self.metadata: list[dict] = []
+        self.changes = {"law_type": law_code, "added": [], "changed": [], "removed": [], "unchanged": 0}
+
+    def add(self, metadata: Metadata, data: bytes, digest: str):
+        previous = self.previous.get(metadata.file_path)
+        if previous is None:
+            self.changes["added"].append(metadata.article_number)
+        elif previous.get("sha256") != digest:
+            self.changes["changed"].append(metadata.article_number)
+        else:
+            self.changes["unchanged"] += 1
+
+        if self.writer:
+            self.writer.add(metadata.article_number, data)
+        else:
+            path = self.output_dir / metadata.file_path
+            if previous is None or previous.get("sha256") != digest or not path.exists():
+                path.write_bytes(data)
+
+        self.metadata.append({**metadata.model_dump(), "sha256": digest})
+
+    def close(self) -> dict:
+        if self.writer:
+            self.writer.close()
+
+        current = {m["file_path"] for m in self.metadata}
+        for file_path, entry in self.previous.items():
+            if file_path not in current:
+                self.changes["removed"].append(entry["article_number"])
+                (self.output_dir / file_path).unlink(missing_ok=True)
+
+        (self.output_dir / "metadata.json").write_text(
+            json.dumps(self.metadata, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        self.changes["parser_version"] = parser.PARSER_VERSION
+        (self.output_dir / "changes.json").write_text(
+            json.dumps(self.changes, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        return self.changes
+
+    def abort(self):
+        if self.writer:
+            self.writer.abort()
+
+
+def stream_code(
+    code_id: str,
+    workers: int = 8,
+    in_flight: int | None = None,
+    save: bool = False,
+    checkpoints: str = ".saved",
+    manifest: UploadManifest | None = None,
+    normalize: tuple[str, ...] = NORMALIZE_STEPS,
+    chunk_tokens: int | None = None,
+    chunk_overlap: int = CHUNK_OVERLAP,
+    **uploader_options,
+) -> dict[str, int]:
+    """
+    Parse a code from the page cache and upload every new or changed article
+    straight from memory: no N.txt round trip, no metadata.json re-read.
+
+    The parser runs on this thread and hands articles to `workers` upload
+    threads; at most `in_flight` articles (default 2 × workers) are held in
+    memory, the parser blocks when they are all taken. Unchanged articles
+    (per the upload manifest) are skipped without a request. With `save` the
+    articles are also written to codes/ as a side effect. Articles go
+    through the same `normalize` steps as in the parser before anything else;
+    with `chunk_tokens` the long ones are uploaded as chunks (see chunking.py)
+    while codes/ still gets whole articles.
+    """
+    folder, abbrev, name, _ = parser.CODES[code_id]
+    store = parser.ensure_cached(code_id)
+
+    uploader = LawCodeUploader(
+        folder, checkpoints=checkpoints, workers=workers, metadata=[], manifest=manifest, **uploader_options
+    )
+    sink = ArticleSink(folder) if save else None
+    slots = threading.BoundedSemaphore(in_flight or 2 * workers)
+    counts = {"parsed": 0, "unchanged": 0, "ingested": 0, "failed": 0, "cancelled": 0}
+    normalizer = parser.normalizer(tuple(normalize)) if normalize else None
+    saved = 0
+    lock = threading.Lock()
+
+    def work(index: int, metadata: Metadata) -> ArticleResult:
+        try:
+            result = uploader.process(index, metadata)
+        finally:
+            uploader.payloads.pop(metadata.file_path, None)
+            slots.release()
+
+        with lock:
+            counts[result.status] = counts.get(result.status, 0) + 1
+        if result.status == "failed":
+            console.print(f"[red]✗ {index} {metadata.file_path}: {result.error}[/red]")
+        return result
+
+    console.print(f"Streaming {name} ({folder}) to AgentHub with {workers} workers...")
+    started = time.monotonic()
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        articles = parser.iter_articles(store.iter_chunks(code_id), total=store.entry(code_id).get("chars"))
+        for art in articles:
+            if normalizer:
+                raw = len(parser.article_content(art, abbrev).encode("utf-8"))
+                art = parser.normalize_article(art, normalizer)
+            data = parser.article_content(art, abbrev).encode("utf-8")
+            if normalizer:
+                saved += raw - len(data)
+            digest = parser.content_hash(data)
+            metadata = Metadata(law_type=folder, article_number=art.number, file_path=f"{art.number}.txt")
+            counts["parsed"] += 1
+            if sink:
+                sink.add(metadata, data, digest)
+
+            # A long article goes up as its chunks, each one a document of its own
+            pieces = chunk_article(metadata, data, chunk_tokens, chunk_overlap) if chunk_tokens else [(metadata, data)]
+            for metadata, data in pieces:
+                if len(pieces) > 1:
+                    digest = parser.content_hash(data)
+                index = len(uploader.metadata)
+                uploader.metadata.append(metadata)
+                uploader.hashes[metadata.file_path] = digest
+
+                entry = uploader.manifest.get(metadata.law_type, metadata.article_number)
+                if entry and entry["sha256"] == digest and entry["status"] == "ingested":
+                    counts["unchanged"] += 1
+                    continue
+
+                slots.acquire()  # backpressure: wait for a free in-flight slot
+                uploader.payloads[metadata.file_path] = data
+                pool.submit(work, index, metadata)
+    except BaseException:
+        uploader.stop.set()
+        if sink:
+            sink.abort()
+        raise
+    finally:
+        pool.shutdown(wait=True)
+
+    if sink:
+        changes = sink.close()
+        parser.record_parsed(code_id)
+        console.print(
+            f"Saved to codes/{folder}: +{len(changes['added'])} ~{len(changes['changed'])} -{len(changes['removed'])}"
+        )
+
+    uploader.record_catalog()
+    uploader.journal.compact()
+    if saved:
+        console.print(f"Normalized: {saved / 1024:.0f} KB of page chrome and whitespace dropped")
+
+    elapsed = time.monotonic() - started
+    sent = counts["ingested"] + counts["failed"]
+    console.print(
+        f"[bold]{folder}:[/bold] {counts['parsed']} parsed, {counts['unchanged']} unchanged, "
+        f"{counts['ingested']} ingested, {counts['failed']} failed in {elapsed:.1f}s — "
+        f"{sent / elapsed if elapsed else 0:.2f} articles/sec uploaded"
+    )
+    return counts
+
+
+def stream_codes(code_ids: list[str], **options) -> dict[str, dict[str, int]]:
+    """
+    Stream several codes one after another, sharing one upload manifest.
+    """
+    options.setdefault("manifest", UploadManifest())
+    return {code_id: stream_code(code_id, **options) for code_id in code_ids}
+
+
+def arg_value(flag: str, default: str) -> str:
+    if flag in sys.argv and sys.argv.index(flag) + 1 < len(sys.argv):
+        return sys.argv[sys.argv.index(flag) + 1]
+    return default
+
+
+if __name__ == "__main__":
+    atexit.register(lambda: write_report("stream"))
+    # python pipeline.py <code_id>... | --all [--workers 8] [--in-flight 16] [--save] [--base-url URL] [--normalize all|none|widgets,...]
+    #                                      [--chunk-tokens 512] [--chunk-overlap 64]
+    code_ids = list(parser.CODES) if "--all" in sys.argv else [a for a in sys.argv[1:] if a in parser.CODES]
+    if not code_ids:
+        print("python pipeline.py <code_id>... | --all [--workers 8] [--in-flight 16] [--save]")
+        print("codes: " + ", ".join(parser.CODES))
+        sys.exit(1)
+
+    stream_codes(
+        code_ids,
+        workers=int(arg_value("--workers", "8")),
+        in_flight=int(arg_value("--in-flight", "0")) or None,
+        save="--save" in sys.argv,
+        base_url=arg_value("--base-url", "") or None,
+        normalize=parse_steps(arg_value("--normalize", "all")),
+        chunk_tokens=int(arg_value("--chunk-tokens", "0")) or None,
+        chunk_overlap=int(arg_value("--chunk-overlap", str(CHUNK_OVERLAP))),
+    )
@@ -0,0 +1,271 @@
+import atexit
+import json
+import os
+import random
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from rich.console import Console
+
+from chunking import CHUNK_OVERLAP
+from law_parser import parser
+from law_parser.metrics import write_report
+from law_parser.normalize import STEPS as NORMALIZE_STEPS, parse_steps
+from manifest import UploadManifest
+from pipeline import stream_code
+from uploader import console
+
+
+STATE_PATH = ".sync.json"
+INTERVAL = 6 * 3600   # seconds between two checks of a code
+JITTER = 0.1          # each interval is stretched or shrunk by up to this fraction, so checks do not bunch up
+CONCURRENCY = 2       # codes checked and synced at once
+RETRY_DELAY = 300     # first retry after a failed check or sync, doubled on every next failure (up to INTERVAL)
+
+
+class SyncState:
+    """
+    Per-code sync state, kept in a JSON file that is rewritten (atomically)
+    after every change, so a restarted daemon carries on where it stopped:
+
+        {"6257291": {"page_sha256": "…", "synced_sha256": "…", "checked_at": …, "next_due": …,
+                     "status": "synced", "failures": 0, "counts": {...}}}
+
+    `synced_sha256` is the page whose articles were last uploaded completely;
+    a code whose cached page differs from it is synced again, even if the
+    daemon died between downloading the page and uploading its articles.
+    """
+    def __init__(self, path: str = STATE_PATH):
+        self.path = os.path.abspath(path)
+        self.lock = threading.Lock()
+        self.codes: dict[str, dict] = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, encoding="utf-8") as state_file:
+                    self.codes = json.load(state_file)
+            except (OSError, ValueError):
+                console.print(f"[yellow]Unreadable sync state {self.path}, starting over[/yellow]")
+
+    def get(self, code_id: str) -> dict:
+        with self.lock:
+            return dict(self.codes.get(code_id, {}))
+
+    def update(self, code_id: str, **fields):
+        with self.lock:
+            self.codes[code_id] = {**self.codes.get(code_id, {}), **fields}
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as state_file:
+                json.dump(self.codes, state_file, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    def due(self, code_ids: list[str], now: float) -> list[str]:
+        """
+        Codes whose next check is due, the most overdue first.
+        """
+        due = [code_id for code_id in code_ids if self.get(code_id).get("next_due", 0) <= now]
+        return sorted(due, key=lambda code_id: self.get(code_id).get("next_due", 0))
+
+    def next_due(self, code_ids: list[str]) -> float:
+        return min((self.get(code_id).get("next_due", 0) for code_id in code_ids), default=0)
+
+
+class SyncDaemon:
+    def __init__(
+        self,
+        code_ids: list[str],
+        state: SyncState | None = None,
+        interval: float = INTERVAL,
+        jitter: float = JITTER,
+        concurrency: int = CONCURRENCY,
+        workers: int = 4,
+        checkpoints: str = ".saved",
+        manifest: UploadManifest | None = None,
+        normalize: tuple[str, ...] = NORMALIZE_STEPS,
+        console: Console = console,
+        **uploader_options,
+    ):
+        self.code_ids = code_ids
+        self.state = state or SyncState()
+        self.interval = interval
+        self.jitter = jitter
+        # At most `concurrency` codes are checked or synced at once; each sync
+        # uploads with its own `workers` threads
+        self.concurrency = max(1, concurrency)
+        self.workers = workers
+        self.checkpoints = checkpoints
+        self.manifest = manifest or UploadManifest()
+        self.normalize = normalize
+        self.console = console
+        self.uploader_options = uploader_options
+        self.stop = threading.Event()
+
+    def schedule(self, code_id: str, failures: int = 0) -> float:
+        """
+        When to check a code next: one jittered interval from now, or an
+        exponential backoff after failures.
+        """
+        if failures:
+            delay = min(self.interval, RETRY_DELAY * 2 ** (failures - 1))
+        else:
+            delay = self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+        return time.time() + delay
+
+    def sync_code(self, code_id: str, pool: parser.ConnectionPool) -> str:
+        """
+        Check one code with a conditional request; if its page changed since
+        the last complete sync, re-parse it into codes/ and upload the
+        articles whose content changed. Returns the code's new status.
+        """
+        folder = parser.CODES[code_id][0]
+        entry = self.state.get(code_id)
+        checked_at = time.time()
+
+        result = parser.fetch_page(code_id, pool, revalidate=True)
+        if result.error:
+            failures = entry.get("failures", 0) + 1
+            self.state.update(
+                code_id, status="error", error=result.error, failures=failures,
+                checked_at=checked_at, next_due=self.schedule(code_id, failures),
+            )
+            self.console.print(f"[red]✗ {folder}: {result.error} (retry {failures})[/red]")
+            return "error"
+
+        page_sha256 = parser.cache_store().page_hash(code_id)
+        if page_sha256 == entry.get("synced_sha256"):
+            self.state.update(
+                code_id, status="unchanged", error=None, failures=0, page_sha256=page_sha256,
+                checked_at=checked_at, next_due=self.schedule(code_id),
+            )
+            self.console.print(f"[dim]- {folder}: unchanged ({result.status})[/dim]")
+            return "unchanged"
+
+        self.state.update(code_id, status="syncing", page_sha256=page_sha256, checked_at=checked_at)
+        self.console.print(f"{folder}: page changed, re-parsing and uploading changed articles")
+        try:
+            counts = stream_code(
+                code_id,
+                workers=self.workers,
+                save=True,
+                checkpoints=self.checkpoints,
+                manifest=self.manifest,
+                normalize=self.normalize,
+                **self.uploader_options,
+            )
+        except Exception as e:
+            counts, error = None, str(e)
+        else:
+            error = f"{counts['failed']} articles failed" if counts["failed"] or counts["cancelled"] else None
+
+        if error:
+            failures = entry.get("failures", 0) + 1
+            self.state.update(
+                code_id, status="error", error=error, failures=failures, counts=counts,
+                next_due=self.schedule(code_id, failures),
+            )
+            self.console.print(f"[red]✗ {folder}: {error} (retry {failures})[/red]")
+            return "error"
+
+        self.state.update(
+            code_id, status="synced", error=None, failures=0, counts=counts, synced_sha256=page_sha256,
+            synced_at=time.time(), next_due=self.schedule(code_id),
+        )
+        return "synced"
+
+    def run_once(self, code_ids: list[str] | None = None) -> dict[str, str]:
+        """
+        Check every due code (or the given ones), `concurrency` at a time.
+        """
+        code_ids = self.state.due(self.code_ids, time.time()) if code_ids is None else code_ids
+        if not code_ids:
+            return {}
+
+        pool = parser.ConnectionPool(limit=self.concurrency)
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                statuses = dict(zip(code_ids, executor.map(lambda code_id: self.checked(code_id, pool), code_ids)))
+        finally:
+            pool.close()
+
+        summary = {status: sum(1 for s in statuses.values() if s == status) for status in set(statuses.values())}
+        self.console.print(f"Checked {len(statuses)} codes: " + ", ".join(f"{n} {s}" for s, n in sorted(summary.items())))
+        return statuses
+
+    def checked(self, code_id: str, pool: parser.ConnectionPool) -> str:
+        """
+        sync_code, unless the daemon is stopping.
+        """
+        return "cancelled" if self.stop.is_set() else self.sync_code(code_id, pool)
+
+    def run_forever(self):
+        """
+        Run due checks until stopped (Ctrl-C or SIGTERM), sleeping until the
+        next code is due in between.
+        """
+        signal.signal(signal.SIGTERM, lambda *_: self.stop.set())
+        self.console.print(
+            f"Syncing {len(self.code_ids)} codes every {self.interval / 60:.0f} min (±{self.jitter:.0%}), "
+            f"{self.concurrency} at a time; state in {self.state.path}"
+        )
+        try:
+            while not self.stop.is_set():
+                self.run_once()
+                wait = max(1.0, self.state.next_due(self.code_ids) - time.time())
+                self.console.print(f"[dim]Next check in {wait / 60:.1f} min[/dim]")
+                self.stop.wait(wait)
+        except KeyboardInterrupt:
+            self.stop.set()
+            self.console.print("[yellow]Stopped; the next run resumes from the sync state[/yellow]")
+
+    def baseline(self):
+        """
+        Take the cached pages as synced without uploading anything, e.g. for
+        a corpus that was parsed and uploaded by hand before.
+        """
+        store = parser.cache_store()
+        cached = [code_id for code_id in self.code_ids if store.has(code_id)]
+        for code_id in cached:
+            page_sha256 = store.page_hash(code_id)
+            self.state.update(code_id, status="synced", synced_sha256=page_sha256, page_sha256=page_sha256)
+        self.console.print(f"Recorded the cached pages of {len(cached)} codes as synced")
+
+
+def arg_value(flag: str, default: str) -> str:
+    if flag in sys.argv and sys.argv.index(flag) + 1 < len(sys.argv):
+        return sys.argv[sys.argv.index(flag) + 1]
+    return default
+
+
+def main():
+    atexit.register(lambda: write_report("sync"))
+    # python sync.py [<code_id>...] [--interval 21600] [--jitter 0.1] [--concurrency 2] [--workers 4] [--state .sync.json]
+    #                [--once] [--baseline] [--base-url URL] [--normalize all|none|widgets,...] [--chunk-tokens 512]
+    # Against the local stand-ins:
+    #   python law_parser/standin.py --port 8765 --dir /tmp/pages   (copies of .cache pages, edited at will)
+    #   python agenthub_standin.py --port 8766
+    #   LEXUZ_BASE_URL=http://127.0.0.1:8765 python sync.py --once --base-url http://127.0.0.1:8766/api
+    code_ids = [a for a in sys.argv[1:] if a in parser.CODES] or list(parser.CODES)
+    daemon = SyncDaemon(
+        code_ids,
+        state=SyncState(arg_value("--state", STATE_PATH)),
+        interval=float(arg_value("--interval", str(INTERVAL))),
+        jitter=float(arg_value("--jitter", str(JITTER))),
+        concurrency=int(arg_value("--concurrency", str(CONCURRENCY))),
+        workers=int(arg_value("--workers", "4")),
+        normalize=parse_steps(arg_value("--normalize", "all")),
+        base_url=arg_value("--base-url", "") or None,
+        chunk_tokens=int(arg_value("--chunk-tokens", "0")) or None,
+        chunk_overlap=int(arg_value("--chunk-overlap", str(CHUNK_OVERLAP))),
+    )
+    if "--baseline" in sys.argv:
+        daemon.baseline()
+    elif "--once" in sys.argv:
+        daemon.run_once(code_ids)
+    else:
+        daemon.run_forever()
+
+
+if __name__ == "__main__":
+    main()
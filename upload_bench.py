@@ -0,0 +1,190 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from rich.console import Console
+from rich.table import Table
+
+from agenthub_standin import serve
+from manifest import UploadManifest
+from uploader import ArticleResult, LawCodeUploader, console, make_session
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    Nearest-rank percentile, `q` in 0..100.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, round(q / 100 * len(ordered) + 0.5))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def latency_summary(values: list[float]) -> dict[str, float]:
+    return {f"p{q}": round(percentile(values, q), 4) for q in (50, 95, 99)}
+
+
+def run_setting(
+    law_codes: list[str],
+    workers: int,
+    base_url: str,
+    batch_size: int = 1,
+    rate_limits: dict[str, float] | None = None,
+    upload_batch: int = 1,
+) -> dict:
+    """
+    Upload every article of `law_codes` once with `workers` concurrent
+    requests, `upload_batch` articles per upload request. Checkpoints and the upload manifest live in a scratch
+    directory, so every run starts from nothing and the real ones are never
+    touched.
+    """
+    results: list[ArticleResult] = []
+    lock = threading.Lock()
+
+    def collect(result: ArticleResult):
+        with lock:
+            results.append(result)
+
+    quiet = Console(quiet=True)
+    session = make_session(pool_size=workers)
+
+    with tempfile.TemporaryDirectory(prefix="upload-bench-") as scratch:
+        manifest = UploadManifest(os.path.join(scratch, ".uploads.jsonl"))
+        started = time.monotonic()
+        for law_code in law_codes:
+            uploader = LawCodeUploader(
+                law_code,
+                checkpoints=os.path.join(scratch, ".saved"),
+                workers=workers,
+                rate_limits=rate_limits,
+                session=session,
+                batch_size=batch_size,
+                manifest=manifest,
+                on_result=collect,
+                console=quiet,
+                base_url=base_url,
+                upload_batch=upload_batch,
+            )
+            uploader.verbose = False
+            # Pipelined even with one worker, so every article reports its timings
+            if batch_size > 1:
+                uploader.run_batched()
+            else:
+                uploader.run_pipelined()
+        elapsed = time.monotonic() - started
+
+    session.close()
+    counts: dict[str, int] = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+
+    uploads = [r.upload_seconds for r in results if r.upload_seconds]
+    ingests = [r.ingest_seconds for r in results if r.ingest_seconds]
+    return {
+        "workers": workers,
+        "batch_size": batch_size,
+        "upload_batch": upload_batch,
+        "articles": len(results),
+        "counts": counts,
+        "seconds": round(elapsed, 3),
+        "articles_per_sec": round(counts.get("ingested", 0) / elapsed, 2) if elapsed else 0.0,
+        "upload": latency_summary(uploads),
+        "ingest": latency_summary(ingests),
+    }
+
+
+def print_results(runs: list[dict]):
+    table = Table(title="Upload throughput")
+    for column in ("workers", "upload batch", "batch", "ingested", "failed", "seconds", "articles/sec", "upload p50/p95/p99", "ingest p50/p95/p99"):
+        table.add_column(column, justify="right")
+
+    for run in runs:
+        table.add_row(
+            str(run["workers"]),
+            str(run.get("upload_batch", 1)),
+            str(run["batch_size"]),
+            f"{run['counts'].get('ingested', 0)}/{run['articles']}",
+            str(run["counts"].get("failed", 0)),
+            f"{run['seconds']:.1f}",
+            f"{run['articles_per_sec']:.1f}",
+            *("/".join(f"{run[call][q] * 1000:.0f}" for q in ("p50", "p95", "p99")) + " ms" for call in ("upload", "ingest")),
+        )
+    console.print(table)
+
+
+def discover(directory: str = "codes") -> list[str]:
+    return sorted(
+        name for name in os.listdir(directory) if os.path.exists(os.path.join(directory, name, "metadata.json"))
+    )
+
+
+def arg_value(flag: str, default: str) -> str:
+    if flag in sys.argv and sys.argv.index(flag) + 1 < len(sys.argv):
+        return sys.argv[sys.argv.index(flag) + 1]
+    return default
+
+
+def main():
+    # python upload_bench.py [--workers 1,4,8,16] [--batch-size 1] [--upload-rate 10] [--codes land,labor] [--save results.json]
+    #                        [--upload-batch 1,50]   (per-file uploads against bulk uploads of 50 articles)
+    #                        [--latency 0.02] [--ingest-latency 0.05] [--fail-rate 0.01] [--throttle-rate 0.05]
+    #                        [--part-fail-rate 0.02] [--max-parts 100]
+    #                        [--base-url URL]   (an already running server instead of the built-in stand-in)
+    law_codes = arg_value("--codes", "").split(",") if "--codes" in sys.argv else discover()
+    settings = [int(w) for w in arg_value("--workers", "1,4,8").split(",")]
+    upload_batches = [int(b) for b in arg_value("--upload-batch", "1").split(",")]
+    batch_size = int(arg_value("--batch-size", "1"))
+    rate_limits = {
+        endpoint: float(arg_value(f"--{endpoint}-rate", "0"))
+        for endpoint in ("upload", "ingest")
+        if float(arg_value(f"--{endpoint}-rate", "0")) > 0
+    }
+
+    server = None
+    base_url = arg_value("--base-url", "")
+    if not base_url:
+        server = serve(
+            latency=float(arg_value("--latency", "0")),
+            ingest_latency=float(arg_value("--ingest-latency", "0")),
+            fail_rate=float(arg_value("--fail-rate", "0")),
+            throttle_rate=float(arg_value("--throttle-rate", "0")),
+            part_fail_rate=float(arg_value("--part-fail-rate", "0")),
+            max_parts=int(arg_value("--max-parts", "0")),
+        )
+        base_url = server.base_url
+
+    console.print(
+        f"Benchmarking {len(law_codes)} codes against {base_url} with workers {settings}, upload batches {upload_batches}"
+    )
+    runs = []
+    for upload_batch in upload_batches:
+        for workers in settings:
+            if server:
+                server.stats.clear()
+            run = run_setting(law_codes, workers, base_url, batch_size, rate_limits, upload_batch)
+            if server:
+                run["server"] = dict(server.stats)
+            runs.append(run)
+            console.print(
+                f"  workers {workers}, upload batch {upload_batch}: {run['articles']} articles in {run['seconds']:.1f}s — "
+                f"{run['articles_per_sec']:.1f} articles/sec" + (f" {run['server']}" if server else "")
+            )
+
+    print_results(runs)
+
+    if server:
+        server.shutdown()
+
+    save_to = arg_value("--save", "")
+    if save_to:
+        with open(save_to, "w", encoding="utf-8") as results_file:
+            json.dump({"base_url": base_url, "codes": law_codes, "runs": runs}, results_file, indent=2)
+        console.print(f"Results saved to {save_to}")
+
+
+if __name__ == "__main__":
+    main()
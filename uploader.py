@@ -1,9 +1,26 @@
 import json
 import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Callable
 
-from interfaces.metadata import Metadata
+from chunking import CHUNK_OVERLAP, chunk_article, fits, fits_unread
+from dedupe import Duplicates
+from interfaces.metadata import CanonicalMetadata, Metadata
+from events import IDLE_TIMEOUT, TOTAL_TIMEOUT, iter_events
+from journal import CheckpointJournal
+from law_parser.catalog import Catalog
+from law_parser.metrics import Span, span
+from law_parser.packed import PackReader, is_packed, pack_path
+from manifest import UploadManifest, UploadPlan, content_hash, file_hash, record_hash
 
-from requests import Session
+from requests import Response, Session
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import mimetypes
 
 from rich.console import Console
@@ -11,18 +28,190 @@ from rich.console import Console
 
 console = Console()
 
+# API root; point it at another host, e.g. the local stand-in: AGENTHUB_BASE_URL=http://127.0.0.1:8766/api
+BASE_URL = os.environ.get("AGENTHUB_BASE_URL", "https://dev-api.ascender-ai.com/api").rstrip("/")
+UPLOAD_PATH = "/agents/1/files?bucket=rag-documents"
+INGEST_PATH = "/rag/documents/1/basic/legai"
+UPLOAD_URL = BASE_URL + UPLOAD_PATH
+INGEST_URL = BASE_URL + INGEST_PATH
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+CONNECT_TIMEOUT = 10.0
+ARTICLE_CONTENT_TYPE = "text/plain"
+UPLOAD_BATCH_BYTES = 4 * 1024 * 1024  # body size ceiling of one bulk upload
+# An ingest stream that closes without a success event did not ingest the file;
+# it is recorded as failed (keeping its file id) and ingested again on resume
+UNCONFIRMED = "ingest stream ended without a success event"
+# Answers to a batched ingest that mean the endpoint does not take a list of metadata
+BATCH_REJECTED_STATUSES = (400, 415, 422)
+
+
+class BatchRejected(Exception):
+    """
+    The ingest endpoint refused a batched request (a list of metadata aligned
+    with `file_ids`) as malformed.
+    """
+
+
+def make_session(pool_size: int = 10, retries: int = 3, backoff: float = 0.5) -> Session:
+    """
+    Create a Session with a connection pool sized for `pool_size` concurrent requests.
+
+    5xx and 429 responses are retried with exponential backoff (honouring Retry-After).
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=None,  # uploads and ingests are POSTs
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+
+    session = Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def retries(response: Response) -> int:
+    """
+    Retries urllib3 made before this response (429s, 5xx, dropped connections).
+    """
+    retry = getattr(response.raw, "retries", None)
+    return len(retry.history) if retry is not None else 0
+
+
+class RateLimiter:
+    """
+    Space calls to an endpoint at most `rate` per second, across threads.
+    """
+    def __init__(self, rate: float | None = None):
+        self.interval = 1 / rate if rate else 0.0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
+
+@dataclass
+class ArticleResult:
+    metadata: Metadata
+    status: str  # uploaded | ingested | skipped | failed | cancelled
+    file_id: int | None = None
+    upload_seconds: float = 0.0
+    ingest_seconds: float = 0.0
+    confirmed: bool = False  # the ingest stream reported success
+    error: str | None = None
+
 
 class LawCodeUploader:
-    def __init__(self, law_code: str, checkpoints: str = ".saved"):
+    def __init__(
+        self,
+        law_code: str,
+        checkpoints: str = ".saved",
+        workers: int = 1,
+        rate_limits: dict[str, float] | None = None,
+        session: Session | None = None,
+        batch_size: int = 1,
+        batch_window: float = 5.0,
+        manifest: UploadManifest | None = None,
+        metadata: list[Metadata] | None = None,
+        idle_timeout: float = IDLE_TIMEOUT,
+        total_timeout: float = TOTAL_TIMEOUT,
+        budget: threading.Semaphore | None = None,
+        stop: threading.Event | None = None,
+        on_result: Callable[[ArticleResult], None] | None = None,
+        executor: ThreadPoolExecutor | None = None,
+        console: Console = console,
+        base_url: str | None = None,
+        chunk_tokens: int | None = None,
+        chunk_overlap: int = CHUNK_OVERLAP,
+        duplicates: Duplicates | None = None,
+        upload_batch: int = 1,
+        upload_batch_bytes: int = UPLOAD_BATCH_BYTES,
+    ):
         self.law_code = law_code
         self.path = os.path.abspath(os.path.join("codes", os.path.normpath(law_code)))
         self.metadata_path = os.path.join(self.path, "metadata.json")
-        self.metadata = self.load_metadata()
+        # Given metadata (e.g. articles streamed straight from the parser) skips metadata.json
+        self.metadata = self.load_metadata() if metadata is None else metadata
+        self.payloads: dict[str, bytes] = {}  # file_path → in-memory article, uploaded instead of the file
+        # Packed layout: every article is a slice of one memory-mapped articles.pack
+        self.pack = PackReader(pack_path(self.path)) if is_packed(self.path) else None
         self.checkpoints_path = os.path.abspath(os.path.normpath(checkpoints))
 
+        self.journal = CheckpointJournal(self.checkpoints_path, law_code)
         self.last_checkpoint: tuple[int, Metadata] | None = None
 
-        self.session = Session()
+        # What the remote side already has, across runs; lives next to the checkpoints
+        self.manifest = manifest or UploadManifest(os.path.join(os.path.dirname(self.checkpoints_path), ".uploads.jsonl"))
+        self.hashes: dict[str, str] = {}
+
+        # duplicates (see dedupe.py) leaves out articles that are near-duplicates
+        # of a canonical copy and lists them in the canonical copy's metadata;
+        # chunk_tokens splits articles longer than that into overlapping chunks
+        # (see chunking.py), uploaded from `payloads`
+        self.chunk_tokens = chunk_tokens
+        self.chunk_overlap = chunk_overlap
+        self.console = console
+        if duplicates:
+            self.metadata = self.fold_duplicates(self.metadata, duplicates)
+        if chunk_tokens:
+            self.metadata = self.chunk(self.metadata)
+
+        # workers > 1 switches run() to the pipelined mode
+        self.workers = max(1, workers)
+        self.verbose = self.workers == 1
+        self.limits = {endpoint: RateLimiter(rate) for endpoint, rate in (rate_limits or {}).items()}
+
+        self.session = session or make_session(pool_size=self.workers)
+        base_url = (base_url or BASE_URL).rstrip("/")
+        self.upload_url = base_url + UPLOAD_PATH
+        self.ingest_url = base_url + INGEST_PATH
+
+        # A streamed ingest response that sends nothing for `idle_timeout` seconds,
+        # or is still open after `total_timeout`, is dropped and counted as failed
+        self.idle_timeout = idle_timeout
+        self.total_timeout = total_timeout
+
+        # Set by LawCodeUploaderChain when several codes run at once: a request budget
+        # shared by every uploader, a stop flag checked before each new article,
+        # a callback for every finished article, and the worker threads (as many
+        # as the budget) shared by every uploader instead of `workers` of their own
+        self.budget = budget
+        self.stop = stop or threading.Event()
+        self.on_result = on_result
+        self.executor = executor
+
+        # batch_size > 1 switches run() to batched ingestion: uploaded file ids are
+        # flushed to the ingest endpoint in groups of `batch_size`, or sooner once
+        # the oldest one has waited `batch_window` seconds. It assumes the endpoint
+        # takes a list of metadata (see ingest_batch); once it refuses one, the
+        # rest of the run ingests one file per request
+        self.batch_size = max(1, batch_size)
+        self.batch_window = batch_window
+        self.batch_ingest = True
+        if self.batch_size > 1:
+            self.verbose = False
+
+        # upload_batch > 1 sends up to that many articles (and at most
+        # `upload_batch_bytes` of them) as attachments of one upload request;
+        # articles the bulk upload did not store are uploaded one by one
+        self.upload_batch = max(1, upload_batch)
+        self.upload_batch_bytes = upload_batch_bytes
+        if self.upload_batch > 1:
+            self.verbose = False
     
     def load_metadata(self) -> list[Metadata]:
         """
@@ -31,14 +220,83 @@ class LawCodeUploader:
         if not os.path.exists(self.metadata_path):
             raise FileNotFoundError(f"Metadata file not found: {self.metadata_path}")
         
-        metadata = json.load(open(self.metadata_path, "r"))
+        with open(self.metadata_path, "r") as metadata_file:
+            metadata = json.load(metadata_file)
         
-        return [Metadata.model_safe_validate(m) for m in metadata]
+        return Metadata.model_safe_validate_many(metadata)
     
+    def fold_duplicates(self, metadata: list[Metadata], duplicates: Duplicates) -> list[Metadata]:
+        """
+        Drop articles whose canonical copy is another article (uploaded with
+        its own code), and attach the duplicates to canonical copies.
+        """
+        folded = []
+        for article in metadata:
+            key = (article.law_type, article.article_number)
+            if key in duplicates.canonical:
+                continue
+            if key in duplicates.copies:
+                article = CanonicalMetadata(
+                    **article.model_dump(),
+                    duplicates=[{"law_type": law_type, "article_number": number} for law_type, number in duplicates.copies[key]],
+                )
+            folded.append(article)
+
+        if len(folded) < len(metadata):
+            self.console.print(f"{self.law_code}: {len(metadata) - len(folded)} near-duplicate articles left to their canonical copies")
+        return folded
+
+    def chunk(self, metadata: list[Metadata]) -> list[Metadata]:
+        """
+        Replace every article longer than `chunk_tokens` with its chunks, in order.
+        """
+        chunked = []
+        long_articles = 0
+
+        for article in metadata:
+            # Short files fit unread; the rest are measured in characters, header included
+            size = self.article_size(article)
+            if size is None or fits_unread(size, self.chunk_tokens):
+                chunked.append(article)
+                continue
+            content = self.read_article(article)
+            if fits(content, self.chunk_tokens):
+                chunked.append(article)
+                continue
+
+            pieces = chunk_article(article, content, self.chunk_tokens, self.chunk_overlap)
+            if len(pieces) > 1:
+                long_articles += 1
+                for piece, data in pieces:
+                    self.payloads[piece.file_path] = data
+                    self.hashes[piece.file_path] = record_hash(content_hash(data), piece)
+            chunked.extend(piece for piece, _ in pieces)
+
+        if long_articles:
+            self.console.print(
+                f"{self.law_code}: {long_articles} articles over {self.chunk_tokens} tokens "
+                f"split into {len(chunked) - len(metadata) + long_articles} chunks"
+            )
+        return chunked
+
+    def read_article(self, metadata: Metadata) -> bytes:
+        """
+        Bytes of an article, from its file or the code's pack.
+        """
+        if self.pack is not None:
+            return bytes(self.pack.read(metadata.article_number))
+        with open(os.path.join(self.path, metadata.file_path), "rb") as article_file:
+            return article_file.read()
+
     def upload(self, metadata: Metadata):
         """
         Upload the law code to AgentHub.
         """
+        if metadata.file_path in self.payloads:
+            return self.post_file(metadata.file_path, self.payloads[metadata.file_path], ARTICLE_CONTENT_TYPE)
+        if self.pack is not None:
+            return self.upload_packed(metadata)
+
         file_path = os.path.join(self.path, metadata.file_path)
         
         if not os.path.exists(file_path):
@@ -51,18 +309,98 @@ class LawCodeUploader:
                 raise ValueError(f"Unable to determine content type for file: {file_path}")
             
             # Upload the file to AgentHub
-            response = self.session.post(
-                "https://dev-api.ascender-ai.com/api/agents/1/files?bucket=rag-documents",
-                files={"attachment": (os.path.basename(file_path), article_file, content_type)},
-            )
+            self.throttle("upload")
+            with self.slot(), span("upload", code=self.law_code) as upload_span:
+                response = self.session.post(
+                    self.upload_url,
+                    files={"attachment": (os.path.basename(file_path), article_file, content_type)},
+                )
+                self.observe(upload_span, response)
             
-            print(response)
+            if self.verbose:
+                print(response)
 
             if response.status_code != 200:
                 raise Exception(f"Failed to upload file: {response.text}")
         
         # Return the response
         return response
+
+    def upload_packed(self, metadata: Metadata):
+        """
+        Upload an article straight out of the code's articles.pack.
+        """
+        if metadata.article_number not in self.pack:
+            raise FileNotFoundError(f"Article {metadata.article_number} not found in {self.pack.path}")
+
+        return self.post_file(metadata.file_path, self.pack.read(metadata.article_number), ARTICLE_CONTENT_TYPE)
+
+    def post_file(self, name: str, payload: bytes | memoryview, content_type: str):
+        """
+        Upload an in-memory article.
+        """
+        self.throttle("upload")
+        with self.slot(), span("upload", code=self.law_code) as upload_span:
+            response = self.session.post(
+                self.upload_url,
+                files={"attachment": (name, payload, content_type)},
+            )
+            self.observe(upload_span, response)
+
+        if self.verbose:
+            print(response)
+
+        if response.status_code != 200:
+            raise Exception(f"Failed to upload file: {response.text}")
+
+        return response
+
+    def article_part(self, metadata: Metadata) -> tuple[str, bytes | memoryview, str]:
+        """
+        (file name, bytes, content type) of an article, as one multipart attachment.
+        """
+        if metadata.file_path in self.payloads:
+            return metadata.file_path, self.payloads[metadata.file_path], ARTICLE_CONTENT_TYPE
+        if self.pack is not None:
+            if metadata.article_number not in self.pack:
+                raise FileNotFoundError(f"Article {metadata.article_number} not found in {self.pack.path}")
+            return metadata.file_path, self.pack.read(metadata.article_number), ARTICLE_CONTENT_TYPE
+
+        file_path = os.path.join(self.path, metadata.file_path)
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+        content_type, _ = mimetypes.guess_type(file_path)
+        if content_type is None:
+            raise ValueError(f"Unable to determine content type for file: {file_path}")
+        with open(file_path, "rb") as article_file:
+            return os.path.basename(file_path), article_file.read(), content_type
+
+    def upload_many(self, parts: list[tuple[str, bytes | memoryview, str]]) -> list[int | None]:
+        """
+        Upload several articles with one multipart request, one `attachment`
+        field each. The response lists the stored files in attachment order,
+        {"files": [{"filename": …, "id": …}, …]}; an entry with an "error"
+        instead of an id is a file the server did not store. Returns the file
+        ids in order, None for those; raises if the request as a whole failed.
+        """
+        self.throttle("upload")
+        with self.slot(), span("upload", code=self.law_code) as upload_span:
+            response = self.session.post(self.upload_url, files=[("attachment", part) for part in parts])
+            self.observe(upload_span, response, articles=len(parts))
+
+        if response.status_code != 200:
+            raise Exception(f"Failed to upload {len(parts)} files: {response.text}")
+
+        files = response.json().get("files")
+        if not isinstance(files, list) or len(files) != len(parts):
+            raise Exception(f"Bulk upload answered {len(files) if isinstance(files, list) else 'no'} entries for {len(parts)} files")
+
+        file_ids = []
+        for (name, _, _), entry in zip(parts, files):
+            if entry.get("filename", name) != name:
+                raise Exception(f"Bulk upload answered {entry.get('filename')!r} in place of {name!r}")
+            file_ids.append(entry.get("id"))
+        return file_ids
     
     def ingest(self, file_id: int, metadata: Metadata):
         """
@@ -71,87 +409,690 @@ class LawCodeUploader:
         # Here you would implement the logic to ingest the law code into the database
         # For example, you could use an ORM or a direct SQL query to insert the data
         # into the database.
-        print(metadata)
-        response = self.session.post(
-            "https://dev-api.ascender-ai.com/api/rag/documents/1/basic/legai",
-            json={
-                "file_ids": [file_id],
-                "metadata": metadata.model_dump(mode="json", exclude={"article_title_number",}),
-            },
-            stream=True
-        )
+        if self.verbose:
+            print(metadata)
+        self.throttle("ingest")
+        with span("ingest", code=self.law_code) as ingest_span:
+            response = self.session.post(
+                self.ingest_url,
+                json={
+                    "file_ids": [file_id],
+                    "metadata": metadata.model_dump(mode="json", exclude={"article_title_number",}),
+                },
+                stream=True,
+                timeout=(CONNECT_TIMEOUT, self.idle_timeout),
+            )
+            self.observe(ingest_span, response)
         
-        print(response)
+        if self.verbose:
+            print(response)
         if response.status_code != 200:
             raise Exception(f"Failed to ingest file: {response.text}")
         
         return response
 
-    def save_checkpoint(self, index: int, metadata: Metadata):
+    def ingest_batch(self, batch: list[tuple[int, Metadata]]) -> Response:
+        """
+        Ingest several uploaded files with one request. `metadata` is sent as a
+        list aligned with `file_ids`, so every file keeps its own metadata.
+
+        The single-file request sends one metadata object; the list shape is
+        an assumption about the endpoint (agenthub_standin.py accepts it), so
+        a 400/415/422 answer raises BatchRejected and the caller falls back to
+        single-file ingests.
+        """
+        self.throttle("ingest")
+        with span("ingest", code=self.law_code) as ingest_span:
+            response = self.session.post(
+                self.ingest_url,
+                json={
+                    "file_ids": [file_id for file_id, _ in batch],
+                    "metadata": [
+                        metadata.model_dump(mode="json", exclude={"article_title_number",}) for _, metadata in batch
+                    ],
+                },
+                stream=True,
+                timeout=(CONNECT_TIMEOUT, self.idle_timeout),
+            )
+            self.observe(ingest_span, response, articles=len(batch))
+
+        if response.status_code in BATCH_REJECTED_STATUSES:
+            raise BatchRejected(f"HTTP {response.status_code}: {response.text}")
+        if response.status_code != 200:
+            raise Exception(f"Failed to ingest batch: {response.text}")
+
+        return response
+
+    def drain_batch(self, ingest_response: Response, file_ids: list[int]) -> dict[int, bool]:
         """
-        Save a checkpoint of the current state.
+        Read a batched ingest stream and map its events back to files.
+
+        Events naming a `file_id` (or `file_ids`) settle those files; a bare
+        success or error event settles every file not yet reported. Files the
+        stream never mentions are left False so they get retried one by one.
         """
-        checkpoint_path = os.path.join(self.checkpoints_path, self.law_code, f"{index}.json")
-        os.makedirs(os.path.dirname(checkpoint_path), exist_ok=True)
-        
-        with open(checkpoint_path, "w") as checkpoint_file:
-            json.dump({"index": index, "metadata": metadata.model_dump()}, checkpoint_file)
+        outcome = {file_id: False for file_id in file_ids}
+        reported: set[int] = set()
+
+        with span("ingest_stream", code=self.law_code) as stream_span:
+            for event in iter_events(ingest_response, self.total_timeout):
+                stream_span.count(events=1)
+                if not event.final:
+                    continue
+
+                targets = event.file_ids
+                if targets is None:
+                    targets = [file_id for file_id in file_ids if file_id not in reported]
+
+                for file_id in targets:
+                    if file_id in outcome:
+                        outcome[file_id] = event.succeeded
+                        reported.add(file_id)
+
+        return outcome
+
+    def observe(self, request_span: Span, response: Response, articles: int = 1):
+        """
+        Count a request's articles, body bytes and retries into its span; a
+        non-200 response marks the span failed.
+        """
+        request_span.count(articles=articles, bytes=len(response.request.body or b""), retries=retries(response))
+        if response.status_code != 200:
+            request_span.error = f"HTTP {response.status_code}"
+
+    def slot(self):
+        """
+        Hold one request of the shared in-flight budget, if there is one. Streamed
+        ingests hold it until the stream is drained.
+        """
+        return self.budget or nullcontext()
+
+    def throttle(self, endpoint: str):
+        """
+        Wait for the endpoint's rate limit, if one is configured.
+        """
+        if endpoint in self.limits:
+            self.limits[endpoint].wait()
+
+    def drain_ingest(self, ingest_response: Response, metadata: Metadata) -> bool:
+        """
+        Read the streamed ingest response to the end. Returns True if it reported
+        success; raises if it reported an error or stalled.
+        """
+        succeeded = False
+
+        with span("ingest_stream", code=self.law_code) as stream_span:
+            for event in iter_events(ingest_response, self.total_timeout):
+                stream_span.count(events=1)
+                if event.succeeded:
+                    succeeded = True
+                    if self.verbose:
+                        self.console.print(f"Ingested {metadata.file_path} successfully.")
+                elif event.failed:
+                    raise Exception(f"Failed to ingest file: {event.data.get('message') or event.data}")
+                elif self.verbose:
+                    self.console.print(event.data)
+
+        return succeeded
+
+    def save_checkpoint(
+        self,
+        index: int,
+        metadata: Metadata,
+        state: str,
+        file_id: int | None = None,
+        error: str | None = None,
+        **timings: float,
+    ):
+        """
+        Record an article's state in the checkpoint journal, and in the upload
+        manifest once it is uploaded or ingested.
+        """
+        with span("checkpoint", code=self.law_code, state=state):
+            self.journal.record(
+                index, metadata.file_path, state, file_id=file_id, error=error, sha256=self.hashes.get(metadata.file_path)
+            )
+
+            if state in ("uploaded", "ingested") and metadata.file_path in self.hashes:
+                if file_id is None:
+                    file_id = self.journal.entries[metadata.file_path].get("file_id")
+                self.manifest.record(
+                    metadata.law_type, metadata.article_number, self.hashes[metadata.file_path], state, file_id, **timings
+                )
     
     def load_checkpoint(self) -> tuple[int, Metadata] | None:
-        checkpoint_path = os.path.join(self.checkpoints_path, self.law_code)
+        """
+        The last article of the contiguous run of done (ingested or skipped) articles.
+        """
+        file_paths = [m.file_path for m in self.metadata]
+        self.journal.import_legacy(file_paths)
 
-        if not os.path.exists(checkpoint_path):
-            return None
-        
-        checkpoints = [f for f in os.listdir(checkpoint_path) if f.endswith(".json")]
-        if not checkpoints:
+        index = self.journal.watermark(file_paths, self.hashes)
+        if index is None:
             return None
-        
-        checkpoints.sort(key=lambda x: int(x.split(".")[0]))
-        last_checkpoint = checkpoints[-1]
-        checkpoint_file = os.path.join(checkpoint_path, last_checkpoint)
-        
-        with open(checkpoint_file, "r") as file:
-            checkpoint = json.load(file)
-            index = checkpoint["index"]
-            metadata = Metadata.model_validate(checkpoint["metadata"], strict=False, from_attributes=True)
 
-        return index, metadata
+        return index, self.metadata[index]
 
-    def run(self):
+    def plan(self) -> UploadPlan:
+        """
+        Sort articles into new, changed and unchanged by comparing the sha256
+        of their files with the upload manifest. Reads local files only.
+        """
+        plan = UploadPlan(self.law_code)
+
+        for index, metadata in enumerate(self.metadata):
+            size = self.article_size(metadata)
+            if size is None:
+                plan.missing.append((index, metadata))
+                continue
+
+            sha256 = self.article_hash(metadata)
+            entry = self.manifest.get(metadata.law_type, metadata.article_number)
+
+            if entry is None:
+                plan.new.append((index, metadata))
+            elif entry["sha256"] != sha256:
+                plan.changed.append((index, metadata))
+            elif entry["status"] == "ingested":
+                plan.unchanged.append((index, metadata))
+                continue
+            else:
+                plan.new.append((index, metadata))  # uploaded earlier but never ingested
+
+            plan.bytes_to_upload += size
+
+        return plan
+
+    def article_size(self, metadata: Metadata) -> int | None:
+        """
+        Size of an article's file (or pack entry), None if it is missing.
+        """
+        if metadata.file_path in self.payloads:
+            return len(self.payloads[metadata.file_path])
+        if self.pack is not None:
+            return self.pack.size(metadata.article_number) if metadata.article_number in self.pack else None
+
+        file_path = os.path.join(self.path, metadata.file_path)
+        return os.path.getsize(file_path) if os.path.exists(file_path) else None
+
+    def article_hash(self, metadata: Metadata) -> str:
+        """
+        sha256 of an article's file (a pack has it in its index already),
+        combined with its duplicate list for a canonical copy.
+        """
+        if metadata.file_path not in self.hashes:
+            if self.pack is not None:
+                sha256 = self.pack.sha256(metadata.article_number)
+            else:
+                sha256 = file_hash(os.path.join(self.path, metadata.file_path))
+            self.hashes[metadata.file_path] = record_hash(sha256, metadata)
+        return self.hashes[metadata.file_path]
+
+    def print_plan(self):
+        """
+        Dry run: show what run() would send, and roughly how long it would take.
+        """
+        plan = self.plan()
+        estimate = plan.estimate_seconds(self.manifest, self.workers, self.batch_size)
+
+        self.console.print(
+            f"[bold]{self.law_code}:[/bold] {len(plan.new)} new, {len(plan.changed)} changed, "
+            f"{len(plan.unchanged)} unchanged, {len(plan.missing)} missing"
+        )
+        self.console.print(
+            f"  would upload {plan.to_upload} files ({plan.bytes_to_upload / 1024:.0f} KB) — "
+            f"~{estimate:.0f}s with {self.workers} workers"
+        )
+
+    def known_file_id(self, metadata: Metadata) -> int | None:
+        """
+        File id of an article already uploaded with its current content, from
+        the journal of this run or from the manifest of an earlier one.
+        """
+        file_id = self.journal.file_id(metadata.file_path, self.hashes.get(metadata.file_path))
+        if file_id is not None:
+            return file_id
+
+        entry = self.manifest.get(metadata.law_type, metadata.article_number)
+        if entry and entry["status"] == "uploaded" and entry["sha256"] == self.hashes.get(metadata.file_path):
+            return entry["file_id"]
+        return None
+
+    def pending(self) -> list[tuple[int, Metadata]]:
+        """
+        Articles that are not done yet, with their indexes. Articles after the
+        checkpoint that concurrent workers already finished are skipped too,
+        and so are unchanged articles the manifest has as ingested.
+        """
+        plan = self.plan()
         self.last_checkpoint = self.load_checkpoint()
-        
+
         start_index = 0
-        
+
         if self.last_checkpoint:
             start_index = self.last_checkpoint[0] + 1
-            self.metadata = self.metadata[start_index:]
-        
-        for index, metadata in enumerate(self.metadata):
-            console.print(f"Processing {metadata.file_path}...")
-            
-            try:
-                upload_response = self.upload(metadata)
-            except FileNotFoundError:
-                console.print(f"File not found! Skipping {metadata.file_path}")
+
+        if plan.unchanged:
+            self.console.print(f"{self.law_code}: {len(plan.unchanged)} unchanged articles already ingested, skipping")
+        unchanged = {metadata.file_path for _, metadata in plan.unchanged}
+
+        return [
+            (index, metadata)
+            for index, metadata in enumerate(self.metadata)
+            if index >= start_index
+            and not self.journal.done(metadata.file_path, self.hashes.get(metadata.file_path))
+            and metadata.file_path not in unchanged
+        ]
+
+    def run(self):
+        try:
+            if self.batch_size > 1:
+                self.run_batched()
+            elif self.workers > 1 or self.budget is not None or self.upload_batch > 1:
+                self.run_pipelined()
+            else:
+                self.run_sequential()
+        finally:
+            self.record_catalog()
+            self.journal.compact()
+
+    def run_sequential(self):
+        """
+        One article at a time: upload, checkpoint, ingest, checkpoint. An
+        article that fails is recorded as failed and the run goes on.
+        """
+        pending = self.pending()
+        if not pending:
+            self.console.print(f"[green]{self.law_code}: nothing left to upload.[/green]")
+            return
+
+        started = time.monotonic()
+        results: list[ArticleResult] = []
+
+        try:
+            for index, metadata in pending:
+                self.console.print(f"Processing {metadata.file_path}...")
+                result = ArticleResult(metadata, "uploaded", self.known_file_id(metadata))
+                results.append(result)
+
+                if result.file_id is not None:
+                    self.console.print(f"Already uploaded with ID: {result.file_id}, resuming ingest")
+                else:
+                    upload_started = time.monotonic()
+                    try:
+                        result.file_id = self.upload(metadata).json()["id"]
+                    except FileNotFoundError:
+                        self.console.print(f"File not found! Skipping {metadata.file_path}")
+                        self.save_checkpoint(index, metadata, "skipped")
+                        result.status = "skipped"
+                        continue
+                    except Exception as e:
+                        self.console.print(f"[red]✗ {metadata.file_path}: {e}[/red]")
+                        self.save_checkpoint(index, metadata, "failed", error=str(e))
+                        result.status, result.error = "failed", str(e)
+                        continue
+                    result.upload_seconds = time.monotonic() - upload_started
+
+                    self.console.print(f"File uploaded with ID: {result.file_id}")
+                    self.console.print(f"Saving checkpoint for {metadata.file_path}...")
+                    self.save_checkpoint(index, metadata, "uploaded", result.file_id, upload_seconds=result.upload_seconds)
+                    self.console.print(f"Checkpoint saved at {self.journal.path}...")
+
+                self.console.print(f"Ingesting {metadata.file_path}...")
+                self.ingest_one(index, result)
+                if result.status == "failed":
+                    self.console.print(f"[red]✗ {metadata.file_path}: {result.error}[/red]")
+        finally:
+            self.report(results, time.monotonic() - started)
+
+    def upload_only(self, index: int, metadata: Metadata) -> ArticleResult:
+        """
+        Upload one article (unless it is uploaded already) and record it.
+        Runs on a worker thread; never raises.
+        """
+        if self.stop.is_set():
+            return ArticleResult(metadata, "cancelled")
+
+        file_id = self.known_file_id(metadata)
+        if file_id is not None:
+            return ArticleResult(metadata, "uploaded", file_id)
+
+        started = time.monotonic()
+
+        try:
+            file_id = self.upload(metadata).json()["id"]
+        except FileNotFoundError:
+            self.save_checkpoint(index, metadata, "skipped")
+            return ArticleResult(metadata, "skipped", error="file not found")
+        except Exception as e:
+            self.save_checkpoint(index, metadata, "failed", error=str(e))
+            return ArticleResult(metadata, "failed", upload_seconds=time.monotonic() - started, error=str(e))
+
+        upload_seconds = time.monotonic() - started
+        self.save_checkpoint(index, metadata, "uploaded", file_id, upload_seconds=upload_seconds)
+        return ArticleResult(metadata, "uploaded", file_id, upload_seconds)
+
+    def upload_groups(self, pending: list[tuple[int, Metadata]]) -> list[list[tuple[int, Metadata]]]:
+        """
+        Split pending articles, in order, into bulk uploads of at most
+        `upload_batch` articles and `upload_batch_bytes` bytes. An article
+        bigger than the byte ceiling goes alone.
+        """
+        groups: list[list[tuple[int, Metadata]]] = []
+        group: list[tuple[int, Metadata]] = []
+        group_bytes = 0
+
+        for index, metadata in pending:
+            size = self.article_size(metadata) or 0
+            if group and (len(group) >= self.upload_batch or group_bytes + size > self.upload_batch_bytes):
+                groups.append(group)
+                group, group_bytes = [], 0
+            group.append((index, metadata))
+            group_bytes += size
+
+        if group:
+            groups.append(group)
+        return groups
+
+    def upload_group(self, group: list[tuple[int, Metadata]]) -> list[ArticleResult]:
+        """
+        Upload a group of articles with one bulk request and record each of
+        them. Articles the request did not store, or all of them if it failed,
+        fall back to upload_only. Runs on a worker thread; never raises.
+        """
+        if len(group) == 1:
+            return [self.upload_only(*group[0])]
+        if self.stop.is_set():
+            return [ArticleResult(metadata, "cancelled") for _, metadata in group]
+
+        results: dict[int, ArticleResult] = {}
+        to_send: list[tuple[int, Metadata]] = []
+        parts = []
+        for index, metadata in group:
+            file_id = self.known_file_id(metadata)
+            if file_id is not None:
+                results[index] = ArticleResult(metadata, "uploaded", file_id)
                 continue
-            
-            console.print(f"File uploaded with ID: {upload_response.json()['id']}")
-            
-            console.print(f"Saving checkpoint for {metadata.file_path}...")
-            self.save_checkpoint(start_index + index, metadata)
-            console.print(f"Checkpoint saved at {self.checkpoints_path}...")
+            try:
+                parts.append(self.article_part(metadata))
+                to_send.append((index, metadata))
+            except Exception:
+                pass  # upload_only records it as skipped or failed
 
-            console.print(f"Ingesting {metadata.file_path}...")
-            ingest_response = self.ingest(upload_response.json()["id"], metadata)
-            
-            for content in ingest_response.iter_content(chunk_size=1024):
+        file_ids: list[int | None] = [None] * len(to_send)
+        started = time.monotonic()
+        if len(to_send) > 1:
+            try:
+                file_ids = self.upload_many(parts)
+            except Exception as e:
+                self.console.print(f"[yellow]Bulk upload failed ({e}), uploading {len(to_send)} articles one by one[/yellow]")
+        upload_seconds = (time.monotonic() - started) / max(1, len(to_send))
+
+        for (index, metadata), file_id in zip(to_send, file_ids):
+            if file_id is not None:
+                self.save_checkpoint(index, metadata, "uploaded", file_id, upload_seconds=upload_seconds)
+                results[index] = ArticleResult(metadata, "uploaded", file_id, upload_seconds)
+
+        return [results[index] if index in results else self.upload_only(index, metadata) for index, metadata in group]
+
+    def ingest_one(self, index: int, result: ArticleResult):
+        """
+        Ingest one uploaded article and record the outcome. Updates `result` in place.
+        """
+        started = time.monotonic()
+
+        try:
+            with self.slot(), self.ingest(result.file_id, result.metadata) as ingest_response:
+                result.confirmed = self.drain_ingest(ingest_response, result.metadata)
+            if result.confirmed:
+                result.status = "ingested"
+            else:
+                result.status, result.error = "failed", UNCONFIRMED
+        except Exception as e:
+            result.status, result.error = "failed", str(e)
+
+        result.ingest_seconds += time.monotonic() - started
+
+        if result.status == "ingested":
+            self.save_checkpoint(
+                index, result.metadata, "ingested", result.file_id, ingest_seconds=result.ingest_seconds
+            )
+        else:
+            self.save_checkpoint(index, result.metadata, "failed", result.file_id, error=result.error)
+
+    def process(self, index: int, metadata: Metadata) -> ArticleResult:
+        """
+        Upload and ingest one article. Runs on a worker thread; never raises.
+        """
+        result = self.upload_only(index, metadata)
+        if result.status == "uploaded":
+            self.ingest_one(index, result)
+        return result
+
+    def process_group(self, group: list[tuple[int, Metadata]]) -> list[ArticleResult]:
+        """
+        Upload a group of articles with one bulk request, then ingest each.
+        Runs on a worker thread; never raises.
+        """
+        results = self.upload_group(group)
+        for (index, _), result in zip(group, results):
+            if result.status == "uploaded":
+                self.ingest_one(index, result)
+        return results
+
+    def run_pipelined(self):
+        """
+        Upload and ingest articles on a pool of `workers` threads.
+
+        Every state change goes to the checkpoint journal as it happens, so a
+        resume picks up exactly the articles that were failed or in flight.
+        Results are reported in article order.
+        """
+        pending = self.pending()
+        if not pending:
+            self.console.print(f"[green]{self.law_code}: nothing left to upload.[/green]")
+            return
+
+        groups = self.upload_groups(pending)
+        self.console.print(
+            f"Uploading {len(pending)} articles of {self.law_code} with {self.workers} workers"
+            + (f" in {len(groups)} bulk uploads..." if len(groups) < len(pending) else "...")
+        )
+
+        started = time.monotonic()
+        finished: dict[int, ArticleResult] = {}
+        results: list[ArticleResult] = []
+        next_offset = 0
+
+        pool = self.executor or ThreadPoolExecutor(max_workers=self.workers)
+        futures = {}
+        try:
+            offset = 0
+            for group in groups:
+                futures[pool.submit(self.process_group, group)] = offset
+                offset += len(group)
+
+            for future in as_completed(futures):
+                for offset, result in enumerate(future.result(), futures[future]):
+                    finished[offset] = result
+                    if self.on_result:
+                        self.on_result(result)
+
+                # Report in article order
+                while next_offset in finished:
+                    result = finished.pop(next_offset)
+                    results.append(result)
+                    index = pending[next_offset][0]
+
+                    if result.status == "cancelled":
+                        pass
+                    elif result.status == "failed":
+                        self.console.print(f"[red]✗ {index} {result.metadata.file_path}: {result.error}[/red]")
+                    elif result.status == "skipped":
+                        self.console.print(f"[yellow]- {index} {result.metadata.file_path}: file not found, skipped[/yellow]")
+                    else:
+                        self.console.print(f"[green]✓[/green] {index} {result.metadata.file_path} (file id {result.file_id})")
+
+                    next_offset += 1
+        except KeyboardInterrupt:
+            self.console.print("[yellow]Interrupted, waiting for in-flight articles...[/yellow]")
+            if pool is not self.executor:
+                pool.shutdown(wait=True, cancel_futures=True)
+            raise
+        finally:
+            if pool is self.executor:
+                wait(futures)
+            else:
+                pool.shutdown(wait=True)
+            self.report(results, time.monotonic() - started)
+
+    def flush(self, batch: list[tuple[int, ArticleResult]]):
+        """
+        Ingest a batch of uploaded articles, then retry the ones the batch
+        stream did not confirm individually. Updates the results in place.
+        """
+        uploaded = [(index, result) for index, result in batch if result.status == "uploaded"]
+        if not uploaded:
+            return
+
+        if not self.batch_ingest:
+            for index, result in uploaded:
+                self.ingest_one(index, result)
+            return
+
+        started = time.monotonic()
+        try:
+            with self.slot(), self.ingest_batch([(r.file_id, r.metadata) for _, r in uploaded]) as ingest_response:
+                outcome = self.drain_batch(ingest_response, [r.file_id for _, r in uploaded])
+        except BatchRejected as e:
+            self.batch_ingest = False
+            self.console.print(f"[yellow]The ingest endpoint refused a batch ({e}); ingesting one file per request from now on[/yellow]")
+            outcome = {}
+        except Exception as e:
+            self.console.print(f"[yellow]Batch ingest failed ({e}), retrying {len(uploaded)} articles one by one[/yellow]")
+            outcome = {}
+
+        elapsed = (time.monotonic() - started) / len(uploaded)
+
+        for index, result in uploaded:
+            result.ingest_seconds = elapsed
+            if outcome.get(result.file_id):
+                result.status, result.confirmed = "ingested", True
+                self.save_checkpoint(index, result.metadata, "ingested", result.file_id, ingest_seconds=elapsed)
+            else:
+                self.ingest_one(index, result)
+
+    def run_batched(self):
+        """
+        Upload articles (on `workers` threads) and ingest them in batches.
+
+        Progress is printed once per batch; the journal records every
+        article's upload and ingest as they happen.
+        """
+        pending = self.pending()
+        if not pending:
+            self.console.print(f"[green]{self.law_code}: nothing left to upload.[/green]")
+            return
+
+        self.console.print(
+            f"Uploading {len(pending)} articles of {self.law_code} "
+            f"in batches of {self.batch_size} with {self.workers} workers..."
+        )
+
+        started = time.monotonic()
+        results: list[ArticleResult] = []
+        batch: list[tuple[int, ArticleResult]] = []
+        batch_opened = 0.0
+        batches = 0
+
+        def flush_batch():
+            nonlocal batches
+            batch.sort(key=lambda item: item[0])
+            self.flush(batch)
+            batches += 1
+
+            done = sum(1 for _, r in batch if r.status == "ingested")
+            failures = [(index, r) for index, r in batch if r.status == "failed"]
+            self.console.print(
+                f"[green]✓[/green] batch {batches}: articles {batch[0][0]}-{batch[-1][0]}, "
+                f"{done} ingested, {len(failures)} failed"
+            )
+            for index, result in failures:
+                self.console.print(f"[red]✗ {index} {result.metadata.file_path}: {result.error}[/red]")
+
+            results.extend(result for _, result in batch)
+            if self.on_result:
+                for _, result in batch:
+                    self.on_result(result)
+            batch.clear()
+
+        with nullcontext(self.executor) if self.executor else ThreadPoolExecutor(max_workers=self.workers) as pool:
+            # Uploads are taken as they finish, so a slow one cannot hold a batch past its window
+            finished: queue.Queue = queue.Queue()
+            groups = self.upload_groups(pending)
+            for group in groups:
+                future = pool.submit(self.upload_group, group)
+                future.add_done_callback(lambda future, group=group: finished.put((group, future)))
+
+            received = 0
+            while received < len(groups):
+                window = max(0.0, batch_opened + self.batch_window - time.monotonic()) if batch else None
                 try:
-                    content = json.loads(content)
-                    if content.get("status") == "success":
-                        console.print(f"Ingested {metadata.file_path} successfully.")
-
-                except json.JSONDecodeError:
-                    console.print(content)
-                    console.print(f"Error decoding JSON: {content}")
-                    continue
\ No newline at end of file
+                    group, future = finished.get(timeout=window)
+                except queue.Empty:
+                    flush_batch()
+                    continue
+                received += 1
+
+                for (index, _), result in zip(group, future.result()):
+                    if not batch:
+                        batch_opened = time.monotonic()
+                    batch.append((index, result))
+
+                    if len(batch) >= self.batch_size or time.monotonic() - batch_opened >= self.batch_window:
+                        flush_batch()
+
+            if batch:
+                flush_batch()
+
+        self.report(results, time.monotonic() - started)
+
+    def record_catalog(self):
+        """
+        Record how much of the code is ingested in the corpus catalog
+        (codes/catalog.json), so status screens need no journal or manifest.
+        """
+        ingested = 0
+        for metadata in self.metadata:
+            entry = self.manifest.get(metadata.law_type, metadata.article_number)
+            if entry and entry["status"] == "ingested" and entry["sha256"] == self.hashes.get(metadata.file_path):
+                ingested += 1
+        failed = len(self.journal.by_state().get("failed", []))
+
+        try:
+            Catalog(os.path.dirname(self.path)).record_upload(
+                self.law_code, ingested=ingested, failed=failed, pending=len(self.metadata) - ingested
+            )
+        except OSError as e:
+            self.console.print(f"[yellow]Could not update the catalog: {e}[/yellow]")
+
+    def report(self, results: list[ArticleResult], elapsed: float):
+        """
+        Print throughput numbers for a run.
+        """
+        ingested = [r for r in results if r.status == "ingested"]
+        failed = sum(1 for r in results if r.status == "failed")
+        skipped = sum(1 for r in results if r.status == "skipped")
+        cancelled = sum(1 for r in results if r.status == "cancelled")
+
+        confirmed = sum(1 for r in ingested if r.confirmed)
+
+        self.console.print(
+            f"[bold]{self.law_code}:[/bold] {len(ingested)} ingested ({confirmed} confirmed), "
+            f"{skipped} skipped, {failed} failed" + (f", {cancelled} cancelled " if cancelled else " ") +
+            f"in {elapsed:.1f}s — {(len(results) - cancelled) / elapsed if elapsed else 0:.2f} articles/sec"
+        )
+        if ingested:
+            upload = sum(r.upload_seconds for r in ingested) / len(ingested)
+            ingest = sum(r.ingest_seconds for r in ingested) / len(ingested)
+            self.console.print(f"  avg upload {upload * 1000:.0f} ms, avg ingest {ingest * 1000:.0f} ms")